@@ -1,21 +1,27 @@
-from fastapi import FastAPI, UploadFile, File, HTTPException, Body, Depends
+from fastapi import FastAPI, UploadFile, File, HTTPException, Body, Depends, Header, Query, Response
 from fastapi.middleware.cors import CORSMiddleware
-from typing import List
+from typing import List, Literal, Optional
 from dotenv import load_dotenv
-import pymupdf as fitz  # PyMuPDF
+from datetime import date, time
+import asyncio
 import os
 
 # Import all our models and services
-from .models import CalendarEvent, VerifiedTask
+from .models import AssignmentPlanResponse, CalendarEvent, VerifiedTask
 from .services import (
     agent1_ingestor,
     agent2_verifier,
     agent3_scheduler,
     base_layer,
-    cache
+    batch_scheduler,
+    cache,
+    document_extractor,
+    pdf_extractor
 )
-from .services.google_calendar_service import google_calendar_service
-from .routers import planner
+from .services import metrics as metrics_module
+from .services import tracing
+from .services.google_calendar_service import async_google_calendar_service
+from .routers import debug, planner, scheduler
 
 # Load .env file (for GEMINI_API_KEY)
 load_dotenv()
@@ -36,32 +42,51 @@ app.add_middleware(
     allow_methods=["*"],
     allow_headers=["*"],
 )
+app.add_middleware(metrics_module.MetricsMiddleware)
+# Added last so it wraps everything else and the trace covers the whole request
+app.add_middleware(tracing.TracingMiddleware)
 
 @app.on_event("startup")
 async def startup_event():
     """Initialize Google Calendar on startup"""
     print("Initializing Google Calendar service...")
-    if google_calendar_service.initialize_service():
+    if await async_google_calendar_service.initialize_service():
         # Try to create a new public calendar
-        calendar_id = google_calendar_service.create_public_calendar(
+        calendar_id = await async_google_calendar_service.create_public_calendar(
             summary="Aura Event Schedule",
             description="All events and schedules managed by Aura AI Scheduler",
             timezone="America/New_York"
         )
         if calendar_id:
             print(f"Successfully created and configured public calendar: {calendar_id}")
-            embed_url = google_calendar_service.get_embed_url()
+            embed_url = async_google_calendar_service.get_embed_url()
             print(f"Embed URL: {embed_url}")
         else:
             print("Failed to create calendar. Check your credentials.")
     else:
         print("Google Calendar service initialization failed. Calendar features will be disabled.")
 
+@app.on_event("shutdown")
+async def shutdown_event():
+    """Release the Google Calendar worker pool and PDF / batch worker processes"""
+    async_google_calendar_service.shutdown()
+    pdf_extractor.shutdown()
+    batch_scheduler.shutdown()
+
 app.include_router(planner.router)
+app.include_router(scheduler.router)
+if tracing.DEBUG_ENDPOINT:
+    app.include_router(debug.router)
+
+
+def session_namespace(x_session_id: Optional[str] = Header(None)) -> str:
+    """Cache namespace of the calling client (sent as the X-Session-Id header)"""
+    return cache.session_namespace(x_session_id)
+
 
 # Task 3, 4, 5, 6, 7: The Main Pipeline
 @app.post("/api/v1/upload", response_model=List[CalendarEvent])
-async def upload_and_schedule(file: UploadFile = File(...)):
+async def upload_and_schedule(file: UploadFile = File(...), namespace: str = Depends(session_namespace)):
     """
     The main pipeline.
     Receives a PDF (class schedule), runs the ingestor and verifier and returns recurring class events.
@@ -73,12 +98,11 @@ async def upload_and_schedule(file: UploadFile = File(...)):
         # --- Task 3: Ingest PDF ---
         pdf_bytes = await file.read()
         try:
-            doc = fitz.open(stream=pdf_bytes, filetype="pdf")
-            pdf_text = ""
-            for page in doc:
-                pdf_text += page.get_text()
-            doc.close()
-        except Exception as pdf_error:
+            pdf_pages = await pdf_extractor.extract_pages(pdf_bytes)
+            pdf_text = "".join(pdf_pages)
+        except pdf_extractor.PDFLimitError as limit_error:
+            raise HTTPException(status_code=413, detail=str(limit_error))
+        except pdf_extractor.PDFExtractionError as pdf_error:
             raise HTTPException(
                 status_code=400,
                 detail=f"Failed to process PDF: {str(pdf_error)}"
@@ -88,10 +112,10 @@ async def upload_and_schedule(file: UploadFile = File(...)):
             raise HTTPException(status_code=400, detail="Could not extract text from PDF.")
 
         # Cache raw class text
-        cache.set('user_1', pdf_text)
+        cache.set('pdf_text', pdf_text, namespace=namespace)
 
         # --- Agent 1: Parse classes ---
-        classes_json = await agent1_ingestor.generate_tasks(pdf_text)
+        classes_json = await agent1_ingestor.generate_tasks(pdf_text, pages=pdf_pages)
 
         # --- Agent 2: Verify/convert into CalendarEvent objects ---
         class_events = agent2_verifier.verify_tasks(classes_json)
@@ -100,87 +124,131 @@ async def upload_and_schedule(file: UploadFile = File(...)):
             return base_layer.get_base_events()
 
         # Cache class events for later assignment scheduling
-        cache.set('user_1_classes', class_events)
+        cache.set('classes', class_events, namespace=namespace)
 
         return class_events
 
+    except HTTPException:
+        raise
     except Exception as e:
         print(f"Error in /upload pipeline: {e}")
         raise HTTPException(status_code=500, detail=f"An error occurred during scheduling: {str(e)}")
 
 
-@app.post("/api/v1/upload_assignments", response_model=List[CalendarEvent])
-async def upload_assignments(files: List[UploadFile] = File(...)):
+async def _plan_uploaded_assignments(
+    files: List[UploadFile],
+    per_document: bool,
+    namespace: str,
+    schedule_options: dict,
+):
     """
-    Upload one or more assignment/project documents (PDF or DOCX). The endpoint
-    will extract text, ask the ingestor to parse assignment phases, verify them
-    and schedule them into the next week's free slots (respecting classes).
+    Shared pipeline for the assignment endpoints: extract text, ask the ingestor
+    to parse assignment phases, verify them and plan them around the classes.
+    Returns (class_events, scheduled_events, unplaced_chunks).
     """
+    if schedule_options['day_end'] <= schedule_options['day_start']:
+        raise HTTPException(status_code=400, detail="day_end must be after day_start.")
+
     try:
-        combined_text = ""
-        for f in files:
-            filename = f.filename or ''
-            content_type = f.content_type or ''
-            data = await f.read()
-
-            if 'pdf' in content_type or filename.lower().endswith('.pdf'):
-                try:
-                    doc = fitz.open(stream=data, filetype='pdf')
-                    txt = ''
-                    for page in doc:
-                        txt += page.get_text()
-                    doc.close()
-                    combined_text += '\n' + txt
-                except Exception as e:
-                    print(f"Failed to read uploaded PDF {filename}: {e}")
-                    continue
-            elif 'word' in content_type or filename.lower().endswith('.docx'):
-                try:
-                    import docx
-                    from io import BytesIO
-                    doc = docx.Document(BytesIO(data))
-                    txt = '\n'.join(p.text for p in doc.paragraphs)
-                    combined_text += '\n' + txt
-                except Exception as e:
-                    print(f"Failed to read uploaded DOCX {filename}: {e}")
-                    continue
-            else:
-                try:
-                    combined_text += '\n' + data.decode('utf-8')
-                except Exception:
-                    print(f"Skipping unsupported file type: {filename}")
-                    continue
+        # Read and extract every file concurrently (PDF / DOCX / plain text)
+        documents = [
+            d for d in await document_extractor.extract_uploads(files)
+            if not d.error and d.text.strip()
+        ]
+        combined_text = '\n'.join(d.text for d in documents)
 
         if not combined_text.strip():
             raise HTTPException(status_code=400, detail="No text extracted from uploaded files.")
 
         # cache raw assignment text
-        cache.set('user_1_assignments_text', combined_text)
-
-        # Ask agent1 to parse assignments
-        assignments_json = await agent1_ingestor.generate_assignment_tasks(combined_text)
+        cache.set('assignments_text', combined_text, namespace=namespace)
+
+        # Ask agent1 to parse assignments, either per document in parallel or in one prompt
+        if per_document and len(documents) > 1:
+            parsed = await asyncio.gather(*[
+                agent1_ingestor.generate_assignment_tasks(d.text) for d in documents
+            ])
+            assignments_json = agent1_ingestor.merge_assignment_json(parsed)
+        else:
+            assignments_json = await agent1_ingestor.generate_assignment_tasks(combined_text)
 
         # Verify / clean the parsed assignments
         assignments = agent2_verifier.verify_assignments(assignments_json)
 
         # Get class events from cache (if user uploaded classes earlier)
-        class_events = cache.get('user_1_classes') or base_layer.get_base_events()
+        class_events = cache.get('classes', namespace=namespace) or base_layer.get_base_events()
 
         # Schedule assignment phases
-        scheduled = agent3_scheduler.schedule_assignments(assignments, class_events)
-
-        # Return combined view: class events (recurring) + scheduled concrete assignment events
-        combined = list(class_events) + list(scheduled)
-        return combined
+        scheduled, unplaced = agent3_scheduler.plan_assignments(assignments, class_events, **schedule_options)
+        return class_events, scheduled, unplaced
 
+    except HTTPException:
+        raise
     except Exception as e:
         print(f"Error in /upload_assignments pipeline: {e}")
         raise HTTPException(status_code=500, detail=f"An error occurred during assignment scheduling: {str(e)}")
-    # end of upload_assignments endpoint
+
+
+def schedule_options(
+    start_date: Optional[date] = Query(None, description="First day to schedule into (default today)"),
+    horizon_days: int = Query(agent3_scheduler.DEFAULT_HORIZON_DAYS, ge=1, le=agent3_scheduler.MAX_HORIZON_DAYS),
+    day_start: time = Query(agent3_scheduler.DAY_START, description="Start of each day's working window"),
+    day_end: time = Query(agent3_scheduler.DAY_END, description="End of each day's working window"),
+    strategy: Literal["greedy", "edf"] = Query("greedy", description="greedy: in order given; edf: most urgent first"),
+) -> dict:
+    """Scheduler options shared by the assignment endpoints"""
+    return {
+        "start_date": start_date,
+        "horizon_days": horizon_days,
+        "day_start": day_start,
+        "day_end": day_end,
+        "strategy": strategy,
+    }
+
+
+@app.post("/api/v1/upload_assignments", response_model=List[CalendarEvent])
+async def upload_assignments(
+    files: List[UploadFile] = File(...),
+    per_document: bool = Query(False, description="Parse each document with its own LLM call, in parallel"),
+    options: dict = Depends(schedule_options),
+    namespace: str = Depends(session_namespace),
+):
+    """
+    Upload one or more assignment/project documents (PDF or DOCX). The endpoint
+    will extract text, ask the ingestor to parse assignment phases, verify them
+    and schedule them into free slots over the next `horizon_days` days (up to a
+    full term), within each day's working window and around classes.
+    Files are read and extracted concurrently.
+    """
+    class_events, scheduled, unplaced = await _plan_uploaded_assignments(files, per_document, namespace, options)
+    for chunk in unplaced:
+        print(f"Could not place chunk ({chunk.minutes}m) for {chunk.assignment} - {chunk.phase}: {chunk.reason}")
+
+    # Return combined view: class events (recurring) + scheduled concrete assignment events
+    return list(class_events) + list(scheduled)
+
+
+@app.post("/api/v1/upload_assignments/plan", response_model=AssignmentPlanResponse)
+async def plan_uploaded_assignments(
+    files: List[UploadFile] = File(...),
+    per_document: bool = Query(False, description="Parse each document with its own LLM call, in parallel"),
+    options: dict = Depends(schedule_options),
+    namespace: str = Depends(session_namespace),
+):
+    """
+    Same pipeline as /upload_assignments, but also reports the chunks that could
+    not be placed before their deadline or within the horizon.
+    """
+    class_events, scheduled, unplaced = await _plan_uploaded_assignments(files, per_document, namespace, options)
+    return AssignmentPlanResponse(
+        events=list(class_events) + list(scheduled),
+        unplaced=unplaced,
+        strategy=options["strategy"],
+    )
 
 # Task 7: AI Tutor
 @app.post("/api/v1/help")
-async def get_help(data: dict = Body(...)):
+async def get_help(data: dict = Body(...), namespace: str = Depends(session_namespace)):
     """
     Provides AI-powered help for a specific task.
     """
@@ -188,7 +256,7 @@ async def get_help(data: dict = Body(...)):
     if not task_title:
         raise HTTPException(status_code=400, detail="No task title provided.")
 
-    pdf_text = cache.get('user_1') # Get cached PDF text
+    pdf_text = cache.get('pdf_text', namespace=namespace) # Get cached PDF text
     if not pdf_text:
         raise HTTPException(status_code=404, detail="No document found. Please upload an assignment first.")
         
@@ -208,14 +276,22 @@ async def get_food(data: dict = Body(...)):
     suggestion = await agent1_ingestor.get_food_suggestion(meal_type)
     return {"suggestion": suggestion}
 
+@app.get("/metrics", include_in_schema=False)
+async def get_metrics():
+    """Prometheus text exposition of the in-process metrics"""
+    if not metrics_module.ENABLED:
+        raise HTTPException(status_code=404, detail="Metrics are disabled.")
+    return Response(metrics_module.metrics.render(), media_type=metrics_module.CONTENT_TYPE)
+
+
 # Get Google Calendar Embed URL
 @app.get("/api/v1/calendar/embed-url")
 async def get_calendar_embed_url():
     """
     Returns the Google Calendar embed URL for iframe integration
     """
-    embed_url = google_calendar_service.get_embed_url()
-    calendar_id = google_calendar_service.calendar_id
+    embed_url = async_google_calendar_service.get_embed_url()
+    calendar_id = async_google_calendar_service.calendar_id
     
     if not embed_url or not calendar_id:
         raise HTTPException(
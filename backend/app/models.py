@@ -39,4 +39,21 @@ class CalendarEvent(BaseModel):
     # --- Styling ---
     display: Optional[str] = None # e.g., 'background'
     color: str = "#3b82f6"
-    extendedProps: Dict[str, Any] = {}
\ No newline at end of file
+    extendedProps: Dict[str, Any] = {}
+
+
+# --- Scheduler Models ---
+
+# A piece of assignment work the scheduler could not fit into free time.
+class UnplacedChunk(BaseModel):
+    assignment: str
+    phase: str
+    minutes: int
+    reason: str
+
+
+# Response of the assignment planning endpoint: placed events plus what did not fit.
+class AssignmentPlanResponse(BaseModel):
+    events: List[CalendarEvent]
+    unplaced: List[UnplacedChunk] = []
+    strategy: str
@@ -0,0 +1,34 @@
+from typing import List
+
+from fastapi import APIRouter, HTTPException, Query
+
+from ..services import tracing
+from ..services.tracing import TraceDetail, TraceSummary, trace_buffer
+
+# Only mounted when AURA_TRACE_DEBUG_ENDPOINT is set (see main.py)
+router = APIRouter(prefix="/api/v1/debug", tags=["debug"])
+
+
+def _require_tracing():
+    if not tracing.ENABLED:
+        raise HTTPException(status_code=404, detail="Tracing is disabled.")
+
+
+@router.get("/traces", response_model=List[TraceSummary])
+async def list_traces(
+    limit: int = Query(50, ge=1, le=1000),
+    min_duration_ms: float = Query(0.0, ge=0, description="Only traces at least this slow"),
+):
+    """Most recent request traces, newest first"""
+    _require_tracing()
+    return [trace.summary() for trace in trace_buffer.recent(limit, min_duration_ms)]
+
+
+@router.get("/traces/{trace_id}", response_model=TraceDetail)
+async def get_trace(trace_id: str):
+    """Every span of one request, with start offsets relative to the request"""
+    _require_tracing()
+    trace = trace_buffer.get(trace_id)
+    if trace is None:
+        raise HTTPException(status_code=404, detail="Trace not found (it may have left the buffer).")
+    return trace.detail()
@@ -1,15 +1,26 @@
-from typing import List, Optional
-from datetime import datetime
-import pytz
-
-import fitz  # PyMuPDF
-from fastapi import APIRouter, Body, Depends, File, HTTPException, UploadFile
-from pydantic import BaseModel
+import asyncio
+import json
+from datetime import date, datetime, timezone
+from email.utils import format_datetime, parsedate_to_datetime
+from typing import List, Literal, Optional
 
-from ..services import planner_service
+import pytz
+from fastapi import APIRouter, Body, Depends, File, HTTPException, Query, Request, Response, UploadFile
+from fastapi.responses import StreamingResponse
+from pydantic import BaseModel, Field, ValidationError, field_validator
+
+from ..models import CalendarEvent
+from ..services import ics_export, pdf_extractor, planner_service, schedule_solver
+from ..services.json_stream import JSONArrayStreamParser, SalvageReport, validate_items
+from ..services.metrics import metrics, stage
+from ..services.schedule_solver import UnplacedSession
+from ..services.schedule_store import ScheduleContent, StoredSchedule, schedule_store
+from ..services.sync_index import IndexEntry, content_hash, plan_sync, sync_index
 
 router = APIRouter(prefix="/api/v1/planner", tags=["planner"])
 
+FEED_RESPONSES = metrics.counter("aura_ics_feed_responses_total", "ICS feed responses by status", ["status"])
+
 
 class FixedEvent(BaseModel):
     date: str
@@ -50,30 +61,71 @@ class GenerateScheduleRequest(BaseModel):
     goals: str
     feedback_constraints: Optional[str] = None
     previous_schedule: Optional[List[ScheduleItem]] = None
+    # "solver": the LLM only extracts task demands and the local solver places them
+    engine: Literal["llm", "solver"] = "llm"
+    start_date: Optional[date] = None
+    days: int = Field(7, ge=1, le=31)
+    daily_cap_minutes: int = Field(schedule_solver.DEFAULT_DAILY_CAP_MINUTES, gt=0)
 
 
 class GenerateScheduleResponse(BaseModel):
     schedule: List[ScheduleItem]
     reasoning: Optional[str] = None
+    unplaced: List[UnplacedSession] = []
+    # Present when the model's output was malformed and only partly recovered
+    salvage: Optional[SalvageReport] = None
 
 
 class CreateIcsRequest(BaseModel):
     schedule: List[ScheduleItem]
     fixed_schedule: List[FixedEvent]
+    # Weekly classes (daysOfWeek + startTime/endTime), exported as RRULEs over the term
+    recurring_events: List[CalendarEvent] = []
+    term_start: Optional[date] = None
+    term_end: Optional[date] = None
 
 
 class CreateIcsResponse(BaseModel):
     ics: str
 
 
+class StoreScheduleRequest(CreateIcsRequest):
+    timezone: str = "America/New_York"
+
+    @field_validator("timezone")
+    @classmethod
+    def _known_timezone(cls, value: str) -> str:
+        try:
+            pytz.timezone(value)
+        except pytz.UnknownTimeZoneError:
+            raise ValueError(f"Unknown timezone: {value}")
+        return value
+
+
+class StoredScheduleResponse(BaseModel):
+    id: str
+    feed_url: str
+    etag: str
+    updated_at: datetime
+
+
 class SyncToGoogleCalendarRequest(BaseModel):
     schedule: List[ScheduleItem]
     fixed_schedule: List[FixedEvent]
+    # Weekly classes, created as one recurring Google event each that ends with the term
+    recurring_events: List[CalendarEvent] = []
+    term_start: Optional[date] = None
+    term_end: Optional[date] = None
 
 
 class SyncToGoogleCalendarResponse(BaseModel):
     message: str
     eventsCreated: int
+    eventsUpdated: int = 0
+    eventsDeleted: int = 0
+    eventsUnchanged: int = 0
+    eventsFailed: int = 0
+    errors: List[str] = []
 
 
 @router.post("/parse-syllabus", response_model=List[FixedEvent])
@@ -82,15 +134,20 @@ async def parse_syllabus(file: UploadFile = File(...)) -> List[FixedEvent]:
         raise HTTPException(status_code=400, detail="Please upload a PDF file.")
     try:
         payload = await file.read()
-        document = fitz.open(stream=payload, filetype="pdf")
-        text = ""
-        for page in document:
-            text += page.get_text()
-        document.close()
+        try:
+            pages = await pdf_extractor.extract_pages(payload)
+        except pdf_extractor.PDFLimitError as exc:
+            raise HTTPException(status_code=413, detail=str(exc))
+        except pdf_extractor.PDFExtractionError as exc:
+            raise HTTPException(status_code=400, detail=f"Failed to process PDF: {exc}")
+        text = "".join(pages)
         if not text.strip():
             raise HTTPException(status_code=400, detail="Could not extract text from PDF.")
-        events = await planner_service.parse_syllabus(text)
-        return [FixedEvent.model_validate(event) for event in events]
+        events = await planner_service.parse_syllabus(text, pages=pages)
+        valid, invalid = validate_items(events, FixedEvent)
+        if invalid:
+            print(f"Planner parse_syllabus: skipped {invalid} invalid events")
+        return valid
     except HTTPException:
         raise
     except Exception as exc:
@@ -116,14 +173,87 @@ async def analyze_feedback(request: AnalyzeFeedbackRequest) -> AnalyzeFeedbackRe
 
 @router.post("/generate", response_model=GenerateScheduleResponse)
 async def generate_schedule(request: GenerateScheduleRequest) -> GenerateScheduleResponse:
-    result = await planner_service.generate_schedule(
-        request.goals,
-        [event.model_dump() for event in request.fixed_schedule],
-        feedback_constraints=request.feedback_constraints,
-        previous_schedule=[item.model_dump() for item in request.previous_schedule] if request.previous_schedule else None,
+    if request.engine == "solver":
+        result = await planner_service.solve_schedule(
+            request.goals,
+            [event.model_dump() for event in request.fixed_schedule],
+            feedback_constraints=request.feedback_constraints,
+            start_date=request.start_date,
+            days=request.days,
+            daily_cap_minutes=request.daily_cap_minutes,
+        )
+    else:
+        result = await planner_service.generate_schedule(
+            request.goals,
+            [event.model_dump() for event in request.fixed_schedule],
+            feedback_constraints=request.feedback_constraints,
+            previous_schedule=[item.model_dump() for item in request.previous_schedule] if request.previous_schedule else None,
+        )
+    salvage = result.get("salvage")
+    schedule, invalid = validate_items(result.get("schedule", []), ScheduleItem, salvage)
+    if invalid and salvage is None:
+        salvage = SalvageReport(recovered=len(schedule), invalid=invalid)
+    return GenerateScheduleResponse(
+        schedule=schedule,
+        reasoning=result.get("reasoning"),
+        unplaced=result.get("unplaced", []),
+        salvage=salvage,
     )
-    schedule = [ScheduleItem.model_validate(entry) for entry in result.get("schedule", [])]
-    return GenerateScheduleResponse(schedule=schedule, reasoning=result.get("reasoning"))
+
+
+def _stream_frame(event: str, data: dict, fmt: str) -> str:
+    payload = json.dumps({"type": event, "data": data} if fmt == "ndjson" else data, ensure_ascii=False)
+    if fmt == "sse":
+        return f"event: {event}\ndata: {payload}\n\n"
+    return payload + "\n"
+
+
+@router.post("/generate/stream")
+async def generate_schedule_stream(
+    request: GenerateScheduleRequest,
+    format: Literal["ndjson", "sse"] = Query("ndjson"),
+) -> StreamingResponse:
+    """
+    Streaming variant of /generate. Schedule items are parsed out of the model's
+    partial output, validated as ScheduleItem and emitted one per frame (NDJSON
+    lines or Server-Sent Events) as soon as each is complete. A final "done"
+    frame carries the item count and, in refinement mode, the reasoning.
+    """
+    async def frames():
+        parser = JSONArrayStreamParser()
+        response_parts: List[str] = []
+        emitted = 0
+        skipped = 0
+        try:
+            async for text in planner_service.stream_schedule(
+                request.goals,
+                [event.model_dump() for event in request.fixed_schedule],
+                feedback_constraints=request.feedback_constraints,
+                previous_schedule=[item.model_dump() for item in request.previous_schedule] if request.previous_schedule else None,
+            ):
+                response_parts.append(text)
+                for entry in parser.feed(text):
+                    try:
+                        item = ScheduleItem.model_validate(entry)
+                    except ValidationError:
+                        skipped += 1
+                        continue
+                    emitted += 1
+                    yield _stream_frame("item", item.model_dump(), format)
+        except Exception as exc:
+            print(f"Planner generate_schedule stream error: {exc}")
+            yield _stream_frame("error", {"detail": "Failed to generate schedule."}, format)
+            return
+
+        reasoning = planner_service.extract_reasoning("".join(response_parts))
+        yield _stream_frame(
+            "done",
+            {"count": emitted, "skipped": skipped + parser.errors, "reasoning": reasoning},
+            format,
+        )
+
+    media_type = "text/event-stream" if format == "sse" else "application/x-ndjson"
+    return StreamingResponse(frames(), media_type=media_type, headers={"Cache-Control": "no-cache"})
 
 
 @router.post("/ics", response_model=CreateIcsResponse)
@@ -131,153 +261,191 @@ async def create_ics(request: CreateIcsRequest) -> CreateIcsResponse:
     ics_content = planner_service.create_ics(
         [item.model_dump() for item in request.schedule],
         [event.model_dump() for event in request.fixed_schedule],
+        recurring_events=request.recurring_events,
+        term_start=request.term_start,
+        term_end=request.term_end,
     )
     return CreateIcsResponse(ics=ics_content)
 
 
+def _schedule_content(request: StoreScheduleRequest) -> ScheduleContent:
+    return ScheduleContent(
+        schedule=[item.model_dump() for item in request.schedule],
+        fixed_schedule=[event.model_dump() for event in request.fixed_schedule],
+        recurring_events=request.recurring_events,
+        term_start=request.term_start,
+        term_end=request.term_end,
+        timezone=request.timezone,
+    )
+
+
+def _stored_response(stored: StoredSchedule, http_request: Request) -> StoredScheduleResponse:
+    return StoredScheduleResponse(
+        id=stored.id,
+        feed_url=str(http_request.url_for("schedule_feed", schedule_id=stored.id)),
+        etag=stored.etag,
+        updated_at=stored.updated_at,
+    )
+
+
+@router.post("/schedules", response_model=StoredScheduleResponse, status_code=201)
+async def store_schedule(request: StoreScheduleRequest, http_request: Request) -> StoredScheduleResponse:
+    """Store a schedule server-side; its feed_url can be subscribed to from any calendar client"""
+    stored = await asyncio.to_thread(schedule_store.save, _schedule_content(request))
+    return _stored_response(stored, http_request)
+
+
+@router.put("/schedules/{schedule_id}", response_model=StoredScheduleResponse)
+async def replace_schedule(schedule_id: str, request: StoreScheduleRequest,
+                           http_request: Request) -> StoredScheduleResponse:
+    """Replace a stored schedule; subscribers pick up the change on their next poll"""
+    stored = await asyncio.to_thread(schedule_store.save, _schedule_content(request), schedule_id)
+    if stored is None:
+        raise HTTPException(status_code=404, detail="Schedule not found.")
+    return _stored_response(stored, http_request)
+
+
+@router.delete("/schedules/{schedule_id}", status_code=204)
+async def delete_schedule(schedule_id: str) -> Response:
+    if not await asyncio.to_thread(schedule_store.delete, schedule_id):
+        raise HTTPException(status_code=404, detail="Schedule not found.")
+    return Response(status_code=204)
+
+
+def _not_modified(http_request: Request, stored: StoredSchedule) -> bool:
+    """Conditional GET: If-None-Match wins over If-Modified-Since (RFC 9110 13.2.2)"""
+    if_none_match = http_request.headers.get("if-none-match")
+    if if_none_match is not None:
+        tags = [tag.strip().removeprefix("W/") for tag in if_none_match.split(",")]
+        return "*" in tags or stored.etag in tags
+    if_modified_since = http_request.headers.get("if-modified-since")
+    if if_modified_since:
+        try:
+            since = parsedate_to_datetime(if_modified_since)
+        except (TypeError, ValueError):
+            return False
+        if since.tzinfo is None:
+            since = since.replace(tzinfo=timezone.utc)
+        return stored.updated_at <= since
+    return False
+
+
+@router.get("/schedules/{schedule_id}.ics", name="schedule_feed")
+async def schedule_feed(schedule_id: str, http_request: Request) -> Response:
+    """
+    ICS feed of a stored schedule, streamed with folded lines. Polls with a
+    matching If-None-Match or If-Modified-Since get an empty 304.
+    """
+    stored = await asyncio.to_thread(schedule_store.get, schedule_id)
+    if stored is None:
+        raise HTTPException(status_code=404, detail="Schedule not found.")
+    headers = {
+        "ETag": stored.etag,
+        "Last-Modified": format_datetime(stored.updated_at, usegmt=True),
+        # Clients may keep the feed but must revalidate before using it
+        "Cache-Control": "no-cache",
+    }
+    if _not_modified(http_request, stored):
+        FEED_RESPONSES.labels("304").inc()
+        return Response(status_code=304, headers=headers)
+    FEED_RESPONSES.labels("200").inc()
+
+    lines = ics_export.iter_ics_lines(
+        stored.schedule,
+        stored.fixed_schedule,
+        stored.timezone,
+        stored.recurring_events,
+        stored.term_start,
+        stored.term_end,
+        stamp=stored.updated_at.replace(tzinfo=None),
+    )
+    headers["Content-Disposition"] = f'inline; filename="aura-{stored.id}.ics"'
+    return StreamingResponse(ics_export.iter_ics_chunks(lines), media_type="text/calendar; charset=utf-8",
+                             headers=headers)
+
+
 @router.post("/sync-to-google-calendar", response_model=SyncToGoogleCalendarResponse)
 async def sync_to_google_calendar(request: SyncToGoogleCalendarRequest) -> SyncToGoogleCalendarResponse:
     """
-    Sync events to Google Calendar by parsing schedule and fixed schedule,
-    then creating events via Google Calendar API
+    Sync events to Google Calendar by parsing schedule and fixed schedule.
+    Events are diffed against the local sync index so only new, changed and
+    removed events result in (batched) Google Calendar API calls.
     """
-    from ..services.google_calendar_service import google_calendar_service
+    from ..services.google_calendar_service import async_google_calendar_service
     
-    if not google_calendar_service.calendar_id:
+    if not async_google_calendar_service.calendar_id:
         raise HTTPException(
             status_code=503,
             detail="Google Calendar not initialized. Please configure credentials."
         )
     
-    print(f"Syncing to calendar ID: {google_calendar_service.calendar_id}")
-    print(f"Schedule items: {len(request.schedule)}, Fixed items: {len(request.fixed_schedule)}")
+    print(f"Syncing to calendar ID: {async_google_calendar_service.calendar_id}")
+    print(f"Schedule items: {len(request.schedule)}, Fixed items: {len(request.fixed_schedule)}, "
+          f"Recurring classes: {len(request.recurring_events)}")
     
     try:
-        events_created = 0
-        errors = []
-        timezone = pytz.timezone('America/New_York')
+        desired, errors, failed_keys = planner_service.build_sync_payloads(
+            [item.model_dump() for item in request.schedule],
+            [event.model_dump() for event in request.fixed_schedule],
+            recurring_events=request.recurring_events,
+            term_start=request.term_start,
+            term_end=request.term_end,
+        )
+        calendar_id = async_google_calendar_service.calendar_id
+        
+        # Only send what changed since the last sync to this calendar; items that
+        # failed to build this time keep their existing events
+        existing = await asyncio.to_thread(sync_index.entries, calendar_id)
+        plan = plan_sync(desired, existing, keep=failed_keys)
+        print(f"Sync plan: {len(plan.inserts)} inserts, {len(plan.patches)} patches, "
+              f"{len(plan.deletes)} deletes, {plan.unchanged} unchanged")
         
-        # Process scheduled events
-        for item in request.schedule:
-            if not item.Date or not item.Task:
-                print(f"Skipping invalid schedule item: {item}")
-                continue
-                
-            try:
-                # Parse date and time
-                event_date = item.Date  # Format: YYYY-MM-DD
-                start_time = item.Start_Time or "09:00:00"  # Default to 9 AM
-                end_time = item.End_Time or "10:00:00"      # Default to 10 AM
-                
-                # Validate time format
-                if len(start_time.split(':')) != 3:
-                    start_time = f"{start_time}:00" if ':' in start_time else f"{start_time}:00:00"
-                if len(end_time.split(':')) != 3:
-                    end_time = f"{end_time}:00" if ':' in end_time else f"{end_time}:00:00"
-                
-                # Parse datetime strings and add timezone
-                start_datetime_str = f"{event_date} {start_time}"
-                end_datetime_str = f"{event_date} {end_time}"
-                
-                print(f"Processing: {item.Task} on {start_datetime_str}")
-                
-                # Create timezone-aware datetime objects
-                start_dt = timezone.localize(datetime.strptime(start_datetime_str, "%Y-%m-%d %H:%M:%S"))
-                end_dt = timezone.localize(datetime.strptime(end_datetime_str, "%Y-%m-%d %H:%M:%S"))
-                
-                # Convert to RFC3339 format
-                start_rfc3339 = start_dt.isoformat()
-                end_rfc3339 = end_dt.isoformat()
-                
-                # Build Google Calendar event
-                google_event = {
-                    'summary': item.Task,
-                    'description': f"Category: {item.Category or 'General'}\nDay: {item.Day or ''}",
-                    'start': {
-                        'dateTime': start_rfc3339,
-                        'timeZone': 'America/New_York'
-                    },
-                    'end': {
-                        'dateTime': end_rfc3339,
-                        'timeZone': 'America/New_York'
-                    }
-                }
-                
-                result = google_calendar_service.add_event(google_event)
-                if result:
-                    events_created += 1
-                    print(f"  ✓ Created: {item.Task}")
-                else:
-                    errors.append(f"Failed to create: {item.Task}")
-            except Exception as e:
-                error_msg = f"Error processing '{item.Task}': {str(e)}"
-                print(error_msg)
-                errors.append(error_msg)
-                continue
+        with stage("google_sync"):
+            inserted, patched, deleted = await asyncio.gather(
+                async_google_calendar_service.add_events_batch([op.payload for op in plan.inserts]),
+                async_google_calendar_service.patch_events_batch([(op.event_id, op.payload) for op in plan.patches]),
+                async_google_calendar_service.delete_events_batch([op.event_id for op in plan.deletes]),
+            )
         
-        # Process fixed schedule events
-        for event in request.fixed_schedule:
-            if not event.date or not event.summary:
-                print(f"Skipping invalid fixed event: {event}")
-                continue
-                
-            try:
-                event_date = event.date
-                start_time = event.start_time or "09:00:00"
-                end_time = event.end_time or "10:00:00"
-                
-                # Validate time format
-                if len(start_time.split(':')) != 3:
-                    start_time = f"{start_time}:00" if ':' in start_time else f"{start_time}:00:00"
-                if len(end_time.split(':')) != 3:
-                    end_time = f"{end_time}:00" if ':' in end_time else f"{end_time}:00:00"
-                
-                start_datetime_str = f"{event_date} {start_time}"
-                end_datetime_str = f"{event_date} {end_time}"
-                
-                print(f"Processing: {event.summary} on {start_datetime_str}")
-                
-                start_dt = timezone.localize(datetime.strptime(start_datetime_str, "%Y-%m-%d %H:%M:%S"))
-                end_dt = timezone.localize(datetime.strptime(end_datetime_str, "%Y-%m-%d %H:%M:%S"))
-                
-                start_rfc3339 = start_dt.isoformat()
-                end_rfc3339 = end_dt.isoformat()
-                
-                google_event = {
-                    'summary': event.summary,
-                    'description': f"Type: {event.type or 'Fixed Event'}\nDay: {event.day or ''}",
-                    'start': {
-                        'dateTime': start_rfc3339,
-                        'timeZone': 'America/New_York'
-                    },
-                    'end': {
-                        'dateTime': end_rfc3339,
-                        'timeZone': 'America/New_York'
-                    }
-                }
-                
-                result = google_calendar_service.add_event(google_event)
-                if result:
-                    events_created += 1
-                    print(f"  ✓ Created: {event.summary}")
-                else:
-                    errors.append(f"Failed to create: {event.summary}")
-            except Exception as e:
-                error_msg = f"Error processing '{event.summary}': {str(e)}"
-                print(error_msg)
-                errors.append(error_msg)
-                continue
+        upserts = {}
+        removals = []
+        for op, entry in zip(plan.inserts, inserted.results):
+            if entry.success and entry.event_id:
+                upserts[op.key] = IndexEntry(event_id=entry.event_id, content_hash=content_hash(op.payload))
+            else:
+                errors.append(f"Failed to create '{entry.summary}': {entry.error}")
+        for op, entry in zip(plan.patches, patched.results):
+            if entry.success:
+                upserts[op.key] = IndexEntry(event_id=op.event_id, content_hash=content_hash(op.payload))
+            else:
+                if entry.status in (404, 410):
+                    # Deleted on Google's side: forget it so the next sync re-creates it
+                    removals.append(op.key)
+                errors.append(f"Failed to update '{entry.summary}': {entry.error}")
+        for op, entry in zip(plan.deletes, deleted.results):
+            if entry.success:
+                removals.append(op.key)
+            else:
+                errors.append(f"Failed to delete event {op.event_id}: {entry.error}")
+        await asyncio.to_thread(sync_index.update, calendar_id, upserts, removals)
         
-        print(f"\nTotal events created: {events_created}")
+        events_created = inserted.succeeded
+        print(f"\nTotal events created: {events_created}, updated: {patched.succeeded}, "
+              f"deleted: {deleted.succeeded}, unchanged: {plan.unchanged}")
         if errors:
             print(f"Errors encountered: {len(errors)}")
             for err in errors[:5]:  # Show first 5 errors
                 print(f"  - {err}")
         
         return SyncToGoogleCalendarResponse(
-            message=f"Successfully synced {events_created} events to Google Calendar" + 
+            message=f"Successfully synced {events_created + patched.succeeded + plan.unchanged} events to Google Calendar" + 
                     (f" ({len(errors)} errors)" if errors else ""),
-            eventsCreated=events_created
+            eventsCreated=events_created,
+            eventsUpdated=patched.succeeded,
+            eventsDeleted=deleted.succeeded,
+            eventsUnchanged=plan.unchanged,
+            eventsFailed=len(errors),
+            errors=errors
         )
         
     except Exception as exc:
@@ -0,0 +1,44 @@
+import json
+from typing import List
+
+from fastapi import APIRouter
+from fastapi.responses import StreamingResponse
+from pydantic import BaseModel, Field
+
+from ..services import batch_scheduler
+from ..services.batch_scheduler import BatchScheduleOptions, BatchStats, UserSchedule
+
+router = APIRouter(prefix="/api/v1/scheduler", tags=["scheduler"])
+
+MAX_BATCH_USERS = 5000
+
+
+class BatchScheduleRequest(BaseModel):
+    users: List[UserSchedule] = Field(..., min_length=1, max_length=MAX_BATCH_USERS)
+    options: BatchScheduleOptions = BatchScheduleOptions()
+
+
+def _frame(event: str, data: dict) -> str:
+    return json.dumps({"type": event, "data": data}, ensure_ascii=False, default=str) + "\n"
+
+
+@router.post("/batch")
+async def schedule_batch(request: BatchScheduleRequest) -> StreamingResponse:
+    """
+    Schedule many users' assignments around their classes in one call. Work runs
+    across a process pool; each user's result is streamed as an NDJSON "user"
+    frame as soon as it is ready, and a final "done" frame carries throughput
+    statistics (users/sec).
+    """
+    async def frames():
+        stats = BatchStats()
+        try:
+            async for result in batch_scheduler.iter_schedule_batch(request.users, request.options, stats=stats):
+                yield _frame("user", result.model_dump(mode="json"))
+        except Exception as exc:
+            print(f"Batch scheduling error: {exc}")
+            yield _frame("error", {"detail": "Batch scheduling failed."})
+            return
+        yield _frame("done", stats.model_dump())
+
+    return StreamingResponse(frames(), media_type="application/x-ndjson", headers={"Cache-Control": "no-cache"})
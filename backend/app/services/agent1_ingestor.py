@@ -1,6 +1,11 @@
-import google.generativeai as genai
+import json
 import os
-from typing import List
+from typing import List, Optional
+
+from . import text_chunker
+from .json_stream import salvage_json_array
+from .llm_gateway import llm_gateway
+from .metrics import timed
 
 # Maps to Task 4, 7, 8
 # This is Person 3's file
@@ -8,20 +13,31 @@ from dotenv import load_dotenv
 
 load_dotenv()
 
-# Configure the Gemini client
-try:
-    genai.configure(api_key=os.getenv("GEMINI_API_KEY"))
-    model = genai.GenerativeModel('gemini-2.5-pro') # Use a fast model
-except Exception as e:
-    print(f"Error configuring Gemini: {e}")
-    # Handle the case where the API key is not set
-    model = None 
+MODEL_ID = 'gemini-2.5-pro'
+
+# The Gemini client is shared through llm_gateway (concurrency limit, retries, caching)
 
 # --- Task 4: Propose Tasks ---
-async def generate_tasks(pdf_text: str) -> str:
-    if not model:
+@timed("extract_classes")
+async def generate_tasks(pdf_text: str, pages: Optional[List[str]] = None) -> str:
+    """
+    Extract recurring classes as a JSON array string. Long documents are split
+    into chunks (on page boundaries when pages are given) that are parsed
+    concurrently; the per-chunk arrays are merged and de-duplicated.
+    """
+    if not llm_gateway.available(MODEL_ID):
         return "[]" # Return empty list if model isn't configured
 
+    chunks = text_chunker.chunk_pages(pages) if pages else text_chunker.chunk_text(pdf_text)
+    if not chunks:
+        return "[]"
+    if len(chunks) == 1:
+        return await _generate_tasks_chunk(chunks[0])
+    results = await text_chunker.map_chunks(chunks, lambda index, chunk: _generate_tasks_chunk(chunk))
+    return merge_class_json(results)
+
+
+async def _generate_tasks_chunk(pdf_text: str) -> str:
     prompt = f"""
     You are a class schedule parser. Analyze the following text and extract all class schedules.
     For each class found, identify:
@@ -50,9 +66,9 @@ async def generate_tasks(pdf_text: str) -> str:
     """
     
     try:
-        response = await model.generate_content_async(prompt)
+        response_text = await llm_gateway.generate(MODEL_ID, prompt, task="extract_classes")
         # Clean the response just in case
-        cleaned_text = response.text.strip().replace("```json", "").replace("```", "").strip()
+        cleaned_text = response_text.strip().replace("```json", "").replace("```", "").strip()
         if not cleaned_text.startswith("["):
             return "[]"
         return cleaned_text
@@ -61,6 +77,39 @@ async def generate_tasks(pdf_text: str) -> str:
         return "[]"
 
 
+def _key_part(value) -> str:
+    """Hashable, type-insensitive form of an LLM field for de-duplication"""
+    if isinstance(value, (list, dict)):
+        return json.dumps(value, sort_keys=True, default=str)
+    return '' if value is None else str(value).strip().lower()
+
+
+def merge_class_json(results: List[str]) -> str:
+    """Merge per-chunk class arrays; a class seen in several chunks is kept once"""
+    merged = []
+    seen = set()
+    for raw in results:
+        # Per-chunk outputs may be truncated; keep every complete item
+        items = salvage_json_array(raw or "").items
+        for item in items:
+            if not isinstance(item, dict):
+                continue
+            days = item.get('daysOfWeek') or []
+            key = (
+                _key_part(item.get('title')),
+                # Chunks may disagree on types, e.g. [1, "2"]; compare days as strings
+                tuple(sorted({_key_part(d) for d in days})) if isinstance(days, list) else _key_part(days),
+                _key_part(item.get('startTime')),
+                _key_part(item.get('endTime')),
+            )
+            if key in seen:
+                continue
+            seen.add(key)
+            merged.append(item)
+    return json.dumps(merged)
+
+
+@timed("extract_assignments")
 async def generate_assignment_tasks(doc_text: str) -> str:
         """
         Parse an assignment/project document and return a JSON array describing
@@ -79,7 +128,7 @@ async def generate_assignment_tasks(doc_text: str) -> str:
 
         The model should return ONLY the JSON array.
         """
-        if not model:
+        if not llm_gateway.available(MODEL_ID):
                 return "[]"
 
         prompt = f"""
@@ -98,8 +147,8 @@ async def generate_assignment_tasks(doc_text: str) -> str:
         """
 
         try:
-                response = await model.generate_content_async(prompt)
-                cleaned_text = response.text.strip().replace("```json", "").replace("```", "").strip()
+                response_text = await llm_gateway.generate(MODEL_ID, prompt, task="extract_assignments")
+                cleaned_text = response_text.strip().replace("```json", "").replace("```", "").strip()
                 if not cleaned_text.startswith("["):
                         return "[]"
                 return cleaned_text
@@ -107,9 +156,29 @@ async def generate_assignment_tasks(doc_text: str) -> str:
                 print(f"Agent 1 Error (generate_assignment_tasks): {e}")
                 return "[]"
 
+def merge_assignment_json(results: List[str]) -> str:
+    """
+    Merge the JSON arrays returned by per-document generate_assignment_tasks calls.
+    Assignments with the same title and due date are only kept once.
+    """
+    merged = []
+    seen = set()
+    for raw in results:
+        # Per-document outputs may be truncated; keep every complete item
+        items = salvage_json_array(raw or "").items
+        for item in items:
+            if not isinstance(item, dict):
+                continue
+            key = (_key_part(item.get('title')), _key_part(item.get('due_date')))
+            if key in seen:
+                continue
+            seen.add(key)
+            merged.append(item)
+    return json.dumps(merged)
+
 # --- Task 7: AI Tutor ---
 async def get_help(task_title: str, pdf_text: str) -> str:
-    if not model:
+    if not llm_gateway.available(MODEL_ID):
         return "AI model not configured."
 
     prompt = f"""
@@ -121,21 +190,20 @@ async def get_help(task_title: str, pdf_text: str) -> str:
     Give them a 3-bullet-point summary of actionable advice to get started on this specific task.
     """
     try:
-        response = await model.generate_content_async(prompt)
-        return response.text
+        return await llm_gateway.generate(MODEL_ID, prompt, task="help")
     except Exception as e:
         print(f"Agent 1 Error (get_help): {e}")
         return "Error getting help from AI."
 
 # --- Task 8: AI Chef ---
 async def get_food_suggestion(meal_type: str) -> str:
-    if not model:
+    if not llm_gateway.available(MODEL_ID):
         return "AI model not configured."
 
     prompt = f"You are an AI chef. A busy student needs 3 simple, 15-minute recipe ideas for {meal_type}."
+    # Not cached: suggestions are meant to vary between requests
     try:
-        response = await model.generate_content_async(prompt)
-        return response.text
+        return await llm_gateway.generate(MODEL_ID, prompt, task="food", use_cache=False)
     except Exception as e:
         print(f"Agent 1 Error (get_food_suggestion): {e}")
         return "Error getting suggestions from AI."
\ No newline at end of file
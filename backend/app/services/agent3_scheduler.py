@@ -1,8 +1,16 @@
-from typing import List, Dict
+from typing import Iterator, List, Dict, Optional, Tuple
 from datetime import datetime, timedelta, time, date
+import heapq
 import uuid
+from array import array
 
-from ..models import VerifiedTask, CalendarEvent
+from ..models import VerifiedTask, CalendarEvent, UnplacedChunk
+from .free_busy_index import FreeSlotIndex, from_minutes, subtract_intervals, to_minutes
+from .metrics import metrics, timed
+
+SCHEDULED_CHUNKS = metrics.counter(
+    "aura_scheduler_chunks_total", "Assignment work chunks handled by the scheduler", ["result"]
+)
 
 # Maps to Task 6
 # This is Person 4's second and most complex file.
@@ -15,133 +23,404 @@ def schedule_tasks(tasks: List[CalendarEvent], base_events: List[CalendarEvent])
     return tasks
 
 
-def schedule_assignments(assignments: List[dict], class_events: List[CalendarEvent]) -> List[CalendarEvent]:
+def merge_busy_blocks(busy_blocks: List[Dict]) -> List[Dict]:
     """
-    Schedule assignment phases into the next week's free slots, taking class_events
-    (recurring) into account. Each assignment in 'assignments' should be a dict:
-      { 'title': str, 'due_date': 'YYYY-MM-DD' or None, 'phases': [ {title, duration_minutes, intensity} ] }
-
-    Returns a list of concrete CalendarEvent objects with start/end datetimes for the scheduled chunks.
+    Sort busy blocks ({"start": datetime, "end": datetime}) and merge overlapping ones.
     """
-    scheduled_events: List[CalendarEvent] = []
-
-    today = date.today()
-    # Scheduling window: start today, cover the next 7 days (immediate visibility in calendar)
-    window_start_date = today
-    window_start = datetime.combine(window_start_date, time(8, 0))
-    window_end = datetime.combine(window_start_date + timedelta(days=6), time(22, 0))
-
-    # Expand class_events (recurring) into busy blocks within the window
-    busy_blocks: List[Dict] = []
-    cur_day = window_start_date
-    while cur_day <= (window_start_date + timedelta(days=6)):
-        for ev in class_events:
-            if ev.daysOfWeek and cur_day.weekday() in ev.daysOfWeek and ev.startTime and ev.endTime:
-                s_dt = datetime.combine(cur_day, ev.startTime)
-                e_dt = datetime.combine(cur_day, ev.endTime)
-                if e_dt < s_dt:
-                    e_dt += timedelta(days=1)
-                busy_blocks.append({"start": s_dt, "end": e_dt})
-        cur_day += timedelta(days=1)
-
-    # Sort and merge busy blocks
-    busy_blocks.sort(key=lambda x: x['start'])
     merged: List[Dict] = []
-    for block in busy_blocks:
-        if not merged:
-            merged.append(block)
+    for block in sorted(busy_blocks, key=lambda x: x['start']):
+        if merged and block['start'] <= merged[-1]['end']:
+            # overlap
+            merged[-1]['end'] = max(merged[-1]['end'], block['end'])
         else:
-            last = merged[-1]
-            if block['start'] <= last['end']:
-                # overlap
-                last['end'] = max(last['end'], block['end'])
-            else:
-                merged.append(block)
-    busy_blocks = merged
+            merged.append({"start": block['start'], "end": block['end']})
+    return merged
+
 
-    # Build free slots between window_start and window_end
+def build_free_slots(busy_blocks: List[Dict], window_start: datetime, window_end: datetime) -> List[Dict]:
+    """
+    Free slots between window_start and window_end, given sorted, merged busy blocks.
+    Busy time outside the window is ignored.
+    """
     free_slots: List[Dict] = []
     cursor = window_start
     for b in busy_blocks:
+        if b['start'] >= window_end:
+            break
         if cursor < b['start']:
             free_slots.append({"start": cursor, "end": b['start']})
         cursor = max(cursor, b['end'])
     if cursor < window_end:
         free_slots.append({"start": cursor, "end": window_end})
+    return free_slots
+
+
+DAY_START = time(8, 0)
+DAY_END = time(22, 0)
+DEFAULT_HORIZON_DAYS = 7
+MAX_HORIZON_DAYS = 140  # 20 weeks, a full term
+MINUTES_PER_DAY = 24 * 60
+
+STRATEGIES = ("greedy", "edf")
+ENGINES = ("interval", "grid")
+# How much heavier a minute of work counts when computing EDF slack
+INTENSITY_WEIGHTS = {'High': 1.5, 'Medium': 1.2, 'Low': 1.0}
+
+# Why a chunk was not placed; CompactSchedule stores the index
+REASON_BEFORE_WINDOW = 0
+REASON_NO_TIME_BEFORE_DEADLINE = 1
+REASON_NO_TIME_IN_HORIZON = 2
+UNPLACED_REASONS = (
+    "due before the scheduling window starts",
+    "no free time before the deadline",
+    "no free time within the scheduling horizon",
+)
+
+# Working hours keyed by day of week, same numbering as CalendarEvent.daysOfWeek (0=Sun)
+WorkingHours = Dict[int, Tuple[time, time]]
+
+
+def _day_of_week(day: date) -> int:
+    """date.weekday() is 0=Mon; CalendarEvent.daysOfWeek uses 0=Sun"""
+    return (day.weekday() + 1) % 7
+
+
+def _minute_of_day(value: time) -> int:
+    return value.hour * 60 + value.minute
+
+
+def chunk_size_for_intensity(intensity: str) -> int:
+    """Chunk duration based on intensity"""
+    if intensity == 'High':
+        return 60
+    if intensity == 'Medium':
+        return 45
+    return 30
+
+
+class IntervalFreeTime:
+    """
+    Free-time engine over sorted intervals: each day's working window minus the
+    recurring class blocks that fall on it. OccupancyGrid (occupancy_grid.py)
+    offers the same free_intervals() API on a NumPy minute grid.
+    """
+
+    def __init__(self, class_events: List[CalendarEvent], start_date: date, working_hours: WorkingHours):
+        self.start_date = start_date
+        self.working_hours = working_hours
+        # Class blocks per day of week, as (start, end) minutes from that day's midnight
+        self._classes_by_day: Dict[int, List[Tuple[int, int]]] = {}
+        for ev in class_events:
+            if not (ev.daysOfWeek and ev.startTime and ev.endTime):
+                continue
+            start = _minute_of_day(ev.startTime)
+            end = _minute_of_day(ev.endTime)
+            if end < start:
+                end += MINUTES_PER_DAY
+            for dow in ev.daysOfWeek:
+                self._classes_by_day.setdefault(dow, []).append((start, end))
+
+    def free_intervals(self, first_day: int, last_day: int) -> List[Tuple[int, int]]:
+        """Free [start, end) minutes (from start_date's midnight) for days first_day..last_day-1"""
+        windows: List[Tuple[int, int]] = []
+        busy: List[Tuple[int, int]] = []
+        # Start one day early so classes running past midnight block the first morning
+        for offset in range(max(first_day - 1, 0), last_day):
+            day = self.start_date + timedelta(days=offset)
+            base = offset * MINUTES_PER_DAY
+            dow = _day_of_week(day)
+            for start, end in self._classes_by_day.get(dow, []):
+                busy.append((base + start, base + end))
+            if offset < first_day or dow not in self.working_hours:
+                continue
+            day_start, day_end = self.working_hours[dow]
+            windows.append((base + _minute_of_day(day_start), base + _minute_of_day(day_end)))
+        return subtract_intervals(windows, busy)
+
+
+def make_free_time_engine(engine: str, class_events: List[CalendarEvent], start_date: date,
+                          working_hours: WorkingHours):
+    """Build the free-time engine named by `engine` ("interval" or "grid")"""
+    if engine == "grid":
+        # NumPy is only needed for the grid engine
+        from .occupancy_grid import OccupancyGrid
+        return OccupancyGrid(class_events, start_date, working_hours)
+    if engine == "interval":
+        return IntervalFreeTime(class_events, start_date, working_hours)
+    raise ValueError(f"Unknown free-time engine: {engine}")
+
+
+class WeeklyFreeTime:
+    """
+    Free time over a multi-week horizon, as one FreeSlotIndex per week in minutes
+    from the first day's midnight. Recurring classes are expanded into a week
+    only when placement first reaches that week, so cost follows the number of
+    chunks placed rather than the length of the horizon.
+    """
+
+    def __init__(self, class_events: List[CalendarEvent], start_date: date, horizon_days: int,
+                 working_hours: WorkingHours, engine: str = "interval"):
+        self.start_date = start_date
+        self.origin = datetime.combine(start_date, time(0, 0))
+        self.horizon_days = horizon_days
+        self.week_count = (horizon_days + 6) // 7
+        self.engine = make_free_time_engine(engine, class_events, start_date, working_hours)
+        self._weeks: Dict[int, FreeSlotIndex] = {}
+        self._first_open = 0
+
+    def _build_week(self, week: int) -> FreeSlotIndex:
+        first_day = week * 7
+        last_day = min(first_day + 7, self.horizon_days)
+        return FreeSlotIndex(self.engine.free_intervals(first_day, last_day))
+
+    def week(self, week: int) -> FreeSlotIndex:
+        index = self._weeks.get(week)
+        if index is None:
+            index = self._weeks[week] = self._build_week(week)
+        return index
+
+    @property
+    def weeks_built(self) -> int:
+        return len(self._weeks)
+
+    def place(self, minutes: int, deadline: int) -> Optional[int]:
+        """Start of the earliest `minutes` free minutes ending by `deadline` (now taken), or None"""
+        for week in range(self._first_open, self.week_count):
+            if week * 7 * MINUTES_PER_DAY + minutes > deadline:
+                break
+            index = self.week(week)
+            slot = index.first_fit(minutes, deadline=deadline)
+            if slot is None:
+                continue
+            start, _ = index.allocate(slot, minutes)
+            while self._first_open < self.week_count and self._first_open in self._weeks \
+                    and self._weeks[self._first_open].largest() == 0:
+                self._first_open += 1
+            return start
+        return None
+
+    def to_minute(self, value: datetime) -> int:
+        return to_minutes(value, self.origin)
 
-    # Helper: chunk duration based on intensity
-    def chunk_size_for_intensity(intensity: str) -> int:
-        if intensity == 'High':
-            return 60
-        if intensity == 'Medium':
-            return 45
-        return 30
-
-    # Schedule each assignment in order
-    for assignment in assignments:
-        title = assignment.get('title', 'Assignment')
-        due_date_str = assignment.get('due_date')
-        try:
-            cutoff_date = None
-            if due_date_str:
-                cutoff_date = datetime.strptime(due_date_str, '%Y-%m-%d').date() - timedelta(days=1)
-        except Exception:
-            cutoff_date = None
-
-        # Determine latest datetime allowed for scheduling
-        latest_allowed = window_end
-        if cutoff_date:
-            cutoff_dt = datetime.combine(cutoff_date, time(23, 59))
-            if cutoff_dt < latest_allowed:
-                latest_allowed = cutoff_dt
-
-        # Iterate phases in order
+
+def _assignment_deadline(assignment: dict, free_time: WeeklyFreeTime) -> int:
+    """Latest minute a chunk may end: 23:59 the day before the due date, capped at the horizon"""
+    horizon_end = free_time.horizon_days * MINUTES_PER_DAY
+    due_date_str = assignment.get('due_date')
+    if not due_date_str:
+        return horizon_end
+    try:
+        cutoff_date = datetime.strptime(due_date_str, '%Y-%m-%d').date() - timedelta(days=1)
+    except (TypeError, ValueError):
+        return horizon_end
+    cutoff = free_time.to_minute(datetime.combine(cutoff_date, time(23, 59)))
+    return min(cutoff, horizon_end)
+
+
+class AssignmentChunks:
+    """
+    One assignment broken into chunks, array-backed: per chunk only its length
+    and the index of its phase are stored; phase titles/intensities live once in
+    `phases`.
+    """
+    __slots__ = ('title', 'deadline', 'phases', 'minutes', 'phase_of')
+
+    def __init__(self, assignment: dict, deadline: int):
+        self.title: str = assignment.get('title', 'Assignment')
+        self.deadline = deadline
+        self.phases: List[Tuple[str, str]] = []
+        self.minutes = array('i')
+        self.phase_of = array('i')
         for phase in assignment.get('phases', []):
-            phase_title = phase.get('title', 'Phase')
             duration = int(phase.get('duration_minutes', 0))
             intensity = phase.get('intensity', 'Medium')
             if duration <= 0:
                 continue
-
+            phase_index = len(self.phases)
+            self.phases.append((phase.get('title', 'Phase'), intensity))
             # Break into chunks according to intensity
             chunk_size = chunk_size_for_intensity(intensity)
-            remaining = duration
-            chunks: List[int] = []
-            while remaining > 0:
-                this_chunk = min(chunk_size, remaining)
-                chunks.append(this_chunk)
-                remaining -= this_chunk
-
-            # Schedule each chunk into earliest free slot that fits and ends before latest_allowed
-            for minutes in chunks:
-                placed = False
-                for i, slot in enumerate(free_slots):
-                    slot_start = slot['start']
-                    slot_end = slot['end']
-                    slot_duration_minutes = int((slot_end - slot_start).total_seconds() // 60)
-                    if slot_duration_minutes >= minutes and slot_end <= latest_allowed:
-                        # schedule at slot_start
-                        ev_start = slot_start
-                        ev_end = ev_start + timedelta(minutes=minutes)
-                        new_event = CalendarEvent(
-                            id=f"assign-{uuid.uuid4()}",
-                            title=f"{title} - {phase_title}",
-                            start=ev_start,
-                            end=ev_end,
-                            color="#f97316",
-                            extendedProps={"assignment": title, "phase": phase_title}
-                        )
-                        scheduled_events.append(new_event)
-
-                        # update free slot
-                        free_slots[i]['start'] = ev_end
-                        if (free_slots[i]['end'] - free_slots[i]['start']).total_seconds() < 60:
-                            free_slots.pop(i)
-                        placed = True
-                        break
-
-                if not placed:
-                    print(f"Could not place chunk ({minutes}m) for {title} - {phase_title}")
-                    # continue to next chunk (it will remain unscheduled)
-
-    return scheduled_events
\ No newline at end of file
+            full, rest = divmod(duration, chunk_size)
+            self.minutes.extend([chunk_size] * full + ([rest] if rest else []))
+            self.phase_of.extend([phase_index] * (full + (1 if rest else 0)))
+
+    def __len__(self) -> int:
+        return len(self.minutes)
+
+    def weighted_minutes(self, position: int) -> float:
+        return self.minutes[position] * INTENSITY_WEIGHTS.get(self.phases[self.phase_of[position]][1], 1.0)
+
+
+class CompactSchedule:
+    """
+    Result of the placement loop in integer minutes from `origin`: parallel
+    arrays of (assignment, chunk, start) for placed chunks and (assignment,
+    chunk, reason code) for unplaced ones. Pydantic models are only built by
+    events() / unplaced_chunks() at the API boundary.
+    """
+    __slots__ = ('origin', 'plans', 'assignment', 'chunk', 'start', 'unplaced_assignment', 'unplaced_chunk',
+                 'unplaced_reason')
+
+    def __init__(self, origin: datetime, plans: List[AssignmentChunks]):
+        self.origin = origin
+        self.plans = plans
+        self.assignment = array('i')
+        self.chunk = array('i')
+        self.start = array('q')
+        self.unplaced_assignment = array('i')
+        self.unplaced_chunk = array('i')
+        self.unplaced_reason = array('b')
+
+    def __len__(self) -> int:
+        return len(self.start)
+
+    def sort_by_start(self):
+        order = sorted(range(len(self.start)), key=self.start.__getitem__)
+        self.assignment = array('i', (self.assignment[k] for k in order))
+        self.chunk = array('i', (self.chunk[k] for k in order))
+        self.start = array('q', (self.start[k] for k in order))
+
+    def events(self) -> List[CalendarEvent]:
+        # One uuid per plan; chunk ids are unique suffixes of it
+        prefix = f"assign-{uuid.uuid4()}"
+        events: List[CalendarEvent] = []
+        for k in range(len(self.start)):
+            plan = self.plans[self.assignment[k]]
+            position = self.chunk[k]
+            phase_title = plan.phases[plan.phase_of[position]][0]
+            start = from_minutes(self.start[k], self.origin)
+            events.append(CalendarEvent(
+                id=f"{prefix}-{k}",
+                title=f"{plan.title} - {phase_title}",
+                start=start,
+                end=start + timedelta(minutes=plan.minutes[position]),
+                color="#f97316",
+                extendedProps={"assignment": plan.title, "phase": phase_title}
+            ))
+        return events
+
+    def unplaced_chunks(self) -> List[UnplacedChunk]:
+        unplaced: List[UnplacedChunk] = []
+        for k in range(len(self.unplaced_chunk)):
+            plan = self.plans[self.unplaced_assignment[k]]
+            position = self.unplaced_chunk[k]
+            unplaced.append(UnplacedChunk(
+                assignment=plan.title,
+                phase=plan.phases[plan.phase_of[position]][0],
+                minutes=plan.minutes[position],
+                reason=UNPLACED_REASONS[self.unplaced_reason[k]],
+            ))
+        return unplaced
+
+
+def _edf_order(plans: List[AssignmentChunks]) -> Iterator[Tuple[int, int]]:
+    """
+    Order chunks earliest-deadline-first by slack: an assignment's priority is its
+    deadline minus its remaining work, with high-intensity work weighted heavier so
+    it starts sooner. After each chunk the assignment's slack grows and it is
+    pushed back onto the heap, which interleaves competing assignments.
+    Phases within an assignment keep their order. Yields (assignment, chunk) pairs.
+    """
+    remaining = [sum(plan.weighted_minutes(k) for k in range(len(plan))) for plan in plans]
+    heap = [(plan.deadline - remaining[i], plan.deadline, i, 0) for i, plan in enumerate(plans) if len(plan)]
+    heapq.heapify(heap)
+    while heap:
+        _, deadline, i, position = heapq.heappop(heap)
+        yield i, position
+        remaining[i] -= plans[i].weighted_minutes(position)
+        if position + 1 < len(plans[i]):
+            heapq.heappush(heap, (deadline - remaining[i], deadline, i, position + 1))
+
+
+def _input_order(plans: List[AssignmentChunks]) -> Iterator[Tuple[int, int]]:
+    for i, plan in enumerate(plans):
+        for position in range(len(plan)):
+            yield i, position
+
+
+@timed("schedule_assignments")
+def place_assignments(
+    assignments: List[dict],
+    class_events: List[CalendarEvent],
+    *,
+    start_date: Optional[date] = None,
+    horizon_days: int = DEFAULT_HORIZON_DAYS,
+    day_start: time = DAY_START,
+    day_end: time = DAY_END,
+    working_hours: Optional[WorkingHours] = None,
+    strategy: str = "greedy",
+    engine: str = "interval",
+) -> CompactSchedule:
+    """
+    Placement engine behind plan_assignments, working purely in integer minutes.
+    Returns a CompactSchedule; no pydantic objects are created per chunk.
+    """
+    if strategy not in STRATEGIES:
+        raise ValueError(f"Unknown scheduling strategy: {strategy}")
+    horizon_days = max(1, min(horizon_days, MAX_HORIZON_DAYS))
+    if working_hours is None:
+        working_hours = {dow: (day_start, day_end) for dow in range(7)}
+    free_time = WeeklyFreeTime(class_events, start_date or date.today(), horizon_days, working_hours, engine)
+    horizon_end = horizon_days * MINUTES_PER_DAY
+
+    plans = [AssignmentChunks(a, _assignment_deadline(a, free_time)) for a in assignments]
+    result = CompactSchedule(free_time.origin, plans)
+    order = _edf_order(plans) if strategy == "edf" else _input_order(plans)
+    for i, position in order:
+        deadline = plans[i].deadline
+        # Earliest free time where the chunk ends by the deadline
+        start = free_time.place(plans[i].minutes[position], deadline)
+        if start is None:
+            result.unplaced_assignment.append(i)
+            result.unplaced_chunk.append(position)
+            if deadline <= 0:
+                result.unplaced_reason.append(REASON_BEFORE_WINDOW)
+            elif deadline < horizon_end:
+                result.unplaced_reason.append(REASON_NO_TIME_BEFORE_DEADLINE)
+            else:
+                result.unplaced_reason.append(REASON_NO_TIME_IN_HORIZON)
+            continue
+        result.assignment.append(i)
+        result.chunk.append(position)
+        result.start.append(start)
+
+    if strategy == "edf":
+        result.sort_by_start()
+    SCHEDULED_CHUNKS.labels("placed").inc(len(result.start))
+    SCHEDULED_CHUNKS.labels("unplaced").inc(len(result.unplaced_chunk))
+    return result
+
+
+def plan_assignments(
+    assignments: List[dict],
+    class_events: List[CalendarEvent],
+    **options,
+) -> Tuple[List[CalendarEvent], List[UnplacedChunk]]:
+    """
+    Schedule assignment phases into free time over `horizon_days` days starting at
+    start_date (default today), around recurring class_events. Each day's working
+    window is day_start-day_end unless working_hours gives per-day windows (days
+    left out of working_hours get no work). Each assignment in 'assignments' should be a dict:
+      { 'title': str, 'due_date': 'YYYY-MM-DD' or None, 'phases': [ {title, duration_minutes, intensity} ] }
+
+    strategy "greedy" places assignments in the order given; "edf" places the most
+    urgent work first (see _edf_order). Either way each chunk goes into the
+    earliest free time that ends by its assignment's deadline. engine selects how
+    free time is computed: "interval" (sorted intervals) or "grid" (NumPy occupancy grid).
+
+    Returns the scheduled CalendarEvents and the chunks that could not be placed.
+    """
+    schedule = place_assignments(assignments, class_events, **options)
+    return schedule.events(), schedule.unplaced_chunks()
+
+
+def schedule_assignments(assignments: List[dict], class_events: List[CalendarEvent], **options) -> List[CalendarEvent]:
+    """
+    Schedule assignment phases into free slots, taking class_events (recurring)
+    into account. Defaults to the next 7 days, 08:00-22:00; see plan_assignments
+    for the horizon and working-hours options. Unplaced chunks are logged.
+    """
+    scheduled_events, unplaced = plan_assignments(assignments, class_events, **options)
+    for chunk in unplaced:
+        print(f"Could not place chunk ({chunk.minutes}m) for {chunk.assignment} - {chunk.phase}: {chunk.reason}")
+    return scheduled_events
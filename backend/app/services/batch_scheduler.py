@@ -0,0 +1,191 @@
+"""
+Batch Scheduling
+Re-plans many users in one call (e.g. a whole cohort overnight) by running
+agent3_scheduler.plan_assignments across a process pool. Users are sent to the
+workers in small groups to keep IPC overhead low, and results are yielded per
+user as each group finishes, together with throughput statistics.
+"""
+import asyncio
+import json
+import os
+import time as clock
+from concurrent.futures import Executor, ProcessPoolExecutor
+from datetime import date, time
+from typing import Any, AsyncIterator, Dict, List, Literal, Optional
+
+from pydantic import BaseModel, Field, model_validator
+
+from ..models import CalendarEvent, UnplacedChunk
+from . import agent2_verifier, agent3_scheduler
+
+BATCH_WORKERS = int(os.getenv('AURA_BATCH_WORKERS', str(os.cpu_count() or 2)))
+# Users handled per worker task
+USERS_PER_TASK = int(os.getenv('AURA_BATCH_USERS_PER_TASK', '8'))
+
+
+class BatchScheduleOptions(BaseModel):
+    """Scheduler options applied to every user in the batch"""
+    start_date: Optional[date] = None
+    horizon_days: int = Field(agent3_scheduler.DEFAULT_HORIZON_DAYS, ge=1, le=agent3_scheduler.MAX_HORIZON_DAYS)
+    day_start: time = agent3_scheduler.DAY_START
+    day_end: time = agent3_scheduler.DAY_END
+    strategy: Literal["greedy", "edf"] = "greedy"
+    engine: Literal["interval", "grid"] = "interval"
+
+    @model_validator(mode="after")
+    def _window_not_empty(self) -> "BatchScheduleOptions":
+        # An inverted window would leave every user's work unplaced
+        if self.day_end <= self.day_start:
+            raise ValueError("day_end must be after day_start")
+        return self
+
+
+class UserSchedule(BaseModel):
+    """One user's input: recurring classes plus assignments as produced by verify_assignments"""
+    user_id: str
+    class_events: List[CalendarEvent] = []
+    assignments: List[Dict[str, Any]] = []
+
+
+class UserScheduleResult(BaseModel):
+    user_id: str
+    events: List[CalendarEvent] = []
+    unplaced: List[UnplacedChunk] = []
+    error: Optional[str] = None
+    elapsed_ms: float = 0.0
+
+
+class BatchStats(BaseModel):
+    users: int = 0
+    failed: int = 0
+    scheduled_events: int = 0
+    unplaced_chunks: int = 0
+    elapsed_seconds: float = 0.0
+    users_per_second: float = 0.0
+
+
+class BatchScheduleResult(BaseModel):
+    results: List[UserScheduleResult] = []
+    stats: BatchStats = BatchStats()
+
+
+def _schedule_user(user: Dict[str, Any], options: Dict[str, Any]) -> Dict[str, Any]:
+    started = clock.perf_counter()
+    try:
+        # Same cleaning the upload pipeline applies to LLM output
+        assignments = agent2_verifier.verify_assignments(json.dumps(user.get('assignments', [])))
+        class_events = [CalendarEvent.model_validate(ev) for ev in user.get('class_events', [])]
+        events, unplaced = agent3_scheduler.plan_assignments(assignments, class_events, **options)
+        return {
+            "user_id": user['user_id'],
+            "events": [ev.model_dump() for ev in events],
+            "unplaced": [chunk.model_dump() for chunk in unplaced],
+            "elapsed_ms": (clock.perf_counter() - started) * 1000,
+        }
+    except Exception as exc:
+        return {
+            "user_id": user['user_id'],
+            "error": str(exc),
+            "elapsed_ms": (clock.perf_counter() - started) * 1000,
+        }
+
+
+def _schedule_group(users: List[Dict[str, Any]], options: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """Worker: schedule a group of users"""
+    return [_schedule_user(user, options) for user in users]
+
+
+_executor: Optional[ProcessPoolExecutor] = None
+
+
+def _get_executor() -> ProcessPoolExecutor:
+    global _executor
+    if _executor is None:
+        _executor = ProcessPoolExecutor(max_workers=BATCH_WORKERS)
+    return _executor
+
+
+def shutdown():
+    """Stop the worker processes"""
+    global _executor
+    if _executor is not None:
+        _executor.shutdown(wait=False, cancel_futures=True)
+        _executor = None
+
+
+def _groups(users: List[UserSchedule], size: int) -> List[List[Dict[str, Any]]]:
+    dumped = [user.model_dump() for user in users]
+    return [dumped[i:i + size] for i in range(0, len(dumped), size)]
+
+
+def _record(stats: BatchStats, result: UserScheduleResult):
+    stats.users += 1
+    if result.error:
+        stats.failed += 1
+    stats.scheduled_events += len(result.events)
+    stats.unplaced_chunks += len(result.unplaced)
+
+
+def _finish(stats: BatchStats, started: float):
+    stats.elapsed_seconds = clock.perf_counter() - started
+    stats.users_per_second = stats.users / stats.elapsed_seconds if stats.elapsed_seconds > 0 else 0.0
+
+
+async def iter_schedule_batch(
+    users: List[UserSchedule],
+    options: Optional[BatchScheduleOptions] = None,
+    *,
+    stats: Optional[BatchStats] = None,
+    executor: Optional[Executor] = None,
+    users_per_task: int = USERS_PER_TASK,
+) -> AsyncIterator[UserScheduleResult]:
+    """
+    Yield each user's result as soon as its worker group finishes (completion
+    order, not input order). Pass a BatchStats to have it filled in as results
+    arrive; users_per_second is set once the batch is done.
+    """
+    options = options or BatchScheduleOptions()
+    stats = stats if stats is not None else BatchStats()
+    started = clock.perf_counter()
+    loop = asyncio.get_running_loop()
+    pool = executor or _get_executor()
+    plan_options = options.model_dump()
+
+    futures = [
+        loop.run_in_executor(pool, _schedule_group, group, plan_options)
+        for group in _groups(users, max(1, users_per_task))
+    ]
+    try:
+        for next_done in asyncio.as_completed(futures):
+            for item in await next_done:
+                result = UserScheduleResult.model_validate(item)
+                _record(stats, result)
+                yield result
+    finally:
+        # Client went away or a worker died: drop the groups not yet started
+        for future in futures:
+            future.cancel()
+        _finish(stats, started)
+
+
+def schedule_batch(
+    users: List[UserSchedule],
+    options: Optional[BatchScheduleOptions] = None,
+    *,
+    max_workers: Optional[int] = None,
+    users_per_task: int = USERS_PER_TASK,
+) -> BatchScheduleResult:
+    """Schedule every user in a dedicated process pool; results are in input order"""
+    options = options or BatchScheduleOptions()
+    result = BatchScheduleResult()
+    started = clock.perf_counter()
+    groups = _groups(users, max(1, users_per_task))
+    plan_options = options.model_dump()
+    with ProcessPoolExecutor(max_workers=max_workers or BATCH_WORKERS) as pool:
+        for items in pool.map(_schedule_group, groups, [plan_options] * len(groups)):
+            for item in items:
+                user_result = UserScheduleResult.model_validate(item)
+                _record(result.stats, user_result)
+                result.results.append(user_result)
+    _finish(result.stats, started)
+    return result
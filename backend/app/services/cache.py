@@ -1,17 +1,388 @@
-# This is a simple in-memory cache for the hackathon.
-# It stores the text of the last uploaded PDF.
+# Session cache for uploaded documents and parsed events.
+# Entries are namespaced per session, expire after a TTL and are evicted
+# least-recently-used first once the cache goes over its memory budget.
+# The storage backend is pluggable: the default keeps objects in process
+# memory, while the SQLite and file backends let several uvicorn workers
+# share state on one host.
 
-from typing import Dict, Optional, Any
+import hashlib
+import os
+import pickle
+import re
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Tuple
 
-# In-memory cache that can store any Python object (texts, event lists, etc.)
-_cache: Dict[str, Any] = {}
+DEFAULT_NAMESPACE = "default"
+DEFAULT_TTL_SECONDS = float(os.getenv("AURA_CACHE_TTL", str(6 * 3600)))
+DEFAULT_MAX_BYTES = int(os.getenv("AURA_CACHE_MAX_BYTES", str(64 * 1024 * 1024)))
+_SESSION_ID_RE = re.compile(r"[A-Za-z0-9_-]{1,64}")
 
 
-def set(key: str, value: Any):
+def _estimate_size(value: Any) -> int:
+    """Approximate memory footprint of a value (its pickled size)"""
+    try:
+        return len(pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL))
+    except Exception:
+        return 1024
+
+
+class CacheBackend:
+    """
+    Storage interface used by Cache. Keys arrive already namespaced.
+    Backends own expiry checks and must keep their total size under max_bytes
+    by evicting least-recently-used entries.
+    """
+
+    def get(self, key: str) -> Optional[Any]:
+        raise NotImplementedError
+
+    def set(self, key: str, value: Any, ttl: Optional[float]):
+        raise NotImplementedError
+
+    def delete(self, key: str):
+        raise NotImplementedError
+
+    def clear(self, prefix: str = ""):
+        raise NotImplementedError
+
+    def stats(self) -> Dict[str, Any]:
+        raise NotImplementedError
+
+
+class MemoryBackend(CacheBackend):
+    """Per-process LRU keeping live objects (no copies on read)"""
+
+    def __init__(self, max_bytes: int = DEFAULT_MAX_BYTES):
+        self.max_bytes = max_bytes
+        self._entries: "OrderedDict[str, Tuple[Optional[float], int, Any]]" = OrderedDict()
+        self._bytes = 0
+        self.evictions = 0
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[Any]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            expires_at, size, value = entry
+            if expires_at is not None and expires_at <= time.time():
+                self._remove(key)
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key: str, value: Any, ttl: Optional[float]):
+        size = _estimate_size(value)
+        expires_at = time.time() + ttl if ttl else None
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+            self._entries[key] = (expires_at, size, value)
+            self._bytes += size
+            while self._bytes > self.max_bytes and len(self._entries) > 1:
+                oldest = next(iter(self._entries))
+                self._remove(oldest)
+                self.evictions += 1
+
+    def _remove(self, key: str):
+        _, size, _ = self._entries.pop(key)
+        self._bytes -= size
+
+    def delete(self, key: str):
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+
+    def clear(self, prefix: str = ""):
+        with self._lock:
+            for key in [k for k in self._entries if k.startswith(prefix)]:
+                self._remove(key)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "backend": "memory",
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "max_bytes": self.max_bytes,
+                "evictions": self.evictions,
+            }
+
+
+class SQLiteBackend(CacheBackend):
+    """Pickled values in a SQLite file, shareable between worker processes"""
+
+    def __init__(self, path: str, max_bytes: int = DEFAULT_MAX_BYTES):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.evictions = 0
+        self._local = threading.local()
+        self._connect().execute(
+            "CREATE TABLE IF NOT EXISTS cache ("
+            " key TEXT PRIMARY KEY, value BLOB NOT NULL, size INTEGER NOT NULL,"
+            " expires_at REAL, accessed_at REAL NOT NULL)"
+        )
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=5, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            self._local.conn = conn
+        return conn
+
+    def get(self, key: str) -> Optional[Any]:
+        conn = self._connect()
+        row = conn.execute("SELECT value, expires_at FROM cache WHERE key = ?", (key,)).fetchone()
+        if row is None:
+            return None
+        blob, expires_at = row
+        now = time.time()
+        if expires_at is not None and expires_at <= now:
+            conn.execute("DELETE FROM cache WHERE key = ?", (key,))
+            return None
+        conn.execute("UPDATE cache SET accessed_at = ? WHERE key = ?", (now, key))
+        return pickle.loads(blob)
+
+    def set(self, key: str, value: Any, ttl: Optional[float]):
+        blob = pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL)
+        now = time.time()
+        conn = self._connect()
+        conn.execute(
+            "INSERT OR REPLACE INTO cache (key, value, size, expires_at, accessed_at) VALUES (?, ?, ?, ?, ?)",
+            (key, blob, len(blob), now + ttl if ttl else None, now),
+        )
+        self._evict(conn, now)
+
+    def _evict(self, conn: sqlite3.Connection, now: float):
+        conn.execute("DELETE FROM cache WHERE expires_at IS NOT NULL AND expires_at <= ?", (now,))
+        total = conn.execute("SELECT COALESCE(SUM(size), 0) FROM cache").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        for key, size in conn.execute("SELECT key, size FROM cache ORDER BY accessed_at").fetchall():
+            if total <= self.max_bytes:
+                break
+            conn.execute("DELETE FROM cache WHERE key = ?", (key,))
+            total -= size
+            self.evictions += 1
+
+    def delete(self, key: str):
+        self._connect().execute("DELETE FROM cache WHERE key = ?", (key,))
+
+    def clear(self, prefix: str = ""):
+        escaped = prefix.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+        self._connect().execute("DELETE FROM cache WHERE key LIKE ? ESCAPE '\\'", (escaped + "%",))
+
+    def stats(self) -> Dict[str, Any]:
+        entries, total = self._connect().execute(
+            "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM cache"
+        ).fetchone()
+        return {
+            "backend": "sqlite",
+            "entries": entries,
+            "bytes": total,
+            "max_bytes": self.max_bytes,
+            "evictions": self.evictions,
+        }
+
+
+class FileBackend(CacheBackend):
+    """
+    One pickle file per key in a directory; file mtime doubles as the LRU clock.
+    The total size is tracked as files are written and removed, and the
+    directory is only rescanned when that total goes over budget (or every
+    RESCAN_EVERY writes, to pick up files written by other workers).
+    """
+
+    RESCAN_EVERY = 256
+
+    def __init__(self, directory: str, max_bytes: int = DEFAULT_MAX_BYTES):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.evictions = 0
+        self._lock = threading.Lock()
+        self._sizes: Dict[str, int] = {}
+        self._bytes = 0
+        self._writes = 0
+        os.makedirs(directory, exist_ok=True)
+        self._rescan()
+
+    def _path(self, key: str) -> str:
+        # The namespace prefix is kept readable so clear(prefix) can match on it
+        namespace, _, name = key.partition(":")
+        digest = hashlib.sha256(name.encode("utf-8")).hexdigest()[:32]
+        return os.path.join(self.directory, f"{namespace}.{digest}.pkl")
+
+    def get(self, key: str) -> Optional[Any]:
+        path = self._path(key)
+        try:
+            with open(path, "rb") as fh:
+                expires_at, value = pickle.load(fh)
+        except (OSError, EOFError, pickle.UnpicklingError):
+            return None
+        if expires_at is not None and expires_at <= time.time():
+            self._unlink(path)
+            return None
+        try:
+            os.utime(path, None)
+        except OSError:
+            pass
+        return value
+
+    def set(self, key: str, value: Any, ttl: Optional[float]):
+        path = self._path(key)
+        blob = pickle.dumps((time.time() + ttl if ttl else None, value), protocol=pickle.HIGHEST_PROTOCOL)
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, "wb") as fh:
+            fh.write(blob)
+        os.replace(tmp_path, path)
+        with self._lock:
+            self._bytes += len(blob) - self._sizes.get(path, 0)
+            self._sizes[path] = len(blob)
+            self._writes += 1
+            if self._bytes > self.max_bytes or self._writes >= self.RESCAN_EVERY:
+                self._rescan()
+                self._evict()
+
+    def _files(self):
+        for name in os.listdir(self.directory):
+            if name.endswith(".pkl"):
+                path = os.path.join(self.directory, name)
+                try:
+                    st = os.stat(path)
+                except OSError:
+                    continue
+                yield name, path, st.st_size, st.st_mtime
+
+    def _rescan(self):
+        """Resync the tracked sizes with the directory"""
+        self._sizes = {path: size for _, path, size, _ in self._files()}
+        self._bytes = sum(self._sizes.values())
+        self._writes = 0
+
+    def _evict(self):
+        if self._bytes <= self.max_bytes:
+            return
+        for _, path, _, _ in sorted(self._files(), key=lambda f: f[3]):
+            if self._bytes <= self.max_bytes:
+                break
+            self._remove_file(path)
+            self.evictions += 1
+
+    def _remove_file(self, path: str):
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+        self._bytes -= self._sizes.pop(path, 0)
+
+    def _unlink(self, path: str):
+        with self._lock:
+            self._remove_file(path)
+
+    def delete(self, key: str):
+        self._unlink(self._path(key))
+
+    def clear(self, prefix: str = ""):
+        prefix = prefix.replace(":", ".")
+        for name, path, _, _ in list(self._files()):
+            if name.startswith(prefix):
+                self._unlink(path)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            self._rescan()
+            entries, total = len(self._sizes), self._bytes
+        return {
+            "backend": "file",
+            "entries": entries,
+            "bytes": total,
+            "max_bytes": self.max_bytes,
+            "evictions": self.evictions,
+        }
+
+
+class Cache:
+    """Namespaced, TTL-aware cache in front of a storage backend"""
+
+    def __init__(self, backend: Optional[CacheBackend] = None, default_ttl: Optional[float] = DEFAULT_TTL_SECONDS):
+        self.backend = backend or MemoryBackend()
+        self.default_ttl = default_ttl
+        self.hits = 0
+        self.misses = 0
+        self.sets = 0
+
+    @staticmethod
+    def _key(key: str, namespace: str) -> str:
+        return f"{namespace}:{key}"
+
+    def set(self, key: str, value: Any, namespace: str = DEFAULT_NAMESPACE, ttl: Optional[float] = None):
+        """Stores a value in the cache."""
+        self.backend.set(self._key(key, namespace), value, ttl if ttl is not None else self.default_ttl)
+        self.sets += 1
+
+    def get(self, key: str, namespace: str = DEFAULT_NAMESPACE) -> Optional[Any]:
+        """Retrieves a value from the cache."""
+        value = self.backend.get(self._key(key, namespace))
+        if value is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return value
+
+    def delete(self, key: str, namespace: str = DEFAULT_NAMESPACE):
+        self.backend.delete(self._key(key, namespace))
+
+    def clear_namespace(self, namespace: str):
+        self.backend.clear(f"{namespace}:")
+
+    def stats(self) -> Dict[str, Any]:
+        stats = dict(self.backend.stats())
+        stats.update({"hits": self.hits, "misses": self.misses, "sets": self.sets})
+        return stats
+
+
+def _backend_from_env() -> CacheBackend:
+    kind = os.getenv("AURA_CACHE_BACKEND", "memory").lower()
+    if kind == "sqlite":
+        return SQLiteBackend(os.getenv("AURA_CACHE_PATH", ".aura_cache.sqlite3"), DEFAULT_MAX_BYTES)
+    if kind == "file":
+        return FileBackend(os.getenv("AURA_CACHE_PATH", ".aura_cache"), DEFAULT_MAX_BYTES)
+    return MemoryBackend(DEFAULT_MAX_BYTES)
+
+
+# Global instance
+_cache = Cache(_backend_from_env())
+
+
+def session_namespace(session_id: Optional[str]) -> str:
+    """Namespace for a client session; clients without an id share the default one"""
+    if not session_id:
+        return DEFAULT_NAMESPACE
+    if not _SESSION_ID_RE.fullmatch(session_id):
+        # Never let client-supplied ids reach keys or file names verbatim
+        session_id = hashlib.sha256(session_id.encode("utf-8")).hexdigest()[:32]
+    return f"session-{session_id}"
+
+
+def set(key: str, value: Any, namespace: str = DEFAULT_NAMESPACE, ttl: Optional[float] = None):
     """Stores a value in the cache."""
-    _cache[key] = value
+    _cache.set(key, value, namespace=namespace, ttl=ttl)
 
 
-def get(key: str) -> Optional[Any]:
+def get(key: str, namespace: str = DEFAULT_NAMESPACE) -> Optional[Any]:
     """Retrieves a value from the cache."""
-    return _cache.get(key)
\ No newline at end of file
+    return _cache.get(key, namespace=namespace)
+
+
+def delete(key: str, namespace: str = DEFAULT_NAMESPACE):
+    """Removes a value from the cache."""
+    _cache.delete(key, namespace=namespace)
+
+
+def stats() -> Dict[str, Any]:
+    """Hit/miss counters plus backend size and eviction figures."""
+    return _cache.stats()
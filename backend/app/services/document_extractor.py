@@ -0,0 +1,72 @@
+"""
+Document Text Extraction
+Routes each uploaded file to its extractor (PDF, DOCX or plain text) and
+processes several uploads concurrently, so a multi-file upload takes about as
+long as its slowest file.
+"""
+import asyncio
+from io import BytesIO
+from typing import List, Literal, Optional, Tuple
+
+from fastapi import UploadFile
+from pydantic import BaseModel
+
+from . import pdf_extractor
+from .metrics import stage
+
+DocumentKind = Literal['pdf', 'docx', 'text']
+
+
+class ExtractedDocument(BaseModel):
+    filename: str
+    kind: DocumentKind
+    text: str = ''
+    error: Optional[str] = None
+
+
+def detect_kind(filename: str, content_type: str) -> DocumentKind:
+    filename = filename.lower()
+    if 'pdf' in content_type or filename.endswith('.pdf'):
+        return 'pdf'
+    if 'word' in content_type or filename.endswith('.docx'):
+        return 'docx'
+    return 'text'
+
+
+def _docx_text(data: bytes) -> str:
+    import docx  # python-docx
+    document = docx.Document(BytesIO(data))
+    return '\n'.join(p.text for p in document.paragraphs)
+
+
+async def extract_document(filename: str, content_type: str, data: bytes) -> ExtractedDocument:
+    """Extract one document; failures are reported on the result instead of raised"""
+    kind = detect_kind(filename, content_type)
+    try:
+        if kind == 'pdf':
+            text = await pdf_extractor.extract_text(data)
+        elif kind == 'docx':
+            # python-docx is pure Python and blocking; keep it off the event loop
+            with stage("extract_docx"):
+                text = await asyncio.to_thread(_docx_text, data)
+        else:
+            text = data.decode('utf-8')
+        return ExtractedDocument(filename=filename, kind=kind, text=text)
+    except Exception as e:
+        print(f"Failed to read uploaded {kind.upper()} {filename}: {e}")
+        return ExtractedDocument(filename=filename, kind=kind, error=str(e))
+
+
+async def extract_documents(files: List[Tuple[str, str, bytes]]) -> List[ExtractedDocument]:
+    """Extract (filename, content_type, data) triples concurrently, preserving order"""
+    return list(await asyncio.gather(*[
+        extract_document(filename, content_type, data) for filename, content_type, data in files
+    ]))
+
+
+async def extract_uploads(files: List[UploadFile]) -> List[ExtractedDocument]:
+    """Read and extract FastAPI uploads concurrently"""
+    contents = await asyncio.gather(*[f.read() for f in files])
+    return await extract_documents([
+        (f.filename or '', f.content_type or '', data) for f, data in zip(files, contents)
+    ])
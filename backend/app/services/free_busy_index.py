@@ -0,0 +1,273 @@
+"""
+Free/Busy Index
+Free time represented as a sorted array of [start, end) slots in integer
+minutes (relative to some origin), with a max segment tree over slot lengths.
+
+Slots only ever shrink from the front when time is allocated, so their order
+never changes and the tree supports:
+  - first_fit:  earliest slot that can hold N minutes            O(log n)
+  - first_fit with a deadline (earliest-before-deadline)         O(log n)
+  - allocate:   take N minutes from the front of a slot          O(log n)
+
+best_fit (smallest slot that can hold N minutes, optionally ending by a
+deadline) uses a treap of (length, index) keys, built on first use and kept in
+step with allocate; both are O(log n) expected.
+"""
+import random
+from bisect import bisect_right
+from datetime import datetime, timedelta
+from typing import Iterable, List, Optional, Tuple
+
+Interval = Tuple[int, int]
+
+
+def to_minutes(value: datetime, origin: datetime) -> int:
+    return int((value - origin).total_seconds() // 60)
+
+
+def from_minutes(value: int, origin: datetime) -> datetime:
+    return origin + timedelta(minutes=value)
+
+
+def merge_intervals(intervals: Iterable[Interval]) -> List[Interval]:
+    """Sort and merge overlapping or touching intervals"""
+    merged: List[List[int]] = []
+    for start, end in sorted(intervals):
+        if end <= start:
+            continue
+        if merged and start <= merged[-1][1]:
+            merged[-1][1] = max(merged[-1][1], end)
+        else:
+            merged.append([start, end])
+    return [(s, e) for s, e in merged]
+
+
+def subtract_intervals(windows: Iterable[Interval], busy: Iterable[Interval]) -> List[Interval]:
+    """
+    Windows minus busy time, as a sorted list of free intervals.
+    Both inputs are merged first; the sweep is linear in their combined size.
+    """
+    windows = merge_intervals(windows)
+    busy = merge_intervals(busy)
+    free: List[Interval] = []
+    j = 0
+    for w_start, w_end in windows:
+        cursor = w_start
+        # Skip busy blocks that end before this window
+        while j < len(busy) and busy[j][1] <= cursor:
+            j += 1
+        k = j
+        while k < len(busy) and busy[k][0] < w_end:
+            b_start, b_end = busy[k]
+            if cursor < b_start:
+                free.append((cursor, b_start))
+            cursor = max(cursor, b_end)
+            k += 1
+        if cursor < w_end:
+            free.append((cursor, w_end))
+    return free
+
+
+class _Node:
+    __slots__ = ("key", "priority", "left", "right", "min_index")
+
+    def __init__(self, key: Tuple[int, int], priority: float):
+        self.key = key
+        self.priority = priority
+        self.left: Optional["_Node"] = None
+        self.right: Optional["_Node"] = None
+        self.min_index = key[1]
+
+    def update(self):
+        self.min_index = self.key[1]
+        if self.left is not None and self.left.min_index < self.min_index:
+            self.min_index = self.left.min_index
+        if self.right is not None and self.right.min_index < self.min_index:
+            self.min_index = self.right.min_index
+
+
+def _split(node: Optional[_Node], key: Tuple[int, int]) -> Tuple[Optional[_Node], Optional[_Node]]:
+    """Split into (keys < key, keys >= key)"""
+    if node is None:
+        return None, None
+    if node.key < key:
+        left, right = _split(node.right, key)
+        node.right = left
+        node.update()
+        return node, right
+    left, right = _split(node.left, key)
+    node.left = right
+    node.update()
+    return left, node
+
+
+def _merge(left: Optional[_Node], right: Optional[_Node]) -> Optional[_Node]:
+    """Join two treaps where every key in `left` is below every key in `right`"""
+    if left is None:
+        return right
+    if right is None:
+        return left
+    if left.priority > right.priority:
+        left.right = _merge(left.right, right)
+        left.update()
+        return left
+    right.left = _merge(left, right.left)
+    right.update()
+    return right
+
+
+class _LengthTreap:
+    """Slots keyed by (length, index), with the smallest index kept per subtree"""
+
+    def __init__(self, keys: Iterable[Tuple[int, int]] = ()):
+        self._random = random.Random(0)
+        self._root = self._build(sorted(keys))
+
+    def _build(self, keys: List[Tuple[int, int]]) -> Optional[_Node]:
+        """Balanced tree over sorted keys, priorities handed out level by level"""
+        if not keys:
+            return None
+        nodes = [_Node(key, 0.0) for key in keys]
+
+        def link(lo: int, hi: int) -> Optional[_Node]:
+            if lo >= hi:
+                return None
+            mid = (lo + hi) // 2
+            node = nodes[mid]
+            node.left = link(lo, mid)
+            node.right = link(mid + 1, hi)
+            node.update()
+            return node
+
+        root = link(0, len(nodes))
+        priorities = sorted((self._random.random() for _ in nodes), reverse=True)
+        level = [root]
+        position = 0
+        while level:
+            following = []
+            for node in level:
+                node.priority = priorities[position]
+                position += 1
+                following.extend(child for child in (node.left, node.right) if child is not None)
+            level = following
+        return root
+
+    def insert(self, length: int, index: int):
+        left, right = _split(self._root, (length, index))
+        self._root = _merge(_merge(left, _Node((length, index), self._random.random())), right)
+
+    def remove(self, length: int, index: int):
+        left, rest = _split(self._root, (length, index))
+        _, right = _split(rest, (length, index + 1))
+        self._root = _merge(left, right)
+
+    def smallest(self, minutes: int, max_index: int) -> Optional[int]:
+        """Index of the shortest slot of at least `minutes` among indices <= max_index"""
+        below, node = _split(self._root, (minutes, -1))
+        top = node
+        found = None
+        while node is not None and node.min_index <= max_index:
+            if node.left is not None and node.left.min_index <= max_index:
+                node = node.left
+            elif node.key[1] <= max_index:
+                found = node.key[1]
+                break
+            else:
+                node = node.right
+        self._root = _merge(below, top)
+        return found
+
+
+class FreeSlotIndex:
+    def __init__(self, slots: Iterable[Interval]):
+        self._starts: List[int] = []
+        self._ends: List[int] = []
+        for start, end in slots:
+            self._starts.append(start)
+            self._ends.append(end)
+        n = len(self._starts)
+        size = 1
+        while size < max(n, 1):
+            size *= 2
+        self._size = size
+        self._tree = [0] * (2 * size)
+        for i in range(n):
+            self._tree[size + i] = self._ends[i] - self._starts[i]
+        for node in range(size - 1, 0, -1):
+            self._tree[node] = max(self._tree[2 * node], self._tree[2 * node + 1])
+        # Slots by length for best_fit, built on first use
+        self._by_length: Optional[_LengthTreap] = None
+
+    @classmethod
+    def from_windows(cls, windows: Iterable[Interval], busy: Iterable[Interval] = ()) -> "FreeSlotIndex":
+        return cls(subtract_intervals(windows, busy))
+
+    def __len__(self) -> int:
+        return len(self._starts)
+
+    def slot(self, index: int) -> Interval:
+        return self._starts[index], self._ends[index]
+
+    def free_slots(self) -> List[Interval]:
+        """Remaining non-empty free intervals, in order"""
+        return [(s, e) for s, e in zip(self._starts, self._ends) if e > s]
+
+    def free_minutes(self) -> int:
+        return sum(e - s for s, e in zip(self._starts, self._ends) if e > s)
+
+    def largest(self) -> int:
+        return self._tree[1]
+
+    def first_fit(self, minutes: int, deadline: Optional[int] = None) -> Optional[int]:
+        """
+        Index of the earliest slot with room for `minutes`. With a deadline the
+        allocation must also end by it; since slots are ordered, if the earliest
+        fitting slot misses the deadline every later one does too.
+        """
+        if minutes <= 0 or self._tree[1] < minutes:
+            return None
+        node = 1
+        while node < self._size:
+            node = 2 * node if self._tree[2 * node] >= minutes else 2 * node + 1
+        index = node - self._size
+        if deadline is not None and self._starts[index] + minutes > deadline:
+            return None
+        return index
+
+    def best_fit(self, minutes: int, deadline: Optional[int] = None) -> Optional[int]:
+        """
+        Index of the smallest slot with room for `minutes` (the earliest among
+        equal lengths). With a deadline only slots starting early enough to end
+        by it count; starts are ordered, so those are a prefix of the slots.
+        """
+        if minutes <= 0 or self._tree[1] < minutes:
+            return None
+        last = len(self._starts) - 1
+        if deadline is not None:
+            last = bisect_right(self._starts, deadline - minutes) - 1
+            if last < 0:
+                return None
+        if self._by_length is None:
+            self._by_length = _LengthTreap(
+                (end - start, i) for i, (start, end) in enumerate(zip(self._starts, self._ends)) if end > start
+            )
+        return self._by_length.smallest(minutes, last)
+
+    def allocate(self, index: int, minutes: int) -> Interval:
+        """Take `minutes` from the front of slot `index`; returns the allocated interval"""
+        start, end = self._starts[index], self._ends[index]
+        if end - start < minutes:
+            raise ValueError("slot too small for allocation")
+        new_start = start + minutes
+        if self._by_length is not None:
+            self._by_length.remove(end - start, index)
+            if end > new_start:
+                self._by_length.insert(end - new_start, index)
+        self._starts[index] = new_start
+        node = self._size + index
+        self._tree[node] = end - new_start
+        node //= 2
+        while node:
+            self._tree[node] = max(self._tree[2 * node], self._tree[2 * node + 1])
+            node //= 2
+        return start, new_start
@@ -4,19 +4,137 @@ Handles calendar creation, configuration, and management
 """
 import os
 import json
-from typing import Optional
+import asyncio
+import contextvars
+import functools
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, datetime, time
+from typing import List, Optional, Tuple
+import httplib2
+import pytz
+import google_auth_httplib2
 from google.oauth2 import service_account
 from googleapiclient.discovery import build
 from googleapiclient.errors import HttpError
+from pydantic import BaseModel
 from dotenv import load_dotenv
 
+from .metrics import metrics
+from .tracing import span
+
 load_dotenv()
 
+DEFAULT_TIMEZONE = "America/New_York"
+
+# Google Calendar rejects batch requests that bundle more than 50 calls.
+MAX_BATCH_SIZE = 50
+
+# RRULE day codes indexed like CalendarEvent.daysOfWeek (0=Sunday)
+RRULE_DAYS = ["SU", "MO", "TU", "WE", "TH", "FR", "SA"]
+
+GOOGLE_REQUEST_SECONDS = metrics.histogram(
+    "aura_google_calendar_request_duration_seconds",
+    "Duration of Google Calendar HTTP requests (single calls and whole batches)", ["operation"]
+)
+GOOGLE_EVENTS = metrics.counter(
+    "aura_google_calendar_events_total", "Event operations sent to Google Calendar", ["operation", "outcome"]
+)
+
+
+class BatchEventResult(BaseModel):
+    """Outcome of a single call inside a batch request"""
+    index: int
+    success: bool
+    summary: Optional[str] = None
+    event_id: Optional[str] = None
+    status: Optional[int] = None
+    error: Optional[str] = None
+
+
+class BulkSyncResult(BaseModel):
+    """Structured result of a bulk calendar operation"""
+    succeeded: int = 0
+    failed: int = 0
+    batches: int = 0
+    results: List[BatchEventResult] = []
+
+
+def _not_initialized_result(summaries: List[Optional[str]]) -> BulkSyncResult:
+    return BulkSyncResult(
+        failed=len(summaries),
+        results=[
+            BatchEventResult(index=i, success=False, summary=summary,
+                             error="Calendar service not initialized")
+            for i, summary in enumerate(summaries)
+        ]
+    )
+
+
+def _error_status(exception) -> Optional[int]:
+    """HTTP status of a failed batch call, if the error carries one"""
+    resp = getattr(exception, 'resp', None)
+    status = getattr(resp, 'status', None)
+    return int(status) if status is not None else None
+
+
+def _normalize_time(value: str) -> str:
+    """Pad 'HH' / 'HH:MM' time strings to 'HH:MM:SS'"""
+    if len(value.split(':')) != 3:
+        return f"{value}:00" if ':' in value else f"{value}:00:00"
+    return value
+
+
+def build_event_payload(summary: str, description: str, event_date: str,
+                        start_time: Optional[str] = None, end_time: Optional[str] = None,
+                        timezone: str = DEFAULT_TIMEZONE) -> dict:
+    """
+    Build a Google Calendar event body for a dated event.
+    Missing times default to a 09:00-10:00 slot; datetimes are sent as RFC3339 with offset.
+    """
+    tz = pytz.timezone(timezone)
+    start_time = _normalize_time(start_time or "09:00:00")
+    end_time = _normalize_time(end_time or "10:00:00")
+
+    start_dt = tz.localize(datetime.strptime(f"{event_date} {start_time}", "%Y-%m-%d %H:%M:%S"))
+    end_dt = tz.localize(datetime.strptime(f"{event_date} {end_time}", "%Y-%m-%d %H:%M:%S"))
+
+    return {
+        'summary': summary,
+        'description': description,
+        'start': {
+            'dateTime': start_dt.isoformat(),
+            'timeZone': timezone
+        },
+        'end': {
+            'dateTime': end_dt.isoformat(),
+            'timeZone': timezone
+        }
+    }
+
+
+def build_recurring_payload(summary: str, description: str, first_date: str,
+                            start_time: str, end_time: str, days_of_week: List[int], until: date,
+                            timezone: str = DEFAULT_TIMEZONE) -> dict:
+    """
+    Build a Google Calendar body for a weekly event: the first occurrence on
+    first_date plus a recurrence rule on days_of_week (0=Sunday) through `until`.
+    """
+    payload = build_event_payload(summary, description, first_date, start_time, end_time, timezone)
+    # UNTIL must be UTC when the start carries a time zone; include the whole last day
+    tz = pytz.timezone(timezone)
+    last = tz.localize(datetime.combine(until, time(23, 59, 59))).astimezone(pytz.utc)
+    byday = ",".join(RRULE_DAYS[d] for d in sorted(set(days_of_week)))
+    payload['recurrence'] = [f"RRULE:FREQ=WEEKLY;BYDAY={byday};UNTIL={last.strftime('%Y%m%dT%H%M%SZ')}"]
+    return payload
+
+
 class GoogleCalendarService:
     def __init__(self):
         self.calendar_id: Optional[str] = None
         self.service = None
         self.credentials = None
+        self._local = threading.local()
         
     def initialize_service(self):
         """Initialize Google Calendar API service with credentials"""
@@ -44,6 +162,20 @@ class GoogleCalendarService:
         except Exception as e:
             print(f"Error initializing Google Calendar service: {e}")
             return False
+
+    def _http(self):
+        """
+        Per-thread authorized transport. httplib2.Http is not thread-safe, so calls
+        made from the worker pool must not share the service's default connection.
+        Returns None (use the request's own transport) when no credentials are set.
+        """
+        if self.credentials is None:
+            return None
+        http = getattr(self._local, 'http', None)
+        if http is None:
+            http = google_auth_httplib2.AuthorizedHttp(self.credentials, http=httplib2.Http())
+            self._local.http = http
+        return http
     
     def create_public_calendar(self, summary: str = "Aura Event Schedule", 
                                description: str = "All events and schedules managed by Aura",
@@ -64,7 +196,7 @@ class GoogleCalendarService:
                 'timeZone': timezone
             }
             
-            created_calendar = self.service.calendars().insert(body=calendar).execute()
+            created_calendar = self.service.calendars().insert(body=calendar).execute(http=self._http())
             self.calendar_id = created_calendar['id']
             print(f"Created calendar with ID: {self.calendar_id}")
             
@@ -79,7 +211,7 @@ class GoogleCalendarService:
             self.service.acl().insert(
                 calendarId=self.calendar_id,
                 body=rule
-            ).execute()
+            ).execute(http=self._http())
             print(f"Calendar is now public")
             
             return self.calendar_id
@@ -110,14 +242,17 @@ class GoogleCalendarService:
             print(f"Adding event to calendar: {self.calendar_id}")
             print(f"Event data: {event_data}")
             
-            event = self.service.events().insert(
-                calendarId=self.calendar_id,
-                body=event_data
-            ).execute()
+            with span("google.insert"), GOOGLE_REQUEST_SECONDS.labels("insert").time():
+                event = self.service.events().insert(
+                    calendarId=self.calendar_id,
+                    body=event_data
+                ).execute(http=self._http())
+            GOOGLE_EVENTS.labels("insert", "ok").inc()
             
             print(f"Successfully created event: {event.get('id')}")
             return event
         except HttpError as error:
+            GOOGLE_EVENTS.labels("insert", "error").inc()
             print(f"An error occurred adding event: {error}")
             print(f"Calendar ID being used: {self.calendar_id}")
             return None
@@ -125,13 +260,113 @@ class GoogleCalendarService:
             print(f"Unexpected error adding event: {e}")
             return None
     
+    def add_events_batch(self, events: List[dict], batch_size: int = MAX_BATCH_SIZE) -> BulkSyncResult:
+        """
+        Insert many events using the batch HTTP endpoint.
+        Events are grouped into batches of at most MAX_BATCH_SIZE calls; each event
+        gets its own success/failure entry in the returned result (in input order).
+        """
+        summaries = [e.get('summary') for e in events]
+        if not self.service or not self.calendar_id:
+            print("Cannot add events: service or calendar_id not initialized")
+            return _not_initialized_result(summaries)
+
+        requests = [
+            self.service.events().insert(calendarId=self.calendar_id, body=event)
+            for event in events
+        ]
+        return self._execute_batches(requests, summaries, batch_size, operation="insert")
+
+    def patch_events_batch(self, updates: List[Tuple[str, dict]],
+                           batch_size: int = MAX_BATCH_SIZE) -> BulkSyncResult:
+        """Patch existing events, given as (event_id, event_data) pairs, using batch requests"""
+        summaries = [body.get('summary') for _, body in updates]
+        if not self.service or not self.calendar_id:
+            print("Cannot patch events: service or calendar_id not initialized")
+            return _not_initialized_result(summaries)
+
+        requests = [
+            self.service.events().patch(calendarId=self.calendar_id, eventId=event_id, body=body)
+            for event_id, body in updates
+        ]
+        return self._execute_batches(requests, summaries, batch_size, operation="patch")
+
+    def delete_events_batch(self, event_ids: List[str], batch_size: int = MAX_BATCH_SIZE) -> BulkSyncResult:
+        """Delete events by id using batch requests. Events that are already gone count as deleted."""
+        if not self.service or not self.calendar_id:
+            print("Cannot delete events: service or calendar_id not initialized")
+            return _not_initialized_result([None] * len(event_ids))
+
+        requests = [
+            self.service.events().delete(calendarId=self.calendar_id, eventId=event_id)
+            for event_id in event_ids
+        ]
+        return self._execute_batches(requests, [None] * len(event_ids), batch_size,
+                                     ignore_statuses=(404, 410), operation="delete")
+
+    def _execute_batches(self, requests: list, summaries: List[Optional[str]],
+                         batch_size: int = MAX_BATCH_SIZE,
+                         ignore_statuses: Tuple[int, ...] = (), operation: str = "batch") -> BulkSyncResult:
+        """
+        Run prepared API requests through batch calls and collect per-request results.
+        Errors whose HTTP status is in ignore_statuses are reported as successes.
+        """
+        batch_size = max(1, min(batch_size, MAX_BATCH_SIZE))
+        results: List[Optional[BatchEventResult]] = [None] * len(requests)
+        batches = 0
+
+        def callback(request_id, response, exception):
+            index = int(request_id)
+            status = _error_status(exception)
+            if exception is not None and status not in ignore_statuses:
+                results[index] = BatchEventResult(
+                    index=index, success=False, summary=summaries[index],
+                    status=status, error=str(exception)
+                )
+            else:
+                results[index] = BatchEventResult(
+                    index=index, success=True, summary=summaries[index],
+                    status=status, event_id=(response or {}).get('id')
+                )
+
+        for offset in range(0, len(requests), batch_size):
+            batch = self.service.new_batch_http_request(callback=callback)
+            for index in range(offset, min(offset + batch_size, len(requests))):
+                batch.add(requests[index], request_id=str(index))
+            batches += 1
+            try:
+                with span(f"google.batch_{operation}"), GOOGLE_REQUEST_SECONDS.labels(f"batch_{operation}").time():
+                    batch.execute(http=self._http())
+            except Exception as e:
+                # The whole batch failed (transport error, malformed response, ...)
+                print(f"Batch request failed: {e}")
+                for index in range(offset, min(offset + batch_size, len(requests))):
+                    if results[index] is None:
+                        results[index] = BatchEventResult(
+                            index=index, success=False, summary=summaries[index], error=str(e)
+                        )
+
+        final = [
+            r or BatchEventResult(index=i, success=False, summary=summaries[i], error="No response")
+            for i, r in enumerate(results)
+        ]
+        succeeded = sum(1 for r in final if r.success)
+        GOOGLE_EVENTS.labels(operation, "ok").inc(succeeded)
+        GOOGLE_EVENTS.labels(operation, "error").inc(len(final) - succeeded)
+        return BulkSyncResult(
+            succeeded=succeeded,
+            failed=len(final) - succeeded,
+            batches=batches,
+            results=final
+        )
+
     def list_calendars(self):
         """List all calendars (for debugging)"""
         if not self.service:
             return []
         
         try:
-            calendar_list = self.service.calendarList().list().execute()
+            calendar_list = self.service.calendarList().list().execute(http=self._http())
             return calendar_list.get('items', [])
         except HttpError as error:
             print(f"An error occurred listing calendars: {error}")
@@ -147,7 +382,7 @@ class GoogleCalendarService:
             return False
         
         try:
-            self.service.calendars().delete(calendarId=cal_id).execute()
+            self.service.calendars().delete(calendarId=cal_id).execute(http=self._http())
             print(f"Deleted calendar: {cal_id}")
             return True
         except HttpError as error:
@@ -155,5 +390,110 @@ class GoogleCalendarService:
             return False
 
 
-# Global instance
+class AsyncGoogleCalendarService:
+    """
+    Async facade over GoogleCalendarService.
+    The googleapiclient calls are blocking, so they are dispatched to a bounded
+    thread pool; a semaphore caps how many calls are in flight at once so a large
+    sync cannot monopolize the pool.
+    """
+
+    def __init__(self, service: GoogleCalendarService, max_workers: Optional[int] = None,
+                 max_concurrency: Optional[int] = None):
+        self.sync = service
+        self.max_workers = max_workers or int(os.getenv('GOOGLE_CALENDAR_MAX_WORKERS', '8'))
+        self.max_concurrency = max_concurrency or int(
+            os.getenv('GOOGLE_CALENDAR_MAX_CONCURRENCY', str(self.max_workers))
+        )
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._semaphore: Optional[asyncio.Semaphore] = None
+
+    @property
+    def calendar_id(self) -> Optional[str]:
+        return self.sync.calendar_id
+
+    def get_embed_url(self) -> Optional[str]:
+        return self.sync.get_embed_url()
+
+    def _get_executor(self) -> ThreadPoolExecutor:
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(
+                max_workers=self.max_workers, thread_name_prefix="gcal"
+            )
+        return self._executor
+
+    def _get_semaphore(self) -> asyncio.Semaphore:
+        # Created lazily so it binds to the running event loop
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+        return self._semaphore
+
+    async def _run(self, func, *args, **kwargs):
+        """Run a blocking call on the worker pool without blocking the event loop"""
+        async with self._get_semaphore():
+            loop = asyncio.get_running_loop()
+            # run_in_executor does not carry context variables; copy them so spans reach the request's trace
+            context = contextvars.copy_context()
+            return await loop.run_in_executor(
+                self._get_executor(), functools.partial(context.run, func, *args, **kwargs)
+            )
+
+    async def initialize_service(self) -> bool:
+        return await self._run(self.sync.initialize_service)
+
+    async def create_public_calendar(self, summary: str = "Aura Event Schedule",
+                                     description: str = "All events and schedules managed by Aura",
+                                     timezone: str = DEFAULT_TIMEZONE) -> Optional[str]:
+        return await self._run(self.sync.create_public_calendar, summary, description, timezone)
+
+    async def add_event(self, event_data: dict) -> Optional[dict]:
+        return await self._run(self.sync.add_event, event_data)
+
+    async def list_calendars(self):
+        return await self._run(self.sync.list_calendars)
+
+    async def delete_calendar(self, calendar_id: str = None) -> bool:
+        return await self._run(self.sync.delete_calendar, calendar_id)
+
+    async def add_events_batch(self, events: List[dict], batch_size: int = MAX_BATCH_SIZE) -> BulkSyncResult:
+        """Fan insert batches out across the worker pool and merge their results"""
+        return await self._fan_out(self.sync.add_events_batch, events, batch_size)
+
+    async def patch_events_batch(self, updates: List[Tuple[str, dict]],
+                                 batch_size: int = MAX_BATCH_SIZE) -> BulkSyncResult:
+        return await self._fan_out(self.sync.patch_events_batch, updates, batch_size)
+
+    async def delete_events_batch(self, event_ids: List[str], batch_size: int = MAX_BATCH_SIZE) -> BulkSyncResult:
+        return await self._fan_out(self.sync.delete_events_batch, event_ids, batch_size)
+
+    async def _fan_out(self, method, items: list, batch_size: int) -> BulkSyncResult:
+        """Split items into batch-sized slices, run each slice on the pool and merge"""
+        batch_size = max(1, min(batch_size, MAX_BATCH_SIZE))
+        offsets = list(range(0, len(items), batch_size))
+        parts = await asyncio.gather(*[
+            self._run(method, items[offset:offset + batch_size], batch_size)
+            for offset in offsets
+        ])
+        return merge_bulk_results(offsets, parts)
+
+    def shutdown(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=False)
+            self._executor = None
+
+
+def merge_bulk_results(offsets: List[int], parts: List[BulkSyncResult]) -> BulkSyncResult:
+    """Combine partial results, shifting each part's indices by its offset in the input"""
+    merged = BulkSyncResult()
+    for offset, part in zip(offsets, parts):
+        merged.succeeded += part.succeeded
+        merged.failed += part.failed
+        merged.batches += part.batches
+        for entry in part.results:
+            merged.results.append(entry.model_copy(update={'index': entry.index + offset}))
+    return merged
+
+
+# Global instances
 google_calendar_service = GoogleCalendarService()
+async_google_calendar_service = AsyncGoogleCalendarService(google_calendar_service)
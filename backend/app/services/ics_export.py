@@ -0,0 +1,364 @@
+"""
+ICS Export
+Builds iCalendar files from planner schedules, syllabus events and recurring
+classes.
+
+- Dated items that repeat (same summary and times on the same weekdays) are
+  written as one VEVENT with an RRULE, with EXDATEs for skipped weeks, instead
+  of one VEVENT per occurrence.
+- Recurring CalendarEvents (daysOfWeek + startTime/endTime) are written as
+  weekly RRULEs over the term.
+- A VTIMEZONE block describing the zone's offsets and DST transitions over the
+  exported years is included, so clients don't have to know the TZID.
+- UIDs are derived from event content, so re-exporting the same schedule
+  updates events in subscribed calendars instead of duplicating them.
+- Lines are folded at 75 octets and can be streamed in chunks (iter_ics_chunks).
+"""
+import hashlib
+from datetime import date, datetime, time, timedelta
+from functools import lru_cache
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Set, Tuple
+
+import pytz
+
+from ..models import CalendarEvent
+
+# Indexed by date.weekday() (0=Monday)
+WEEKDAY_CODES = ["MO", "TU", "WE", "TH", "FR", "SA", "SU"]
+# A weekday needs this many occurrences before it becomes part of a series
+MIN_SERIES_OCCURRENCES = 3
+# A series may skip at most this share of its weeks (as EXDATEs)
+MAX_EXDATE_RATIO = 0.5
+# Term length for recurring classes when no term end is given
+DEFAULT_TERM_WEEKS = 16
+# Maximum line length in octets, excluding CRLF (RFC 5545 3.1)
+MAX_LINE_OCTETS = 75
+
+# (summary, start "HH:MM" or None, end "HH:MM" or None); None times mean all-day
+SeriesKey = Tuple[str, Optional[str], Optional[str]]
+
+
+def escape_text(value: str) -> str:
+    """Escape a TEXT property value (RFC 5545 3.3.11)"""
+    return (value.replace("\\", "\\\\").replace(";", "\\;").replace(",", "\\,")
+            .replace("\r\n", "\\n").replace("\n", "\\n"))
+
+
+def _format_date(day: date) -> str:
+    return f"{day.year:04d}{day.month:02d}{day.day:02d}"
+
+
+def _format_local(day: date, hhmm: str) -> str:
+    return f"{_format_date(day)}T{hhmm.replace(':', '')}00"
+
+
+@lru_cache(maxsize=4096)
+def _hhmm(value: Any) -> Optional[str]:
+    """Normalise a time or "H:MM[:SS]" string to "HH:MM" """
+    if value is None:
+        return None
+    if isinstance(value, time):
+        return value.strftime("%H:%M")
+    hours, minutes = str(value).split(":")[:2]
+    return f"{int(hours):02d}:{int(minutes):02d}"
+
+
+def fold_line(line: str) -> str:
+    """Fold a content line into 75-octet pieces without splitting UTF-8 characters"""
+    if len(line) <= MAX_LINE_OCTETS and line.isascii():
+        return line
+    pieces = []
+    current, size = [], 0
+    limit = MAX_LINE_OCTETS
+    for char in line:
+        width = len(char.encode("utf-8"))
+        if size + width > limit:
+            pieces.append("".join(current))
+            # Continuation lines start with a space, which counts towards the limit
+            current, size, limit = [], 0, MAX_LINE_OCTETS - 1
+        current.append(char)
+        size += width
+    pieces.append("".join(current))
+    return "\r\n ".join(pieces)
+
+
+def event_uid(prefix: str, key: "SeriesKey", first: date, byday: str = "") -> str:
+    """Stable UID for an event or series, from what identifies it rather than when it was exported"""
+    identity = "\x1f".join([prefix, key[0], key[1] or "", key[2] or "", first.isoformat(), byday])
+    return f"{hashlib.sha256(identity.encode('utf-8')).hexdigest()[:32]}@aura-planner"
+
+
+def _format_offset(offset: timedelta) -> str:
+    seconds = int(offset.total_seconds())
+    sign = "-" if seconds < 0 else "+"
+    hours, rest = divmod(abs(seconds), 3600)
+    minutes, seconds = divmod(rest, 60)
+    return f"{sign}{hours:02d}{minutes:02d}" + (f"{seconds:02d}" if seconds else "")
+
+
+# --- VTIMEZONE ---
+
+def _offset_at(tz, moment: datetime) -> Tuple[timedelta, timedelta, str]:
+    """(utcoffset, dst, tzname) in effect at a UTC moment"""
+    local = moment.astimezone(tz)
+    return local.utcoffset(), local.dst(), local.tzname()
+
+
+def _same(a: Tuple, b: Tuple) -> bool:
+    return a[0] == b[0] and a[2] == b[2]
+
+
+def _transitions(tz, first_year: int, last_year: int) -> List[Tuple[datetime, Tuple, Tuple]]:
+    """UTC instants (to the minute) where the zone's offset changes, with the state before and after"""
+    found = []
+    moment = datetime(first_year, 1, 1, tzinfo=pytz.utc)
+    end = datetime(last_year + 1, 1, 1, tzinfo=pytz.utc)
+    state = _offset_at(tz, moment)
+    while moment < end:
+        following = moment + timedelta(days=1)
+        next_state = _offset_at(tz, following)
+        if not _same(state, next_state):
+            # Bisect the day down to the minute of the change
+            low, high = moment, following
+            while high - low > timedelta(minutes=1):
+                middle = low + (high - low) / 2
+                if _same(_offset_at(tz, middle), state):
+                    low = middle
+                else:
+                    high = middle
+            found.append((high.replace(second=0, microsecond=0), state, next_state))
+        moment, state = following, next_state
+    return found
+
+
+@lru_cache(maxsize=64)
+def _vtimezone(timezone: str, first_year: int, last_year: int) -> Tuple[str, ...]:
+    tz = pytz.timezone(timezone)
+    offset, dst, name = _offset_at(tz, datetime(first_year, 1, 1, tzinfo=pytz.utc))
+
+    def component(moment: datetime, before: timedelta, after: timedelta, is_dst: bool, tzname: str) -> List[str]:
+        kind = "DAYLIGHT" if is_dst else "STANDARD"
+        return [
+            f"BEGIN:{kind}",
+            f"DTSTART:{moment.strftime('%Y%m%dT%H%M%S')}",
+            f"TZOFFSETFROM:{_format_offset(before)}",
+            f"TZOFFSETTO:{_format_offset(after)}",
+            f"TZNAME:{tzname}",
+            f"END:{kind}",
+        ]
+
+    lines = ["BEGIN:VTIMEZONE", f"TZID:{timezone}"]
+    # The offset in effect at the start of the range, then every change after it
+    lines.extend(component(datetime(1970, 1, 1), offset, offset, bool(dst), name))
+    for instant, before, after in _transitions(tz, first_year, last_year):
+        # Onsets are given in local time before the change
+        lines.extend(component((instant + before[0]).replace(tzinfo=None), before[0], after[0], bool(after[1]), after[2]))
+    lines.append("END:VTIMEZONE")
+    return tuple(lines)
+
+
+def vtimezone_lines(timezone: str, first_year: int, last_year: int) -> List[str]:
+    """VTIMEZONE component for `timezone` covering first_year..last_year"""
+    return list(_vtimezone(timezone, first_year, last_year))
+
+
+# --- Series detection ---
+
+def _series(dates: Sequence[date]) -> Tuple[Optional[Tuple[List[date], List[date]]], List[date]]:
+    """
+    Split sorted unique dates into a weekly series and leftovers.
+    Returns ((expected dates, exdates) or None, single dates). Weekdays with too
+    few occurrences stay single events; the series is only used when it skips
+    few enough of its weeks.
+    """
+    if len(dates) < MIN_SERIES_OCCURRENCES:
+        return None, list(dates)
+    per_weekday: Dict[int, int] = {}
+    for day in dates:
+        per_weekday[day.weekday()] = per_weekday.get(day.weekday(), 0) + 1
+    weekdays: Set[int] = {wd for wd, count in per_weekday.items() if count >= MIN_SERIES_OCCURRENCES}
+    members = [day for day in dates if day.weekday() in weekdays]
+    singles = [day for day in dates if day.weekday() not in weekdays]
+    if not members:
+        return None, list(dates)
+
+    present = set(members)
+    expected = [members[0] + timedelta(days=i) for i in range((members[-1] - members[0]).days + 1)]
+    expected = [day for day in expected if day.weekday() in weekdays]
+    exdates = [day for day in expected if day not in present]
+    if len(exdates) > len(members) * MAX_EXDATE_RATIO:
+        return None, list(dates)
+    return (expected, exdates), singles
+
+
+def _byday(weekdays: Set[int]) -> str:
+    return ",".join(WEEKDAY_CODES[wd] for wd in sorted(weekdays))
+
+
+# --- Calendar ---
+
+def _schedule_occurrences(schedule: List[Dict[str, Any]], fixed_schedule: List[Dict[str, Any]]):
+    """(prefix, key, date) for each exportable dated item, in input order"""
+    items = []
+    for item in schedule:
+        if not item.get("Date") or not item.get("Start_Time") or not item.get("End_Time"):
+            continue
+        task = item.get("Task", "Scheduled Task")
+        category = item.get("Category")
+        summary = f"[{category}] {task}" if category else task
+        items.append(("dynamic", summary, item["Date"], item["Start_Time"], item["End_Time"]))
+    for item in fixed_schedule:
+        if not item.get("date"):
+            continue
+        start, end = item.get("start_time"), item.get("end_time")
+        if not (start and end):
+            start = end = None
+        items.append(("fixed", item.get("summary", "Fixed Event"), item["date"], start, end))
+
+    for prefix, summary, date_str, start, end in items:
+        try:
+            yield prefix, (summary, _hhmm(start), _hhmm(end)), date.fromisoformat(date_str)
+        except ValueError as exc:
+            print(f"Skipping ICS item with invalid date/time ({summary}): {exc}")
+
+
+def _timing_lines(key: SeriesKey, first: date, timezone: str) -> List[str]:
+    _, start, end = key
+    if start is None:
+        return [f"DTSTART;VALUE=DATE:{_format_date(first)}",
+                f"DTEND;VALUE=DATE:{_format_date(first + timedelta(days=1))}"]
+    end_day = first + timedelta(days=1) if end <= start else first
+    return [f"DTSTART;TZID={timezone}:{_format_local(first, start)}",
+            f"DTEND;TZID={timezone}:{_format_local(end_day, end)}"]
+
+
+def _exdate_line(key: SeriesKey, exdates: List[date], timezone: str) -> str:
+    if key[1] is None:
+        return "EXDATE;VALUE=DATE:" + ",".join(_format_date(day) for day in exdates)
+    return f"EXDATE;TZID={timezone}:" + ",".join(_format_local(day, key[1]) for day in exdates)
+
+
+def class_dates(event: CalendarEvent, term_start: date, term_end: date) -> List[date]:
+    """Dates of a weekly class between term_start and term_end, inclusive"""
+    # daysOfWeek uses 0=Sunday
+    days = {(d - 1) % 7 for d in event.daysOfWeek or []}
+    return [term_start + timedelta(days=i) for i in range((term_end - term_start).days + 1)
+            if (term_start + timedelta(days=i)).weekday() in days]
+
+
+def resolve_term(term_start: Optional[date], term_end: Optional[date],
+                 dates: Sequence[date] = ()) -> Tuple[date, date]:
+    """Term for recurring classes: starts at the earliest dated item (or today), lasts DEFAULT_TERM_WEEKS"""
+    if term_start is None:
+        term_start = min(dates) if dates else date.today()
+    if term_end is None:
+        term_end = term_start + timedelta(weeks=DEFAULT_TERM_WEEKS) - timedelta(days=1)
+    return term_start, term_end
+
+
+def recurring_classes(events: Optional[List[CalendarEvent]]) -> List[CalendarEvent]:
+    """The events that describe a weekly class (daysOfWeek + startTime/endTime)"""
+    return [event for event in events or [] if event.daysOfWeek and event.startTime and event.endTime]
+
+
+def schedule_term(
+    schedule: List[Dict[str, Any]],
+    fixed_schedule: List[Dict[str, Any]],
+    recurring_events: Optional[List[CalendarEvent]],
+    term_start: Optional[date],
+    term_end: Optional[date],
+) -> Tuple[Optional[date], Optional[date]]:
+    """
+    The term iter_ics_lines would use for these items, so it can be stored
+    instead of being resolved against today's date on every render. Without
+    recurring classes the term is returned unchanged.
+    """
+    if not recurring_classes(recurring_events):
+        return term_start, term_end
+    dates = [day for _, _, day in _schedule_occurrences(schedule, fixed_schedule)]
+    return resolve_term(term_start, term_end, dates)
+
+
+def iter_ics_lines(
+    schedule: List[Dict[str, Any]],
+    fixed_schedule: List[Dict[str, Any]],
+    timezone: str = "America/New_York",
+    recurring_events: Optional[List[CalendarEvent]] = None,
+    term_start: Optional[date] = None,
+    term_end: Optional[date] = None,
+    stamp: Optional[datetime] = None,
+) -> Iterator[str]:
+    """
+    Unfolded content lines of the calendar, VCALENDAR begin to end. stamp
+    (UTC, default now) is the DTSTAMP of every event.
+    """
+    # Group occurrences by (prefix, summary, times); dict order keeps first appearance
+    groups: Dict[Tuple[str, SeriesKey], Set[date]] = {}
+    for prefix, key, day in _schedule_occurrences(schedule, fixed_schedule):
+        groups.setdefault((prefix, key), set()).add(day)
+
+    classes = recurring_classes(recurring_events)
+    all_dates = [day for days in groups.values() for day in days]
+    if classes:
+        term_start, term_end = resolve_term(term_start, term_end, all_dates)
+        all_dates.extend([term_start, term_end])
+
+    dtstamp = (stamp or datetime.utcnow()).strftime("%Y%m%dT%H%M%SZ")
+    yield "BEGIN:VCALENDAR"
+    yield "VERSION:2.0"
+    yield "PRODID:-//Aura Planner//EN"
+    yield "CALSCALE:GREGORIAN"
+    yield f"X-WR-TIMEZONE:{timezone}"
+    if all_dates:
+        yield from vtimezone_lines(timezone, min(all_dates).year, max(all_dates).year)
+
+    def vevent(prefix: str, key: SeriesKey, first: date, byday: str = "", extra: Sequence[str] = ()) -> List[str]:
+        return ["BEGIN:VEVENT", f"UID:{event_uid(prefix, key, first, byday)}", f"DTSTAMP:{dtstamp}",
+                f"SUMMARY:{escape_text(key[0])}", *_timing_lines(key, first, timezone), *extra, "END:VEVENT"]
+
+    for (prefix, key), days in groups.items():
+        series, singles = _series(sorted(days))
+        if series is not None:
+            expected, exdates = series
+            byday = _byday({day.weekday() for day in expected})
+            extra = [f"RRULE:FREQ=WEEKLY;BYDAY={byday};COUNT={len(expected)}"]
+            if exdates:
+                extra.append(_exdate_line(key, exdates, timezone))
+            yield from vevent(prefix, key, expected[0], byday, extra)
+        for day in singles:
+            yield from vevent(prefix, key, day)
+
+    for event in classes:
+        dates = class_dates(event, term_start, term_end)
+        if not dates:
+            continue
+        key = (event.title, _hhmm(event.startTime), _hhmm(event.endTime))
+        byday = _byday({day.weekday() for day in dates})
+        yield from vevent("class", key, dates[0], byday, [f"RRULE:FREQ=WEEKLY;BYDAY={byday};COUNT={len(dates)}"])
+
+    yield "END:VCALENDAR"
+
+
+def build_ics(
+    schedule: List[Dict[str, Any]],
+    fixed_schedule: List[Dict[str, Any]],
+    timezone: str = "America/New_York",
+    recurring_events: Optional[List[CalendarEvent]] = None,
+    term_start: Optional[date] = None,
+    term_end: Optional[date] = None,
+    stamp: Optional[datetime] = None,
+) -> str:
+    lines = iter_ics_lines(schedule, fixed_schedule, timezone, recurring_events, term_start, term_end, stamp)
+    return "".join(f"{fold_line(line)}\r\n" for line in lines)
+
+
+def iter_ics_chunks(lines: Iterator[str], lines_per_chunk: int = 256) -> Iterator[bytes]:
+    """Folded, CRLF-terminated UTF-8 output in chunks of lines, for streaming responses"""
+    batch: List[str] = []
+    for line in lines:
+        batch.append(fold_line(line))
+        if len(batch) >= lines_per_chunk:
+            yield ("\r\n".join(batch) + "\r\n").encode("utf-8")
+            batch = []
+    if batch:
+        yield ("\r\n".join(batch) + "\r\n").encode("utf-8")
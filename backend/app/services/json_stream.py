@@ -0,0 +1,234 @@
+"""
+Incremental JSON Parsing
+Pulls complete elements out of a JSON array while the text is still arriving,
+so streamed LLM output can be validated and forwarded item by item.
+
+The same parser backs salvage_json_array: when a finished LLM response is not
+valid JSON (truncated output, a trailing comma, code fences), every complete
+element is still recovered locally instead of paying for a re-generation.
+"""
+import json
+from typing import Any, List, Optional, Tuple, Type, TypeVar
+
+from pydantic import BaseModel, ValidationError
+
+M = TypeVar('M', bound=BaseModel)
+
+
+class JSONArrayStreamParser:
+    """
+    Feed text chunks in; get back every element of the first JSON array (found
+    anywhere in the text, e.g. under a "schedule" key) as soon as it is complete.
+    Brackets inside strings are ignored. Elements that are not valid JSON on
+    their own get a local repair attempt (repair_json); those that still fail
+    are counted in `errors` and skipped.
+    """
+
+    def __init__(self):
+        self.done = False
+        self.errors = 0
+        self._in_array = False
+        self._in_string = False
+        self._escape = False
+        self._collecting = False
+        self._depth = 0
+        self._buf: List[str] = []
+
+    def feed(self, chunk: str) -> List[Any]:
+        items: List[Any] = []
+        for ch in chunk:
+            if self.done:
+                break
+            if self._collecting:
+                self._buf.append(ch)
+
+            if self._in_string:
+                if self._escape:
+                    self._escape = False
+                elif ch == '\\':
+                    self._escape = True
+                elif ch == '"':
+                    self._in_string = False
+                continue
+
+            if ch == '"':
+                self._in_string = True
+                if self._in_array and not self._collecting:
+                    # A string element starts
+                    self._start(ch, 0)
+                continue
+
+            if not self._in_array:
+                if ch == '[':
+                    self._in_array = True
+                continue
+
+            if not self._collecting:
+                if ch.isspace() or ch == ',':
+                    continue
+                if ch == ']':
+                    self.done = True
+                    continue
+                self._start(ch, 1 if ch in '{[' else 0)
+                continue
+
+            # Collecting an element, outside of any string
+            if ch in '{[':
+                self._depth += 1
+            elif ch in '}]':
+                if self._depth == 0:
+                    # ']' closes the array right after a scalar element
+                    self._buf.pop()
+                    self._emit(items)
+                    self.done = True
+                else:
+                    self._depth -= 1
+                    if self._depth == 0:
+                        self._emit(items)
+            elif ch == ',' and self._depth == 0:
+                self._buf.pop()
+                self._emit(items)
+        return items
+
+    def _start(self, ch: str, depth: int):
+        self._collecting = True
+        self._buf = [ch]
+        self._depth = depth
+
+    def _emit(self, items: List[Any]):
+        raw = ''.join(self._buf).strip()
+        self._collecting = False
+        self._buf = []
+        if not raw:
+            return
+        try:
+            items.append(json.loads(raw))
+            return
+        except ValueError:
+            pass
+        try:
+            items.append(json.loads(repair_json(raw)))
+        except ValueError:
+            self.errors += 1
+
+    @property
+    def truncated(self) -> bool:
+        """The text ended in the middle of an element"""
+        return not self.done and self._collecting and bool(''.join(self._buf).strip())
+
+
+def strip_code_fences(text: str) -> str:
+    """Remove a surrounding ```json ... ``` fence"""
+    cleaned = text.strip()
+    if cleaned.startswith("```json"):
+        cleaned = cleaned[len("```json"):]
+    if cleaned.startswith("```"):
+        cleaned = cleaned[len("```"):]
+    if cleaned.endswith("```"):
+        cleaned = cleaned[:-len("```")]
+    return cleaned.strip()
+
+
+def repair_json(text: str) -> str:
+    """
+    Fix the slips LLMs commonly make without changing any string content:
+    code fences and trailing commas before a closing bracket.
+    """
+    text = strip_code_fences(text)
+    out: List[str] = []
+    in_string = False
+    escape = False
+    for i, ch in enumerate(text):
+        if in_string:
+            out.append(ch)
+            if escape:
+                escape = False
+            elif ch == '\\':
+                escape = True
+            elif ch == '"':
+                in_string = False
+            continue
+        if ch == '"':
+            in_string = True
+        elif ch == ',':
+            j = i + 1
+            while j < len(text) and text[j].isspace():
+                j += 1
+            if j < len(text) and text[j] in '}]':
+                continue
+        out.append(ch)
+    return ''.join(out)
+
+
+class SalvageReport(BaseModel):
+    """How much of an LLM response was usable"""
+    recovered: int = 0
+    malformed: int = 0       # elements that were not valid JSON even after repair
+    invalid: int = 0         # elements that failed schema validation
+    truncated: bool = False  # the response stopped mid-element
+    repaired: bool = False   # the response needed local fixes to parse
+
+    @property
+    def lossless(self) -> bool:
+        return not (self.malformed or self.invalid or self.truncated)
+
+
+class SalvageResult(BaseModel):
+    items: List[Any] = []
+    report: SalvageReport = SalvageReport()
+
+
+def _as_array(data: Any) -> Optional[List[Any]]:
+    """The array itself, or the first array value of an object (e.g. {"schedule": [...]})"""
+    if isinstance(data, list):
+        return data
+    if isinstance(data, dict):
+        for value in data.values():
+            if isinstance(value, list):
+                return value
+    return None
+
+
+def salvage_json_array(text: str) -> SalvageResult:
+    """
+    Elements of the JSON array in `text`, recovering as much as possible:
+    strict parse, then parse after repair_json, then element-by-element
+    extraction that keeps every complete element of a broken or truncated array.
+    """
+    if not text or not text.strip():
+        return SalvageResult()
+    cleaned = strip_code_fences(text)
+    for candidate, repaired in ((cleaned, False), (repair_json(cleaned), True)):
+        try:
+            items = _as_array(json.loads(candidate))
+        except ValueError:
+            continue
+        if items is not None:
+            return SalvageResult(items=items, report=SalvageReport(recovered=len(items), repaired=repaired))
+
+    parser = JSONArrayStreamParser()
+    items = parser.feed(cleaned)
+    return SalvageResult(
+        items=items,
+        report=SalvageReport(
+            recovered=len(items),
+            malformed=parser.errors,
+            truncated=parser.truncated,
+            repaired=bool(items) or parser.errors > 0 or parser.truncated,
+        ),
+    )
+
+
+def validate_items(items: List[Any], model: Type[M], report: Optional[SalvageReport] = None) -> Tuple[List[M], int]:
+    """Validate each element against `model`, skipping failures; updates `report` if given"""
+    valid: List[M] = []
+    invalid = 0
+    for item in items:
+        try:
+            valid.append(model.model_validate(item))
+        except ValidationError:
+            invalid += 1
+    if report is not None:
+        report.invalid += invalid
+        report.recovered = len(valid)
+    return valid, invalid
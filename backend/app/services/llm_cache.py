@@ -0,0 +1,176 @@
+"""
+LLM Response Cache
+Content-addressed cache for Gemini responses. The key is a hash of
+(model id, generation config, full prompt), so resubmitting the same syllabus or
+goals text returns the stored answer instead of spending another generation.
+
+Entries live in a size-bounded LRU in memory with a TTL; when AURA_LLM_CACHE_DIR
+is set they are also written to disk so they survive restarts and can be shared
+by several workers on the same host. Lookups and stores are done by
+llm_gateway around each generation, through aget/aset so disk reads and
+writes run off the event loop.
+"""
+import asyncio
+import dataclasses
+import hashlib
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Tuple
+
+
+def _config_repr(generation_config: Any) -> Any:
+    """Stable, JSON-friendly view of a generation config"""
+    if generation_config is None:
+        return None
+    if dataclasses.is_dataclass(generation_config):
+        return dataclasses.asdict(generation_config)
+    if isinstance(generation_config, dict):
+        return generation_config
+    return repr(generation_config)
+
+
+def make_key(model_id: str, generation_config: Any, contents: Any) -> str:
+    """Content address of a generation request"""
+    material = json.dumps(
+        {"model": model_id, "config": _config_repr(generation_config), "contents": contents},
+        sort_keys=True,
+        ensure_ascii=False,
+        default=str,
+    )
+    return hashlib.sha256(material.encode("utf-8")).hexdigest()
+
+
+class LLMResponseCache:
+    def __init__(self, max_entries: int = 512, ttl_seconds: float = 24 * 3600,
+                 disk_dir: Optional[str] = None):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.disk_dir = disk_dir
+        self._entries: "OrderedDict[str, Tuple[float, str]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.evictions = 0
+        if disk_dir:
+            os.makedirs(disk_dir, exist_ok=True)
+
+    def get(self, key: str) -> Optional[str]:
+        now = time.time()
+        value = self._get_memory(key, now)
+        if value is not None:
+            return value
+        return self._get_disk(key, now)
+
+    async def aget(self, key: str) -> Optional[str]:
+        """get() for async callers: only a memory miss with a disk tier leaves the loop"""
+        now = time.time()
+        value = self._get_memory(key, now)
+        if value is not None or not self.disk_dir:
+            return value if value is not None else self._get_disk(key, now)
+        return await asyncio.to_thread(self._get_disk, key, now)
+
+    def _get_memory(self, key: str, now: float) -> Optional[str]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                expires_at, value = entry
+                if expires_at > now:
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return value
+                del self._entries[key]
+        return None
+
+    def _get_disk(self, key: str, now: float) -> Optional[str]:
+        value, expires_at = self._read_disk(key, now)
+        with self._lock:
+            if value is None:
+                self.misses += 1
+                return None
+            # Promote to the memory tier
+            self.hits += 1
+            self.disk_hits += 1
+            self._store(key, value, expires_at)
+        return value
+
+    def set(self, key: str, value: str):
+        expires_at = time.time() + self.ttl_seconds
+        with self._lock:
+            self._store(key, value, expires_at)
+        self._write_disk(key, value, expires_at)
+
+    async def aset(self, key: str, value: str):
+        """set() for async callers; the disk write runs in a worker thread"""
+        expires_at = time.time() + self.ttl_seconds
+        with self._lock:
+            self._store(key, value, expires_at)
+        if self.disk_dir:
+            await asyncio.to_thread(self._write_disk, key, value, expires_at)
+
+    def _store(self, key: str, value: str, expires_at: float):
+        self._entries[key] = (expires_at, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def _disk_path(self, key: str) -> str:
+        return os.path.join(self.disk_dir, f"{key}.json")
+
+    def _read_disk(self, key: str, now: float) -> Tuple[Optional[str], float]:
+        if not self.disk_dir:
+            return None, 0.0
+        path = self._disk_path(key)
+        try:
+            with open(path, "r", encoding="utf-8") as fh:
+                record = json.load(fh)
+        except (OSError, ValueError):
+            return None, 0.0
+        if record.get("expires_at", 0) <= now:
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+            return None, 0.0
+        return record.get("value"), record["expires_at"]
+
+    def _write_disk(self, key: str, value: str, expires_at: float):
+        if not self.disk_dir:
+            return
+        path = self._disk_path(key)
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        try:
+            with open(tmp_path, "w", encoding="utf-8") as fh:
+                json.dump({"expires_at": expires_at, "value": value}, fh)
+            os.replace(tmp_path, path)
+        except OSError as exc:
+            print(f"LLM cache disk write failed: {exc}")
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "hits": self.hits,
+                "disk_hits": self.disk_hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_rate": (self.hits / lookups) if lookups else 0.0,
+            }
+
+
+# Global instance
+llm_cache = LLMResponseCache(
+    max_entries=int(os.getenv("AURA_LLM_CACHE_SIZE", "512")),
+    ttl_seconds=float(os.getenv("AURA_LLM_CACHE_TTL", str(24 * 3600))),
+    disk_dir=os.getenv("AURA_LLM_CACHE_DIR") or None,
+)
@@ -0,0 +1,335 @@
+"""
+LLM Gateway
+Single entry point for LLM calls from agent1_ingestor and planner_service.
+
+- Models come from the configured provider (llm_providers: Gemini, or the
+  offline stub with AURA_LLM_PROVIDER=stub) and are shared per model id.
+- A semaphore bounds how many generations run at once (AURA_LLM_MAX_CONCURRENCY).
+- Every call has a timeout (AURA_LLM_TIMEOUT) and is retried on rate limits,
+  timeouts and 5xx errors with jittered exponential backoff.
+- Identical requests that are already in flight share one generation
+  (single-flight), and finished responses go through the llm_cache.
+
+Models can be registered directly (register_model), which is how tests plug
+in a fake model.
+"""
+import asyncio
+import os
+import random
+import time
+from typing import Any, AsyncIterator, Dict, Optional, Tuple
+
+from dotenv import load_dotenv
+
+from .llm_cache import LLMResponseCache, llm_cache, make_key
+from .llm_providers import LLMProvider, provider_from_env
+from .metrics import metrics
+from .tracing import span
+
+load_dotenv()
+
+# HTTP statuses worth retrying: rate limiting and transient server errors
+RETRYABLE_STATUS = {408, 429, 500, 502, 503, 504}
+
+LLM_CALL_SECONDS = metrics.histogram(
+    "aura_llm_call_duration_seconds", "Duration of each model call attempt", ["task", "outcome"]
+)
+LLM_REQUESTS = metrics.counter(
+    "aura_llm_requests_total", "LLM requests by how they were served", ["task", "source"]
+)
+LLM_RETRIES = metrics.counter("aura_llm_retries_total", "Retried model calls", ["task"])
+
+
+class LLMUnavailableError(RuntimeError):
+    """No model is configured for the requested model id"""
+
+
+def is_retryable(exc: BaseException) -> bool:
+    """Timeouts, rate limits and transient server errors are retried; anything else is not"""
+    if isinstance(exc, asyncio.TimeoutError):
+        return True
+    code = getattr(exc, "code", None)
+    if isinstance(code, int) and code in RETRYABLE_STATUS:
+        return True
+    # Fall back on the google.api_core exception names for errors without a usable .code
+    return type(exc).__name__ in {"ResourceExhausted", "ServiceUnavailable", "DeadlineExceeded",
+                                  "InternalServerError", "TooManyRequests"}
+
+
+class LLMGateway:
+    def __init__(self, max_concurrency: int = 4, timeout_seconds: float = 60.0, max_retries: int = 3,
+                 backoff_base: float = 0.5, backoff_max: float = 8.0,
+                 cache: Optional[LLMResponseCache] = None, provider: Optional[LLMProvider] = None):
+        self.max_concurrency = max_concurrency
+        self.timeout_seconds = timeout_seconds
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.cache = cache
+        self.provider = provider
+        self._models: Dict[str, Any] = {}
+        self._semaphore: Optional[Tuple[asyncio.AbstractEventLoop, asyncio.Semaphore]] = None
+        self._inflight: Dict[str, asyncio.Task] = {}
+        self.calls = 0
+        self.cache_hits = 0
+        self.coalesced = 0
+        self.retries = 0
+        self.timeouts = 0
+        self.failures = 0
+        self.in_flight = 0
+        self.calls_by_task: Dict[str, int] = {}
+
+    # --- Models ---
+
+    def register_model(self, model_id: str, model: Any):
+        """Use `model` for `model_id` (a GenerativeModel, or a fake in tests)"""
+        self._models[model_id] = model
+
+    def model(self, model_id: str) -> Optional[Any]:
+        """Shared model instance for model_id from the provider; None when it is not usable"""
+        if model_id in self._models:
+            return self._models[model_id]
+        if self.provider is None:
+            return None
+        model = self.provider.get_model(model_id)
+        if model is not None:
+            self._models[model_id] = model
+        return model
+
+    def available(self, model_id: str) -> bool:
+        return self.model(model_id) is not None
+
+    def _require(self, model_id: str) -> Any:
+        model = self.model(model_id)
+        if model is None:
+            provider = self.provider.name if self.provider else "none"
+            raise LLMUnavailableError(
+                f"LLM model {model_id} not available from provider '{provider}'. "
+                "Set GEMINI_API_KEY or GOOGLE_API_KEY, or AURA_LLM_PROVIDER=stub."
+            )
+        return model
+
+    # --- Limits ---
+
+    def _limit(self) -> asyncio.Semaphore:
+        """Concurrency semaphore for the running event loop"""
+        loop = asyncio.get_running_loop()
+        if self._semaphore is None or self._semaphore[0] is not loop:
+            self._semaphore = (loop, asyncio.Semaphore(self.max_concurrency))
+        return self._semaphore[1]
+
+    def _backoff(self, attempt: int) -> float:
+        """Full-jitter exponential backoff"""
+        return random.uniform(0, min(self.backoff_max, self.backoff_base * (2 ** attempt)))
+
+    def _count(self, task: str):
+        self.calls += 1
+        self.calls_by_task[task] = self.calls_by_task.get(task, 0) + 1
+
+    @staticmethod
+    def _kwargs(generation_config: Any, safety_settings: Any) -> Dict[str, Any]:
+        kwargs: Dict[str, Any] = {}
+        if generation_config is not None:
+            kwargs["generation_config"] = generation_config
+        if safety_settings is not None:
+            kwargs["safety_settings"] = safety_settings
+        return kwargs
+
+    # --- Calls ---
+
+    async def _call(self, model: Any, contents: Any, kwargs: Dict[str, Any], task: str) -> str:
+        """One generation under the concurrency limit, with timeout and retries"""
+        attempt = 0
+        while True:
+            try:
+                async with self._limit():
+                    self.in_flight += 1
+                    started = time.perf_counter()
+                    outcome = "error"
+                    try:
+                        with span(f"llm.{task}"):
+                            response = await asyncio.wait_for(
+                                model.generate_content_async(contents, **kwargs), self.timeout_seconds
+                            )
+                        outcome = "ok"
+                        return response.text
+                    except asyncio.TimeoutError:
+                        outcome = "timeout"
+                        raise
+                    finally:
+                        self.in_flight -= 1
+                        LLM_CALL_SECONDS.labels(task, outcome).observe(time.perf_counter() - started)
+            except Exception as exc:
+                if isinstance(exc, asyncio.TimeoutError):
+                    self.timeouts += 1
+                if attempt >= self.max_retries or not is_retryable(exc):
+                    self.failures += 1
+                    raise
+                delay = self._backoff(attempt)
+                attempt += 1
+                self.retries += 1
+                LLM_RETRIES.labels(task).inc()
+                print(f"LLM {task}: {type(exc).__name__}, retry {attempt}/{self.max_retries} in {delay:.2f}s")
+                # Sleep outside the semaphore so waiting retries don't hold a slot
+                await asyncio.sleep(delay)
+
+    async def generate(
+        self,
+        model_id: str,
+        contents: Any,
+        *,
+        generation_config: Any = None,
+        safety_settings: Any = None,
+        task: str = "generate",
+        use_cache: bool = True,
+    ) -> str:
+        """
+        Response text for a generation request. Cached responses are returned
+        directly; identical requests already in flight are awaited instead of
+        sent again. Failed or empty generations are not cached.
+        """
+        model = self._require(model_id)
+        kwargs = self._kwargs(generation_config, safety_settings)
+        self._count(task)
+        if not use_cache:
+            LLM_REQUESTS.labels(task, "model").inc()
+            return await self._call(model, contents, kwargs, task)
+
+        key = make_key(model_id, generation_config, contents)
+        if self.cache is not None:
+            cached = await self.cache.aget(key)
+            if cached is not None:
+                self.cache_hits += 1
+                LLM_REQUESTS.labels(task, "cache").inc()
+                return cached
+
+        shared = self._inflight.get(key)
+        if shared is not None and shared.get_loop() is asyncio.get_running_loop():
+            self.coalesced += 1
+            LLM_REQUESTS.labels(task, "coalesced").inc()
+        else:
+            LLM_REQUESTS.labels(task, "model").inc()
+            shared = asyncio.ensure_future(self._generate_and_store(key, model, contents, kwargs, task))
+            self._inflight[key] = shared
+
+            def _release(done: asyncio.Task):
+                if self._inflight.get(key) is done:
+                    del self._inflight[key]
+
+            shared.add_done_callback(_release)
+        # A waiter being cancelled must not cancel the generation others share
+        return await asyncio.shield(shared)
+
+    async def _generate_and_store(self, key: str, model: Any, contents: Any, kwargs: Dict[str, Any],
+                                  task: str) -> str:
+        text = await self._call(model, contents, kwargs, task)
+        if self.cache is not None and text and text.strip():
+            await self.cache.aset(key, text)
+        return text
+
+    async def stream(
+        self,
+        model_id: str,
+        contents: Any,
+        *,
+        generation_config: Any = None,
+        safety_settings: Any = None,
+        task: str = "stream",
+    ) -> AsyncIterator[str]:
+        """
+        Streaming counterpart of generate: yields text chunks as the model
+        produces them. A cache hit is yielded as a single chunk; a completed
+        stream is stored under the same key as the non-streaming call. Retries
+        only happen before the first chunk; each chunk wait has the call timeout.
+        """
+        model = self._require(model_id)
+        kwargs = self._kwargs(generation_config, safety_settings)
+        self._count(task)
+        key = make_key(model_id, generation_config, contents)
+        if self.cache is not None:
+            cached = await self.cache.aget(key)
+            if cached is not None:
+                self.cache_hits += 1
+                LLM_REQUESTS.labels(task, "cache").inc()
+                yield cached
+                return
+        LLM_REQUESTS.labels(task, "model").inc()
+
+        parts = []
+        attempt = 0
+        while True:
+            delay = None
+            async with self._limit():
+                self.in_flight += 1
+                try:
+                    try:
+                        # Only the wait for the first chunk is a span; later chunks are paced by the reader
+                        with span(f"llm.{task}.first_chunk"):
+                            response = await asyncio.wait_for(
+                                model.generate_content_async(contents, stream=True, **kwargs), self.timeout_seconds
+                            )
+                            chunks = response.__aiter__()
+                            first = await asyncio.wait_for(chunks.__anext__(), self.timeout_seconds)
+                    except StopAsyncIteration:
+                        return
+                    except Exception as exc:
+                        if isinstance(exc, asyncio.TimeoutError):
+                            self.timeouts += 1
+                        if attempt >= self.max_retries or not is_retryable(exc):
+                            self.failures += 1
+                            raise
+                        delay = self._backoff(attempt)
+                        attempt += 1
+                        self.retries += 1
+                        LLM_RETRIES.labels(task).inc()
+                        print(f"LLM {task}: {type(exc).__name__}, retry {attempt}/{self.max_retries} in {delay:.2f}s")
+                    else:
+                        chunk = first
+                        while True:
+                            text = chunk.text
+                            if text:
+                                parts.append(text)
+                                yield text
+                            try:
+                                chunk = await asyncio.wait_for(chunks.__anext__(), self.timeout_seconds)
+                            except StopAsyncIteration:
+                                break
+                finally:
+                    self.in_flight -= 1
+            if delay is None:
+                break
+            # Sleep outside the semaphore so waiting retries don't hold a slot
+            await asyncio.sleep(delay)
+
+        full_text = "".join(parts)
+        if self.cache is not None and full_text.strip():
+            await self.cache.aset(key, full_text)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "calls": self.calls,
+            "cache_hits": self.cache_hits,
+            "coalesced": self.coalesced,
+            "retries": self.retries,
+            "timeouts": self.timeouts,
+            "failures": self.failures,
+            "in_flight": self.in_flight,
+            "max_concurrency": self.max_concurrency,
+            "provider": self.provider.name if self.provider else None,
+            "calls_by_task": dict(self.calls_by_task),
+        }
+
+
+# Global instance
+llm_gateway = LLMGateway(
+    max_concurrency=int(os.getenv("AURA_LLM_MAX_CONCURRENCY", "4")),
+    timeout_seconds=float(os.getenv("AURA_LLM_TIMEOUT", "60")),
+    max_retries=int(os.getenv("AURA_LLM_MAX_RETRIES", "3")),
+    backoff_base=float(os.getenv("AURA_LLM_BACKOFF_BASE", "0.5")),
+    backoff_max=float(os.getenv("AURA_LLM_BACKOFF_MAX", "8")),
+    cache=llm_cache,
+    provider=provider_from_env(),
+)
+
+# Read at scrape time only
+metrics.gauge("aura_llm_in_flight", "Model calls currently running").set_function(lambda: llm_gateway.in_flight)
@@ -0,0 +1,267 @@
+"""
+LLM Providers
+Where llm_gateway gets its models from. A provider hands out model objects
+with the google-generativeai call shape, generate_content_async(contents,
+stream=False, **kwargs) returning something with .text, so the gateway's
+limits, retries and caching apply to every provider alike.
+
+- gemini: the real Gemini API (GEMINI_API_KEY or GOOGLE_API_KEY)
+- stub:   a deterministic offline model for load tests and benchmarks. It
+          recognises each prompt the app sends and answers with schema-valid
+          JSON (or text), sized by the input, after a configurable latency.
+
+Select with AURA_LLM_PROVIDER (default gemini); the stub's latency is set by
+AURA_LLM_STUB_LATENCY_MS and AURA_LLM_STUB_JITTER_MS.
+"""
+import asyncio
+import hashlib
+import json
+import os
+import random
+import re
+from datetime import date, timedelta
+from typing import Any, AsyncIterator, Dict, List, Optional
+
+
+class LLMProvider:
+    name = "base"
+
+    def get_model(self, model_id: str) -> Optional[Any]:
+        """Model object for model_id, or None when the provider is not usable"""
+        raise NotImplementedError
+
+
+class GeminiProvider(LLMProvider):
+    name = "gemini"
+
+    def __init__(self):
+        self._configured = False
+
+    def get_model(self, model_id: str) -> Optional[Any]:
+        api_key = os.getenv("GEMINI_API_KEY") or os.getenv("GOOGLE_API_KEY")
+        if not api_key:
+            return None
+        try:
+            import google.generativeai as genai
+            if not self._configured:
+                genai.configure(api_key=api_key)
+                self._configured = True
+            return genai.GenerativeModel(model_id)
+        except Exception as exc:
+            print(f"Error configuring Gemini model {model_id}: {exc}")
+            return None
+
+
+# --- Local stub ---
+
+_DATE = re.compile(r"\b(\d{4})-(\d{2})-(\d{2})\b")
+_DAY_NAMES = ["Monday", "Tuesday", "Wednesday", "Thursday", "Friday", "Saturday", "Sunday"]
+_SUBJECTS = ["Algorithms", "Databases", "Linear Algebra", "Operating Systems", "Statistics",
+             "Compilers", "Networks", "Machine Learning", "Ethics", "Writing"]
+
+
+def _prompt_text(contents: Any) -> str:
+    """Flatten a prompt (string or role/parts blocks) into plain text"""
+    if isinstance(contents, str):
+        return contents
+    if isinstance(contents, dict):
+        return "\n".join(_prompt_text(part) for part in contents.get("parts", [])) or str(contents.get("text", ""))
+    if isinstance(contents, list):
+        return "\n".join(_prompt_text(item) for item in contents)
+    return str(contents)
+
+
+def _anchor_date(text: str) -> date:
+    """Earliest date mentioned in the prompt, else a fixed date so output stays deterministic"""
+    found = []
+    for year, month, day in _DATE.findall(text):
+        try:
+            found.append(date(int(year), int(month), int(day)))
+        except ValueError:
+            continue
+    return min(found) if found else date(2025, 1, 6)
+
+
+def _scale(text: str, per_chars: int, low: int, high: int) -> int:
+    """Number of items to produce for an input of this size"""
+    return max(low, min(high, low + len(text) // per_chars))
+
+
+def _hhmm(minutes: int) -> str:
+    return f"{minutes // 60:02d}:{minutes % 60:02d}"
+
+
+def _classes(text: str, rng: random.Random) -> Any:
+    items = []
+    for i in range(_scale(text, 4000, 2, 8)):
+        start = rng.choice(range(8 * 60, 18 * 60, 30))
+        items.append({
+            "title": f"{_SUBJECTS[i % len(_SUBJECTS)]} {100 + rng.randrange(500)}",
+            "daysOfWeek": sorted(rng.sample(range(1, 6), rng.choice([1, 2, 3]))),
+            "startTime": _hhmm(start),
+            "endTime": _hhmm(start + rng.choice([50, 75, 90])),
+        })
+    return items
+
+
+def _assignments(text: str, rng: random.Random) -> Any:
+    anchor = _anchor_date(text)
+    items = []
+    for i in range(_scale(text, 3000, 1, 20)):
+        phases = [
+            {
+                "title": title,
+                "duration_minutes": rng.choice([30, 45, 60, 90, 120, 180]),
+                "intensity": rng.choice(["Low", "Medium", "High"]),
+            }
+            for title in ["Research", "Draft", "Revise", "Submit"][:rng.randint(2, 4)]
+        ]
+        items.append({
+            "title": f"{_SUBJECTS[i % len(_SUBJECTS)]} Assignment {i + 1}",
+            "due_date": (anchor + timedelta(days=rng.randint(3, 60))).isoformat(),
+            "phases": phases,
+        })
+    return items
+
+
+def _syllabus(text: str, rng: random.Random) -> Any:
+    anchor = _anchor_date(text)
+    items = []
+    for i in range(_scale(text, 1500, 3, 60)):
+        day = anchor + timedelta(days=i * 2 + rng.randint(0, 1))
+        kind = rng.choice(["Class", "Class", "Class", "Exam", "Deadline"])
+        item = {
+            "date": day.isoformat(),
+            "day": _DAY_NAMES[day.weekday()],
+            "summary": f"{_SUBJECTS[i % len(_SUBJECTS)]} {kind}",
+            "type": kind,
+        }
+        if kind != "Deadline":
+            start = rng.choice(range(8 * 60, 17 * 60, 30))
+            item["start_time"] = _hhmm(start)
+            item["end_time"] = _hhmm(start + 90)
+        items.append(item)
+    return items
+
+
+def _schedule(text: str, rng: random.Random) -> List[Dict[str, Any]]:
+    anchor = _anchor_date(text)
+    items = []
+    for i in range(_scale(text, 800, 5, 40)):
+        day = anchor + timedelta(days=i % 7)
+        start = 8 * 60 + (i // 7) * 90 + rng.choice([0, 30])
+        if start + 60 > 22 * 60:
+            continue
+        items.append({
+            "Day": _DAY_NAMES[day.weekday()],
+            "Date": day.isoformat(),
+            "Start_Time": _hhmm(start),
+            "End_Time": _hhmm(start + 60),
+            "Task": f"Study {_SUBJECTS[rng.randrange(len(_SUBJECTS))]}",
+            "Category": rng.choice(["Study", "Project", "Personal"]),
+        })
+    return items
+
+
+def _task_demands(text: str, rng: random.Random) -> Any:
+    return [
+        {
+            "task": f"Study {_SUBJECTS[i % len(_SUBJECTS)]}",
+            "category": "Study",
+            "total_minutes": rng.choice([120, 180, 240, 300]),
+            "session_minutes": rng.choice([45, 60, 90]),
+            "deadline": None,
+            "earliest_time": None,
+            "latest_time": None,
+        }
+        for i in range(_scale(text, 400, 2, 12))
+    ]
+
+
+# First marker found in the prompt decides the answer; order matters where prompts share words
+_PROMPT_KINDS = [
+    ("class schedule parser", lambda text, rng: json.dumps(_classes(text, rng))),
+    ("extracts assignments", lambda text, rng: json.dumps(_assignments(text, rng))),
+    ("expert data extractor", lambda text, rng: json.dumps(_syllabus(text, rng))),
+    ("refinement mode", lambda text, rng: json.dumps({
+        "reasoning": "Moved sessions to respect the new constraints.",
+        "schedule": _schedule(text, rng),
+    })),
+    ("scheduling demands", lambda text, rng: json.dumps(_task_demands(text, rng))),
+    ("meticulous scheduling assistant", lambda text, rng: json.dumps(_schedule(text, rng))),
+    ("helpful scheduling assistant", lambda text, rng: "GOALS:\n1. Study 5 hours\n\nCONSTRAINTS:\n1. No work after 22:00"),
+    ("NEW CONSTRAINTS", lambda text, rng: "NEW CONSTRAINTS:\n1. Keep evenings free"),
+    ("AI tutor", lambda text, rng: "- Read the brief\n- Outline the answer\n- Start with the hardest part"),
+    ("AI chef", lambda text, rng: "1. Omelette\n2. Fried rice\n3. Pasta with pesto"),
+]
+
+
+class _StubResponse:
+    def __init__(self, text: str):
+        self.text = text
+
+
+class LocalStubModel:
+    """Offline stand-in for GenerativeModel; the same prompt always gets the same answer"""
+
+    def __init__(self, model_id: str, latency_ms: float = 0.0, jitter_ms: float = 0.0, chunk_chars: int = 64):
+        self.model_id = model_id
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.chunk_chars = chunk_chars
+        self.calls = 0
+
+    def answer(self, contents: Any) -> str:
+        text = _prompt_text(contents)
+        seed = int.from_bytes(hashlib.sha256(f"{self.model_id}\n{text}".encode("utf-8")).digest()[:8], "big")
+        rng = random.Random(seed)
+        for marker, build in _PROMPT_KINDS:
+            if marker in text:
+                return build(text, rng)
+        return "OK"
+
+    def _delay(self, contents: Any) -> float:
+        if not self.latency_ms and not self.jitter_ms:
+            return 0.0
+        rng = random.Random(_prompt_text(contents))
+        return max(0.0, self.latency_ms + rng.uniform(-self.jitter_ms, self.jitter_ms)) / 1000
+
+    async def generate_content_async(self, contents: Any, stream: bool = False, **kwargs):
+        self.calls += 1
+        text = self.answer(contents)
+        delay = self._delay(contents)
+        if not stream:
+            await asyncio.sleep(delay)
+            return _StubResponse(text)
+        return self._stream(text, delay)
+
+    async def _stream(self, text: str, delay: float) -> AsyncIterator[_StubResponse]:
+        pieces = [text[i:i + self.chunk_chars] for i in range(0, len(text), self.chunk_chars)] or [""]
+        # Half the latency before the first chunk, the rest spread over the stream
+        await asyncio.sleep(delay / 2)
+        for piece in pieces:
+            yield _StubResponse(piece)
+            await asyncio.sleep(delay / 2 / len(pieces))
+
+
+class LocalStubProvider(LLMProvider):
+    name = "stub"
+
+    def __init__(self, latency_ms: float = 0.0, jitter_ms: float = 0.0):
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+
+    def get_model(self, model_id: str) -> Optional[Any]:
+        return LocalStubModel(model_id, self.latency_ms, self.jitter_ms)
+
+
+def provider_from_env() -> LLMProvider:
+    name = os.getenv("AURA_LLM_PROVIDER", "gemini").strip().lower()
+    if name == "stub":
+        return LocalStubProvider(
+            latency_ms=float(os.getenv("AURA_LLM_STUB_LATENCY_MS", "0")),
+            jitter_ms=float(os.getenv("AURA_LLM_STUB_JITTER_MS", "0")),
+        )
+    if name != "gemini":
+        print(f"Unknown AURA_LLM_PROVIDER '{name}', using gemini")
+    return GeminiProvider()
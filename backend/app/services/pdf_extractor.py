@@ -0,0 +1,176 @@
+"""
+PDF Text Extraction
+Runs PyMuPDF in a process pool so parsing never blocks the event loop and
+concurrent uploads spread across cores. Large documents are split into page
+ranges that are extracted in parallel and yielded back in page order.
+
+The upload is written once to a temporary file and the workers open it by
+path, so only the path is sent to each task rather than the whole document.
+"""
+import asyncio
+import os
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+from typing import AsyncIterator, List, Optional, Tuple, Union
+
+from .metrics import timed
+
+MAX_PDF_BYTES = int(os.getenv('AURA_PDF_MAX_BYTES', str(20 * 1024 * 1024)))
+MAX_PDF_PAGES = int(os.getenv('AURA_PDF_MAX_PAGES', '300'))
+PDF_WORKERS = int(os.getenv('AURA_PDF_WORKERS', str(os.cpu_count() or 2)))
+
+# Pages handled per worker task; small documents are done in a single round trip
+PAGES_PER_TASK = 16
+
+
+class PDFExtractionError(ValueError):
+    """The upload is not a readable PDF"""
+
+
+class PDFLimitError(PDFExtractionError):
+    """The upload exceeds the configured byte or page limit"""
+
+
+def _open(source: Union[bytes, str]):
+    """Open a PDF from its bytes or from a file path"""
+    import pymupdf as fitz  # PyMuPDF, imported in the worker process
+    if isinstance(source, str):
+        return fitz.open(source, filetype="pdf")
+    return fitz.open(stream=source, filetype="pdf")
+
+
+def _extract_head(source: Union[bytes, str], max_pages: int) -> Tuple[int, List[str]]:
+    """Worker: page count plus the text of the first PAGES_PER_TASK pages"""
+    doc = _open(source)
+    try:
+        count = doc.page_count
+        if count > max_pages:
+            return count, []
+        return count, [doc[i].get_text() for i in range(min(count, PAGES_PER_TASK))]
+    finally:
+        doc.close()
+
+
+def _extract_range(source: Union[bytes, str], start: int, stop: int) -> List[str]:
+    """Worker: text of pages [start, stop)"""
+    doc = _open(source)
+    try:
+        return [doc[i].get_text() for i in range(start, stop)]
+    finally:
+        doc.close()
+
+
+def _page_ranges(count: int) -> List[Tuple[int, int]]:
+    """[start, stop) ranges of the pages after the head, one per worker task"""
+    return [(start, min(start + PAGES_PER_TASK, count)) for start in range(PAGES_PER_TASK, count, PAGES_PER_TASK)]
+
+
+def _check_page_count(count: int, max_pages: int):
+    if count > max_pages:
+        raise PDFLimitError(f"PDF has {count} pages; the limit is {max_pages}")
+
+
+def extract_pages_sync(source: Union[bytes, str], max_pages: int = MAX_PDF_PAGES) -> List[str]:
+    """
+    Text of every page, in order, extracted in the calling process with the
+    same head and page-range tasks iter_pages hands to the workers. Used where
+    the pool gets in the way, e.g. heap profiling in the benchmarks.
+    """
+    try:
+        count, pages = _extract_head(source, max_pages)
+    except Exception as e:
+        raise PDFExtractionError(str(e)) from e
+    _check_page_count(count, max_pages)
+    for start, stop in _page_ranges(count):
+        try:
+            pages += _extract_range(source, start, stop)
+        except Exception as e:
+            raise PDFExtractionError(str(e)) from e
+    return pages
+
+
+_executor: Optional[ProcessPoolExecutor] = None
+
+
+def _write_temp(data: bytes) -> str:
+    handle, path = tempfile.mkstemp(prefix="aura-", suffix=".pdf")
+    with os.fdopen(handle, "wb") as f:
+        f.write(data)
+    return path
+
+
+def _remove_temp(path: str):
+    try:
+        os.remove(path)
+    except OSError:
+        pass
+
+
+def _get_executor() -> ProcessPoolExecutor:
+    global _executor
+    if _executor is None:
+        _executor = ProcessPoolExecutor(max_workers=PDF_WORKERS)
+    return _executor
+
+
+def shutdown():
+    """Stop the worker processes"""
+    global _executor
+    if _executor is not None:
+        _executor.shutdown(wait=False, cancel_futures=True)
+        _executor = None
+
+
+async def iter_pages(data: bytes, max_pages: int = MAX_PDF_PAGES,
+                     max_bytes: int = MAX_PDF_BYTES) -> AsyncIterator[str]:
+    """
+    Yield the text of each page in order as soon as it has been extracted.
+    Raises PDFLimitError / PDFExtractionError for oversized or unreadable files.
+    """
+    if len(data) > max_bytes:
+        raise PDFLimitError(f"PDF is larger than {max_bytes // (1024 * 1024)} MB")
+
+    loop = asyncio.get_running_loop()
+    executor = _get_executor()
+    path = await asyncio.to_thread(_write_temp, data)
+    futures = []
+    try:
+        try:
+            count, head = await loop.run_in_executor(executor, _extract_head, path, max_pages)
+        except Exception as e:
+            raise PDFExtractionError(str(e)) from e
+        _check_page_count(count, max_pages)
+
+        # Queue the remaining page ranges right away so they run while we yield
+        futures = [
+            loop.run_in_executor(executor, _extract_range, path, start, stop)
+            for start, stop in _page_ranges(count)
+        ]
+        for page in head:
+            yield page
+        for future in futures:
+            try:
+                pages = await future
+            except Exception as e:
+                raise PDFExtractionError(str(e)) from e
+            for page in pages:
+                yield page
+    finally:
+        for future in futures:
+            future.cancel()
+        # Tasks that already started keep the file open until they finish;
+        # on POSIX removing it now is still safe
+        await asyncio.to_thread(_remove_temp, path)
+
+
+@timed("extract_pdf")
+async def extract_pages(data: bytes, max_pages: int = MAX_PDF_PAGES,
+                        max_bytes: int = MAX_PDF_BYTES) -> List[str]:
+    """Text of every page, in order"""
+    return [page async for page in iter_pages(data, max_pages, max_bytes)]
+
+
+async def extract_text(data: bytes, max_pages: int = MAX_PDF_PAGES,
+                       max_bytes: int = MAX_PDF_BYTES) -> str:
+    """Full document text (pages joined in linear time)"""
+    return "".join(await extract_pages(data, max_pages, max_bytes))
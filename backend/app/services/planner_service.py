@@ -1,25 +1,24 @@
+import asyncio
 import json
 import os
-from datetime import datetime, timedelta
-from typing import Any, Dict, List, Optional
+from datetime import date
+from typing import Any, AsyncIterator, Dict, List, Optional, Tuple
 
-import google.generativeai as genai
 from google.generativeai import types
 
 from dotenv import load_dotenv
 
+from .google_calendar_service import build_event_payload, build_recurring_payload
+from ..models import CalendarEvent
+from . import ics_export, schedule_solver, text_chunker
+from .json_stream import SalvageResult, salvage_json_array, strip_code_fences
+from .llm_gateway import llm_gateway
+from .metrics import timed
+from .sync_index import event_key
+
 load_dotenv()
 
 GEMINI_MODEL = os.getenv("GEMINI_MODEL_ID", "gemini-2.5-flash")
-GEMINI_API_KEY = os.getenv("GEMINI_API_KEY") or os.getenv("GOOGLE_API_KEY")
-
-model = None
-if GEMINI_API_KEY:
-    try:
-        genai.configure(api_key=GEMINI_API_KEY)
-        model = genai.GenerativeModel(GEMINI_MODEL)
-    except Exception as exc:  # pragma: no cover - configuration failure
-        print(f"Failed to configure Gemini: {exc}")
 
 SAFETY_SETTINGS: List[Dict[str, str]] = [
     {"category": "HARM_CATEGORY_HARASSMENT", "threshold": "BLOCK_NONE"},
@@ -41,22 +40,16 @@ JSON_GENERATION_CONFIG = types.GenerationConfig(
 )
 
 
-def _ensure_model() -> genai.GenerativeModel:
-    if not model:
-        raise RuntimeError("Gemini model not configured. Set GEMINI_API_KEY or GOOGLE_API_KEY.")
-    return model
+def _clean_json_text(raw_text: str) -> str:
+    return strip_code_fences(raw_text)
 
 
-def _clean_json_text(raw_text: str) -> str:
-    cleaned = raw_text.strip()
-    if cleaned.startswith("```json"):
-        cleaned = cleaned[len("```json"):]
-    if cleaned.startswith("```"):
-        cleaned = cleaned[len("```"):]
-    if cleaned.endswith("```"):
-        cleaned = cleaned[:-len("```")] \
-            .strip()
-    return cleaned.strip()
+def _salvage(response_text: str, label: str) -> SalvageResult:
+    """Array elements of a model response, recovering what it can from malformed JSON"""
+    salvaged = salvage_json_array(response_text)
+    if salvaged.report.repaired or not salvaged.report.lossless:
+        print(f"Planner {label}: recovered {salvaged.report.recovered} items from malformed JSON ({salvaged.report})")
+    return salvaged
 
 
 def _content_blocks(system_prompt: str, user_prompt: str) -> List[Dict[str, Any]]:
@@ -65,30 +58,78 @@ def _content_blocks(system_prompt: str, user_prompt: str) -> List[Dict[str, Any]
     ]
 
 
-async def parse_syllabus(pdf_text: str) -> List[Dict[str, Any]]:
-    prompt = (
-        "You are an expert data extractor. Parse the following raw text from a syllabus PDF "
-        "into a structured JSON array of schedule events. Infer dates and event types (Class, "
-        "Exam, Deadline, Break). Use this JSON format: [{\"date\": \"YYYY-MM-DD\", "
-        "\"day\": \"DayOfWeek\", \"start_time\": \"HH:MM\", \"end_time\": \"HH:MM\", "
-        "\"summary\": \"Event Title\", \"type\": \"Class/Exam/Deadline/Break\"}]. "
-        "For all-day events or deadlines you may omit start_time and end_time. Only output the JSON array."
-    )
+SYLLABUS_PROMPT = (
+    "You are an expert data extractor. Parse the following raw text from a syllabus PDF "
+    "into a structured JSON array of schedule events. Infer dates and event types (Class, "
+    "Exam, Deadline, Break). Use this JSON format: [{\"date\": \"YYYY-MM-DD\", "
+    "\"day\": \"DayOfWeek\", \"start_time\": \"HH:MM\", \"end_time\": \"HH:MM\", "
+    "\"summary\": \"Event Title\", \"type\": \"Class/Exam/Deadline/Break\"}]. "
+    "For all-day events or deadlines you may omit start_time and end_time. Only output the JSON array."
+)
+
+
+async def _parse_syllabus_chunk(index: int, chunk: str, total: int) -> List[Dict[str, Any]]:
+    prompt = SYLLABUS_PROMPT
+    if total > 1:
+        prompt += (
+            f" This text is part {index + 1} of {total} of the document; extract only the events "
+            "it contains."
+        )
     try:
-        response = await _ensure_model().generate_content_async(
-            _content_blocks(prompt, pdf_text),
+        response_text = await llm_gateway.generate(
+            GEMINI_MODEL,
+            _content_blocks(prompt, chunk),
             generation_config=JSON_GENERATION_CONFIG,
             safety_settings=SAFETY_SETTINGS,
+            task="parse_syllabus",
         )
-        cleaned = _clean_json_text(response.text)
-        data = json.loads(cleaned)
-        if isinstance(data, list):
-            return data
+        salvaged = _salvage(response_text, f"parse_syllabus chunk {index + 1}/{total}")
+        return [event for event in salvaged.items if isinstance(event, dict)]
     except Exception as exc:
-        print(f"Planner parse_syllabus error: {exc}")
+        print(f"Planner parse_syllabus error (chunk {index + 1}/{total}): {exc}")
     return []
 
 
+def _merge_syllabus_events(parts: List[List[Dict[str, Any]]]) -> List[Dict[str, Any]]:
+    """Concatenate per-chunk events, dropping duplicates seen on chunk boundaries"""
+    merged: Dict[Tuple[str, str, str], Dict[str, Any]] = {}
+    for events in parts:
+        for event in events:
+            key = (
+                str(event.get("date") or ""),
+                str(event.get("start_time") or ""),
+                " ".join(str(event.get("summary") or "").lower().split()),
+            )
+            existing = merged.get(key)
+            if existing is None:
+                merged[key] = event
+            else:
+                # Keep the more complete record
+                for field, value in event.items():
+                    if value and not existing.get(field):
+                        existing[field] = value
+    return sorted(merged.values(), key=lambda e: (str(e.get("date") or ""), str(e.get("start_time") or "")))
+
+
+@timed("parse_syllabus")
+async def parse_syllabus(pdf_text: str, *, pages: Optional[List[str]] = None) -> List[Dict[str, Any]]:
+    """
+    Extract dated events from syllabus text. Long documents are split on page or
+    section boundaries, parsed concurrently and merged, so no single generation
+    has to cover the whole syllabus.
+    """
+    chunks = text_chunker.chunk_pages(pages) if pages else text_chunker.chunk_text(pdf_text)
+    if not chunks:
+        return []
+    if len(chunks) == 1:
+        return await _parse_syllabus_chunk(0, chunks[0], 1)
+    parts = await text_chunker.map_chunks(
+        chunks, lambda index, chunk: _parse_syllabus_chunk(index, chunk, len(chunks))
+    )
+    return _merge_syllabus_events(parts)
+
+
+@timed("analyze_goals")
 async def analyze_goals(description: str) -> str:
     prompt = (
         "You are a helpful scheduling assistant. Receive a user's description of their weekly goals "
@@ -96,17 +137,20 @@ async def analyze_goals(description: str) -> str:
         "(specific time blocks or rules). Keep the response concise."
     )
     try:
-        response = await _ensure_model().generate_content_async(
+        response_text = await llm_gateway.generate(
+            GEMINI_MODEL,
             _content_blocks(prompt, description),
             generation_config=TEXT_GENERATION_CONFIG,
             safety_settings=SAFETY_SETTINGS,
+            task="analyze_goals",
         )
-        return response.text.strip()
+        return response_text.strip()
     except Exception as exc:
         print(f"Planner analyze_goals error: {exc}")
         return ""
 
 
+@timed("analyze_feedback")
 async def analyze_feedback(feedback: str) -> str:
     prompt = (
         "You previously proposed a schedule to a student. They now provided feedback explaining what "
@@ -114,24 +158,26 @@ async def analyze_feedback(feedback: str) -> str:
         "NEW CONSTRAINTS: followed by a numbered list."
     )
     try:
-        response = await _ensure_model().generate_content_async(
+        response_text = await llm_gateway.generate(
+            GEMINI_MODEL,
             _content_blocks(prompt, feedback),
             generation_config=TEXT_GENERATION_CONFIG,
             safety_settings=SAFETY_SETTINGS,
+            task="analyze_feedback",
         )
-        return response.text.strip()
+        return response_text.strip()
     except Exception as exc:
         print(f"Planner analyze_feedback error: {exc}")
         return ""
 
 
-async def generate_schedule(
+def _schedule_prompts(
     goals: str,
     fixed_schedule: List[Dict[str, Any]],
-    *,
     feedback_constraints: Optional[str] = None,
     previous_schedule: Optional[List[Dict[str, Any]]] = None,
-) -> Dict[str, Any]:
+) -> Tuple[str, str, bool]:
+    """System prompt, user prompt and whether this is a refinement (JSON object) request"""
     fixed_json = json.dumps(fixed_schedule, ensure_ascii=False, indent=2)
     if feedback_constraints and previous_schedule:
         previous_json = json.dumps(previous_schedule, ensure_ascii=False, indent=2)
@@ -147,22 +193,7 @@ async def generate_schedule(
             f"AOT_FEEDBACK (New rules you MUST follow):\n{feedback_constraints}\n\n"
             "Generate the JSON object now."
         )
-        try:
-            response = await _ensure_model().generate_content_async(
-                _content_blocks(prompt, user_prompt),
-                generation_config=JSON_GENERATION_CONFIG,
-                safety_settings=SAFETY_SETTINGS,
-            )
-            cleaned = _clean_json_text(response.text)
-            payload = json.loads(cleaned)
-            schedule = payload.get("schedule", [])
-            reasoning = payload.get("reasoning")
-            if not isinstance(schedule, list):
-                schedule = []
-            return {"schedule": schedule, "reasoning": reasoning}
-        except Exception as exc:
-            print(f"Planner generate_schedule refinement error: {exc}")
-            return {"schedule": [], "reasoning": "Failed to generate revised schedule."}
+        return prompt, user_prompt, True
 
     prompt = (
         "You are a meticulous scheduling assistant. Generate a weekly timetable that obeys all goals "
@@ -174,75 +205,300 @@ async def generate_schedule(
         f"AOT_GOALS (Must Fulfill):\n{goals}\n\n"
         "Generate the JSON schedule now."
     )
+    return prompt, user_prompt, False
+
+
+@timed("generate_schedule")
+async def generate_schedule(
+    goals: str,
+    fixed_schedule: List[Dict[str, Any]],
+    *,
+    feedback_constraints: Optional[str] = None,
+    previous_schedule: Optional[List[Dict[str, Any]]] = None,
+) -> Dict[str, Any]:
+    prompt, user_prompt, refinement = _schedule_prompts(
+        goals, fixed_schedule, feedback_constraints, previous_schedule
+    )
+    if refinement:
+        try:
+            response_text = await llm_gateway.generate(
+                GEMINI_MODEL,
+                _content_blocks(prompt, user_prompt),
+                generation_config=JSON_GENERATION_CONFIG,
+                safety_settings=SAFETY_SETTINGS,
+                task="refine_schedule",
+            )
+            try:
+                payload = json.loads(_clean_json_text(response_text))
+            except ValueError:
+                payload = None
+            if isinstance(payload, dict):
+                schedule = payload.get("schedule", [])
+                if not isinstance(schedule, list):
+                    schedule = []
+                return {"schedule": schedule, "reasoning": payload.get("reasoning")}
+            # Broken or truncated payload: keep every complete schedule item
+            salvaged = _salvage(response_text, "generate_schedule refinement")
+            return {
+                "schedule": salvaged.items,
+                "reasoning": extract_reasoning(response_text),
+                "salvage": salvaged.report,
+            }
+        except Exception as exc:
+            print(f"Planner generate_schedule refinement error: {exc}")
+            return {"schedule": [], "reasoning": "Failed to generate revised schedule."}
+
     try:
-        response = await _ensure_model().generate_content_async(
+        response_text = await llm_gateway.generate(
+            GEMINI_MODEL,
             _content_blocks(prompt, user_prompt),
             generation_config=JSON_GENERATION_CONFIG,
             safety_settings=SAFETY_SETTINGS,
+            task="generate_schedule",
         )
-        cleaned = _clean_json_text(response.text)
-        schedule = json.loads(cleaned)
-        if not isinstance(schedule, list):
-            schedule = []
-        return {"schedule": schedule, "reasoning": None}
+        salvaged = _salvage(response_text, "generate_schedule")
+        result: Dict[str, Any] = {"schedule": salvaged.items, "reasoning": None}
+        if salvaged.report.repaired or not salvaged.report.lossless:
+            result["salvage"] = salvaged.report
+        return result
     except Exception as exc:
         print(f"Planner generate_schedule error: {exc}")
         return {"schedule": [], "reasoning": "Failed to generate schedule."}
 
 
-def create_ics(schedule: List[Dict[str, Any]], fixed_schedule: List[Dict[str, Any]], timezone: str = "America/New_York") -> str:
-    lines = [
-        "BEGIN:VCALENDAR",
-        "VERSION:2.0",
-        "PRODID:-//Aura Planner//EN",
-        f"X-WR-TIMEZONE:{timezone}",
-    ]
+@timed("extract_task_demands")
+async def extract_task_demands(goals: str, feedback_constraints: Optional[str] = None) -> List[Dict[str, Any]]:
+    """Ask the model to turn free-text goals into structured time demands for the local solver"""
+    prompt = (
+        "You convert a student's weekly goals into scheduling demands. Return only a JSON array matching "
+        "the schema [{\"task\":\"Description\",\"category\":\"Study/Project/Personal\",\"total_minutes\":300,"
+        "\"session_minutes\":60,\"deadline\":\"YYYY-MM-DD or null\",\"earliest_time\":\"HH:MM or null\","
+        "\"latest_time\":\"HH:MM or null\"}]. total_minutes is the weekly time the goal needs, session_minutes "
+        "the length of one sitting. Use earliest_time/latest_time only for explicit time-of-day rules."
+    )
+    user_prompt = f"GOALS:\n{goals}"
+    if feedback_constraints:
+        user_prompt += f"\n\nADDITIONAL CONSTRAINTS:\n{feedback_constraints}"
+    try:
+        response_text = await llm_gateway.generate(
+            GEMINI_MODEL,
+            _content_blocks(prompt, user_prompt),
+            generation_config=JSON_GENERATION_CONFIG,
+            safety_settings=SAFETY_SETTINGS,
+            task="extract_task_demands",
+        )
+        salvaged = _salvage(response_text, "extract_task_demands")
+        return [item for item in salvaged.items if isinstance(item, dict)]
+    except Exception as exc:
+        print(f"Planner extract_task_demands error: {exc}")
+    return []
 
-    def _format_dt(date_str: str, time_str: Optional[str] = None) -> str:
-        if not time_str:
-            return date_str.replace("-", "")
-        return f"{date_str.replace('-', '')}T{time_str.replace(':', '')}00"
 
-    def _event_uid(prefix: str, index: int) -> str:
-        return f"{prefix}-{index}-{int(datetime.utcnow().timestamp())}"
+@timed("solve_schedule")
+async def solve_schedule(
+    goals: str,
+    fixed_schedule: List[Dict[str, Any]],
+    *,
+    feedback_constraints: Optional[str] = None,
+    start_date: Optional[date] = None,
+    days: int = 7,
+    daily_cap_minutes: int = schedule_solver.DEFAULT_DAILY_CAP_MINUTES,
+) -> Dict[str, Any]:
+    """
+    Fast path for generate_schedule: one small LLM call extracts task demands,
+    then the local solver places them without overlaps.
+    """
+    demands = schedule_solver.parse_demands(await extract_task_demands(goals, feedback_constraints))
+    if not demands:
+        return {"schedule": [], "reasoning": "Could not derive any tasks from the goals."}
+    # CPU-bound; keep it off the event loop
+    result = await asyncio.to_thread(
+        schedule_solver.solve,
+        demands,
+        fixed_schedule,
+        start_date=start_date,
+        days=days,
+        daily_cap_minutes=daily_cap_minutes,
+    )
+    reasoning = f"Placed {len(result.schedule)} sessions for {len(demands)} goals around the fixed schedule."
+    if result.unplaced:
+        missing = ", ".join(f"{u.task} ({u.minutes}m: {u.reason})" for u in result.unplaced)
+        reasoning += f" Could not place: {missing}."
+    return {"schedule": result.schedule, "reasoning": reasoning, "unplaced": [u.model_dump() for u in result.unplaced]}
+
+
+async def stream_schedule(
+    goals: str,
+    fixed_schedule: List[Dict[str, Any]],
+    *,
+    feedback_constraints: Optional[str] = None,
+    previous_schedule: Optional[List[Dict[str, Any]]] = None,
+) -> AsyncIterator[str]:
+    """
+    Same request as generate_schedule, but yields the raw response text as the
+    model produces it. Errors propagate to the caller.
+    """
+    prompt, user_prompt, _ = _schedule_prompts(
+        goals, fixed_schedule, feedback_constraints, previous_schedule
+    )
+    async for text in llm_gateway.stream(
+        GEMINI_MODEL,
+        _content_blocks(prompt, user_prompt),
+        generation_config=JSON_GENERATION_CONFIG,
+        safety_settings=SAFETY_SETTINGS,
+        task="stream_schedule",
+    ):
+        yield text
+
+
+def extract_reasoning(response_text: str) -> Optional[str]:
+    """The reasoning field of a complete refinement response, if present"""
+    try:
+        payload = json.loads(_clean_json_text(response_text))
+    except ValueError:
+        return None
+    if isinstance(payload, dict) and isinstance(payload.get("reasoning"), str):
+        return payload["reasoning"]
+    return None
 
-    for idx, item in enumerate(schedule):
+
+@timed("create_ics")
+def create_ics(
+    schedule: List[Dict[str, Any]],
+    fixed_schedule: List[Dict[str, Any]],
+    timezone: str = "America/New_York",
+    recurring_events: Optional[List[CalendarEvent]] = None,
+    term_start: Optional[date] = None,
+    term_end: Optional[date] = None,
+) -> str:
+    """
+    ICS text for a schedule, its fixed events and any recurring classes.
+    Repeating items are collapsed into RRULE series (see ics_export).
+    """
+    return ics_export.build_ics(schedule, fixed_schedule, timezone, recurring_events, term_start, term_end)
+
+
+@timed("build_sync_payloads")
+def build_sync_payloads(
+    schedule: List[Dict[str, Any]],
+    fixed_schedule: List[Dict[str, Any]],
+    timezone: str = "America/New_York",
+    recurring_events: Optional[List[CalendarEvent]] = None,
+    term_start: Optional[date] = None,
+    term_end: Optional[date] = None,
+) -> Tuple[Dict[str, Dict[str, Any]], List[str], List[str]]:
+    """
+    Build Google Calendar event bodies keyed by their stable sync key.
+    Returns (payloads, errors, failed_keys); identical events collapse onto one
+    key. failed_keys are items whose body could not be built, so a sync must
+    not treat them as removed. Recurring classes become one weekly event each,
+    ending with the term.
+    """
+    payloads: Dict[str, Dict[str, Any]] = {}
+    errors: List[str] = []
+    failed_keys: List[str] = []
+
+    for item in schedule:
         date = item.get("Date")
-        start_time = item.get("Start_Time")
-        end_time = item.get("End_Time")
-        task = item.get("Task", "Scheduled Task")
-        category = item.get("Category")
-        if not date or not start_time or not end_time:
+        task = item.get("Task")
+        if not date or not task:
+            print(f"Skipping invalid schedule item: {item}")
+            continue
+        key = None
+        try:
+            key = event_key(date, item.get("Start_Time"), task, item.get("Category"))
+            payloads[key] = build_event_payload(
+                task,
+                f"Category: {item.get('Category') or 'General'}\nDay: {item.get('Day') or ''}",
+                date,
+                item.get("Start_Time"),
+                item.get("End_Time"),
+                timezone,
+            )
+        except Exception as exc:
+            error_msg = f"Error processing '{task}': {exc}"
+            print(error_msg)
+            errors.append(error_msg)
+            if key is not None:
+                failed_keys.append(key)
+
+    for event in fixed_schedule:
+        date = event.get("date")
+        summary = event.get("summary")
+        if not date or not summary:
+            print(f"Skipping invalid fixed event: {event}")
+            continue
+        key = None
+        try:
+            key = event_key(date, event.get("start_time"), summary, event.get("type"))
+            payloads[key] = build_event_payload(
+                summary,
+                f"Type: {event.get('type') or 'Fixed Event'}\nDay: {event.get('day') or ''}",
+                date,
+                event.get("start_time"),
+                event.get("end_time"),
+                timezone,
+            )
+        except Exception as exc:
+            error_msg = f"Error processing '{summary}': {exc}"
+            print(error_msg)
+            errors.append(error_msg)
+            if key is not None:
+                failed_keys.append(key)
+
+    if recurring_events:
+        _add_recurring_payloads(payloads, errors, failed_keys, schedule, recurring_events,
+                                term_start, term_end, timezone)
+
+    return payloads, errors, failed_keys
+
+
+def _add_recurring_payloads(
+    payloads: Dict[str, Dict[str, Any]],
+    errors: List[str],
+    failed_keys: List[str],
+    schedule: List[Dict[str, Any]],
+    recurring_events: List[CalendarEvent],
+    term_start: Optional[date],
+    term_end: Optional[date],
+    timezone: str,
+):
+    """One weekly Google event per recurring class, ending with the term"""
+    classes = ics_export.recurring_classes(recurring_events)
+    if not classes:
+        return
+    dated = []
+    for item in schedule:
+        try:
+            dated.append(date.fromisoformat(item.get("Date") or ""))
+        except ValueError:
             continue
-        summary = f"[{category}] {task}" if category else task
-        lines.extend([
-            "BEGIN:VEVENT",
-            f"UID:{_event_uid('dynamic', idx)}",
-            f"SUMMARY:{summary}",
-            f"DTSTART;TZID={timezone}:{_format_dt(date, start_time)}",
-            f"DTEND;TZID={timezone}:{_format_dt(date, end_time)}",
-            "END:VEVENT",
-        ])
-
-    for idx, item in enumerate(fixed_schedule):
-        date = item.get("date")
-        start_time = item.get("start_time")
-        end_time = item.get("end_time")
-        summary = item.get("summary", "Fixed Event")
-        if not date:
+    term_start, term_end = ics_export.resolve_term(term_start, term_end, dated)
+
+    for event in classes:
+        dates = ics_export.class_dates(event, term_start, term_end)
+        if not dates:
             continue
-        lines.append("BEGIN:VEVENT")
-        lines.append(f"UID:{_event_uid('fixed', idx)}")
-        lines.append(f"SUMMARY:{summary}")
-        if start_time and end_time:
-            lines.append(f"DTSTART;TZID={timezone}:{_format_dt(date, start_time)}")
-            lines.append(f"DTEND;TZID={timezone}:{_format_dt(date, end_time)}")
-        else:
-            start_dt = datetime.strptime(date, "%Y-%m-%d")
-            end_dt = start_dt + timedelta(days=1)
-            lines.append(f"DTSTART;VALUE=DATE:{start_dt.strftime('%Y%m%d')}")
-            lines.append(f"DTEND;VALUE=DATE:{end_dt.strftime('%Y%m%d')}")
-        lines.append("END:VEVENT")
-
-    lines.append("END:VCALENDAR")
-    return "\r\n".join(lines)
+        start_time = event.startTime.strftime("%H:%M")
+        days = sorted(set(event.daysOfWeek))
+        key = None
+        try:
+            # Identity is the class (title, time, weekdays) only: the term depends on the
+            # dates being synced, and a moved start or end patches the same series
+            key = event_key("", start_time, event.title, "class:" + ",".join(str(d) for d in days))
+            payloads[key] = build_recurring_payload(
+                event.title,
+                "Type: Class",
+                dates[0].isoformat(),
+                start_time,
+                event.endTime.strftime("%H:%M"),
+                days,
+                term_end,
+                timezone,
+            )
+        except Exception as exc:
+            error_msg = f"Error processing '{event.title}': {exc}"
+            print(error_msg)
+            errors.append(error_msg)
+            if key is not None:
+                failed_keys.append(key)
@@ -0,0 +1,209 @@
+"""
+Deterministic Schedule Solver
+Local fast path for planner schedule generation. The LLM only turns the
+student's goals into structured task demands; this module places them into the
+free time around the fixed schedule with hard guarantees: no overlaps, every
+session ends before its task's deadline, and no day exceeds the daily cap.
+
+Free time is computed with the same busy-block helpers as agent3_scheduler.
+"""
+from datetime import date, datetime, time, timedelta
+from typing import Any, Dict, List, Optional, Tuple
+
+from pydantic import BaseModel, Field, ValidationError
+
+from .agent3_scheduler import build_free_slots, merge_busy_blocks
+
+DAY_START = time(8, 0)
+DAY_END = time(22, 0)
+DEFAULT_DAILY_CAP_MINUTES = 240
+MIN_SESSION_MINUTES = 15
+
+
+class TaskDemand(BaseModel):
+    """One goal expressed as an amount of time to schedule"""
+    task: str
+    category: Optional[str] = "Study"
+    total_minutes: int = Field(..., gt=0)
+    session_minutes: int = Field(60, gt=0)
+    deadline: Optional[date] = None
+    earliest_time: Optional[time] = None
+    latest_time: Optional[time] = None
+
+
+class UnplacedSession(BaseModel):
+    task: str
+    minutes: int
+    reason: str
+
+
+class SolverResult(BaseModel):
+    schedule: List[Dict[str, Any]] = []
+    unplaced: List[UnplacedSession] = []
+
+
+def parse_demands(raw: List[Dict[str, Any]]) -> List[TaskDemand]:
+    """Validate LLM-produced demands, skipping malformed entries"""
+    demands: List[TaskDemand] = []
+    for item in raw:
+        try:
+            demands.append(TaskDemand.model_validate(item))
+        except ValidationError as exc:
+            print(f"Skipping invalid task demand {item}: {exc}")
+    return demands
+
+
+def _parse_time(value: Optional[str], default: time) -> time:
+    if not value:
+        return default
+    for fmt in ("%H:%M", "%H:%M:%S"):
+        try:
+            return datetime.strptime(value, fmt).time()
+        except ValueError:
+            continue
+    return default
+
+
+def _busy_blocks(fixed_schedule: List[Dict[str, Any]]) -> List[Dict]:
+    """Timed fixed events become busy blocks; all-day entries (deadlines, breaks) do not block time"""
+    blocks: List[Dict] = []
+    for event in fixed_schedule:
+        if not event.get("date") or not event.get("start_time") or not event.get("end_time"):
+            continue
+        try:
+            day = datetime.strptime(event["date"], "%Y-%m-%d").date()
+        except ValueError:
+            continue
+        start = datetime.combine(day, _parse_time(event["start_time"], DAY_START))
+        end = datetime.combine(day, _parse_time(event["end_time"], DAY_END))
+        if end <= start:
+            end += timedelta(days=1)
+        blocks.append({"start": start, "end": end})
+    return merge_busy_blocks(blocks)
+
+
+def _session_lengths(demand: TaskDemand, total_minutes: int) -> List[int]:
+    size = max(MIN_SESSION_MINUTES, min(demand.session_minutes, total_minutes))
+    sessions: List[int] = []
+    remaining = total_minutes
+    while remaining > 0:
+        this_session = min(size, remaining)
+        sessions.append(this_session)
+        remaining -= this_session
+    return sessions
+
+
+def _find_slot(slots: List[Dict], minutes: int, earliest: datetime, latest: datetime) -> Optional[Tuple[int, datetime]]:
+    """First slot (index, start) that fits `minutes` inside [earliest, latest]"""
+    length = timedelta(minutes=minutes)
+    for i, slot in enumerate(slots):
+        start = max(slot["start"], earliest)
+        if start + length <= min(slot["end"], latest):
+            return i, start
+    return None
+
+
+def _reserve(slots: List[Dict], index: int, start: datetime, end: datetime):
+    """Remove [start, end) from slot `index`, splitting it when the range is in the middle"""
+    slot = slots[index]
+    pieces = []
+    if slot["start"] < start:
+        pieces.append({"start": slot["start"], "end": start})
+    if end < slot["end"]:
+        pieces.append({"start": end, "end": slot["end"]})
+    slots[index:index + 1] = pieces
+
+
+def solve(
+    demands: List[TaskDemand],
+    fixed_schedule: List[Dict[str, Any]],
+    *,
+    start_date: Optional[date] = None,
+    days: int = 7,
+    daily_cap_minutes: int = DEFAULT_DAILY_CAP_MINUTES,
+    day_start: time = DAY_START,
+    day_end: time = DAY_END,
+) -> SolverResult:
+    """
+    Place every demand's sessions into free time, earliest deadline first.
+    Sessions of one task are spread out (one per day) before any day gets a
+    second session of the same task. Anything that cannot be placed is reported.
+    A demand larger than the whole horizon can hold is cut to that size first,
+    so an oversized LLM estimate cannot blow up the session count.
+    """
+    start_date = start_date or date.today()
+    horizon = [start_date + timedelta(days=i) for i in range(days)]
+    busy = _busy_blocks(fixed_schedule)
+    window = datetime.combine(start_date, day_end) - datetime.combine(start_date, day_start)
+    window_minutes = max(0, int(window.total_seconds()) // 60)
+    horizon_minutes = days * min(daily_cap_minutes, window_minutes)
+
+    free_by_day: Dict[date, List[Dict]] = {
+        day: build_free_slots(busy, datetime.combine(day, day_start), datetime.combine(day, day_end))
+        for day in horizon
+    }
+    used_minutes: Dict[date, int] = {day: 0 for day in horizon}
+    result = SolverResult()
+
+    # Earliest deadline first; ties keep the order the goals were given in
+    ordered = sorted(enumerate(demands), key=lambda pair: (pair[1].deadline or date.max, pair[0]))
+    for _, demand in ordered:
+        total_minutes = min(demand.total_minutes, horizon_minutes)
+        if demand.total_minutes > total_minutes:
+            result.unplaced.append(UnplacedSession(
+                task=demand.task,
+                minutes=demand.total_minutes - total_minutes,
+                reason="more time than the whole horizon holds",
+            ))
+        pending = _session_lengths(demand, total_minutes) if total_minutes > 0 else []
+        days_for_task = [d for d in horizon if not demand.deadline or d <= demand.deadline]
+        per_day: Dict[date, int] = {}
+
+        # Pass 1 allows one session per day; later passes allow more
+        for max_sessions_per_day in range(1, len(pending) + 1):
+            if not pending:
+                break
+            still_pending: List[int] = []
+            # Raising the per-day limit only helps if some day was held back by it
+            held_back = False
+            for minutes in pending:
+                placed = False
+                for day in days_for_task:
+                    if per_day.get(day, 0) >= max_sessions_per_day:
+                        held_back = True
+                        continue
+                    if used_minutes[day] + minutes > daily_cap_minutes:
+                        continue
+                    earliest = datetime.combine(day, max(day_start, demand.earliest_time or day_start))
+                    latest = datetime.combine(day, min(day_end, demand.latest_time or day_end))
+                    found = _find_slot(free_by_day[day], minutes, earliest, latest)
+                    if not found:
+                        continue
+                    index, slot_start = found
+                    slot_end = slot_start + timedelta(minutes=minutes)
+                    _reserve(free_by_day[day], index, slot_start, slot_end)
+                    used_minutes[day] += minutes
+                    per_day[day] = per_day.get(day, 0) + 1
+                    result.schedule.append({
+                        "Day": day.strftime("%A"),
+                        "Date": day.isoformat(),
+                        "Start_Time": slot_start.strftime("%H:%M"),
+                        "End_Time": slot_end.strftime("%H:%M"),
+                        "Task": demand.task,
+                        "Category": demand.category,
+                    })
+                    placed = True
+                    break
+                if not placed:
+                    still_pending.append(minutes)
+            progressed = len(still_pending) < len(pending)
+            pending = still_pending
+            if not progressed and not held_back:
+                break
+
+        for minutes in pending:
+            reason = "no free slot before deadline" if demand.deadline else "no free slot within daily cap"
+            result.unplaced.append(UnplacedSession(task=demand.task, minutes=minutes, reason=reason))
+
+    result.schedule.sort(key=lambda item: (item["Date"], item["Start_Time"]))
+    return result
@@ -0,0 +1,144 @@
+"""
+Stored Schedules
+Keeps exported schedules server-side under an id so calendar clients can
+subscribe to a feed URL instead of the client re-uploading the schedule.
+
+Each schedule is one JSON file in AURA_SCHEDULE_DIR (default .aura_schedules/).
+Its ETag is a hash of the content (and the ICS format version), and
+updated_at only moves when the content actually changes, so feed polls can be
+answered with 304 Not Modified. The term of recurring classes is resolved
+when saving, so the rendered feed never depends on the day it is fetched.
+"""
+import hashlib
+import json
+import os
+import re
+import threading
+import uuid
+from datetime import date, datetime, timezone
+from typing import Any, Dict, List, Optional
+
+from pydantic import BaseModel
+
+from ..models import CalendarEvent
+from . import ics_export
+
+DEFAULT_SCHEDULE_DIR = os.getenv('AURA_SCHEDULE_DIR', '.aura_schedules')
+# Bump when ics_export output changes so subscribed clients refetch
+ICS_FORMAT_VERSION = 1
+
+_ID_PATTERN = re.compile(r'^[0-9a-f]{32}$')
+
+
+class ScheduleContent(BaseModel):
+    schedule: List[Dict[str, Any]] = []
+    fixed_schedule: List[Dict[str, Any]] = []
+    recurring_events: List[CalendarEvent] = []
+    term_start: Optional[date] = None
+    term_end: Optional[date] = None
+    timezone: str = "America/New_York"
+
+
+class StoredSchedule(ScheduleContent):
+    id: str
+    etag: str
+    created_at: datetime
+    updated_at: datetime
+
+
+def content_etag(content: ScheduleContent) -> str:
+    """Quoted strong ETag for the ICS rendering of this content"""
+    payload = content.model_dump(mode='json', include=set(ScheduleContent.model_fields))
+    canonical = json.dumps([ICS_FORMAT_VERSION, payload], sort_keys=True, ensure_ascii=False, separators=(',', ':'))
+    return f'"{hashlib.sha256(canonical.encode("utf-8")).hexdigest()[:32]}"'
+
+
+def _now() -> datetime:
+    # HTTP dates have second resolution
+    return datetime.now(timezone.utc).replace(microsecond=0)
+
+
+class ScheduleStore:
+    """Directory of schedule JSON files with an in-memory read cache"""
+
+    def __init__(self, directory: str = DEFAULT_SCHEDULE_DIR):
+        self.directory = directory
+        self._lock = threading.Lock()
+        self._cache: Dict[str, StoredSchedule] = {}
+
+    def _path(self, schedule_id: str) -> str:
+        return os.path.join(self.directory, f"{schedule_id}.json")
+
+    def get(self, schedule_id: str) -> Optional[StoredSchedule]:
+        if not _ID_PATTERN.match(schedule_id):
+            return None
+        with self._lock:
+            cached = self._cache.get(schedule_id)
+            if cached is not None:
+                return cached
+            try:
+                with open(self._path(schedule_id), 'r', encoding='utf-8') as fh:
+                    stored = StoredSchedule.model_validate_json(fh.read())
+            except FileNotFoundError:
+                return None
+            except (OSError, ValueError) as e:
+                print(f"Could not read stored schedule {schedule_id}: {e}")
+                return None
+            self._cache[schedule_id] = stored
+            return stored
+
+    def save(self, content: ScheduleContent, schedule_id: Optional[str] = None) -> Optional[StoredSchedule]:
+        """
+        Create a schedule (no id) or replace an existing one. Saving identical
+        content keeps the ETag and updated_at. Returns None for an unknown id.
+        """
+        term_start, term_end = ics_export.schedule_term(
+            content.schedule, content.fixed_schedule, content.recurring_events,
+            content.term_start, content.term_end,
+        )
+        content = content.model_copy(update={"term_start": term_start, "term_end": term_end})
+        existing = None
+        if schedule_id is not None:
+            existing = self.get(schedule_id)
+            if existing is None:
+                return None
+        etag = content_etag(content)
+        if existing is not None and existing.etag == etag:
+            return existing
+
+        now = _now()
+        stored = StoredSchedule(
+            **content.model_dump(),
+            id=schedule_id or uuid.uuid4().hex,
+            etag=etag,
+            created_at=existing.created_at if existing else now,
+            updated_at=now,
+        )
+        with self._lock:
+            self._write(stored)
+            self._cache[stored.id] = stored
+        return stored
+
+    def delete(self, schedule_id: str) -> bool:
+        if not _ID_PATTERN.match(schedule_id):
+            return False
+        with self._lock:
+            self._cache.pop(schedule_id, None)
+            try:
+                os.remove(self._path(schedule_id))
+                return True
+            except FileNotFoundError:
+                return False
+
+    def _write(self, stored: StoredSchedule):
+        # Write to a temp file first so a crash never leaves a half-written schedule
+        os.makedirs(self.directory, exist_ok=True)
+        path = self._path(stored.id)
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as fh:
+            fh.write(stored.model_dump_json())
+        os.replace(tmp_path, path)
+
+
+# Global instance
+schedule_store = ScheduleStore()
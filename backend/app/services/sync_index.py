@@ -0,0 +1,130 @@
+"""
+Google Calendar Sync Index
+Keeps a local record of every event pushed to Google Calendar so a re-sync only
+sends the inserts, patches and deletes that are actually needed.
+
+Each event is identified by a stable key built from (date, start time, summary,
+category) and stored with its Google event id and a hash of the payload that was
+sent. The index is a small JSON file, grouped by calendar id.
+"""
+import hashlib
+import json
+import os
+import threading
+from typing import Dict, Iterable, List, Optional
+
+from pydantic import BaseModel
+
+DEFAULT_INDEX_PATH = os.getenv('AURA_SYNC_INDEX_PATH', '.aura_sync_index.json')
+
+
+class IndexEntry(BaseModel):
+    event_id: str
+    content_hash: str
+
+
+class SyncOperation(BaseModel):
+    key: str
+    event_id: Optional[str] = None
+    payload: Optional[dict] = None
+
+
+class SyncPlan(BaseModel):
+    """The minimal set of calendar operations that brings Google in line with the request"""
+    inserts: List[SyncOperation] = []
+    patches: List[SyncOperation] = []
+    deletes: List[SyncOperation] = []
+    unchanged: int = 0
+
+
+def event_key(event_date: str, start_time: Optional[str], summary: str,
+              category: Optional[str] = None) -> str:
+    """Stable identity of an event, independent of its other details"""
+    parts = [
+        (event_date or '').strip(),
+        (start_time or '').strip(),
+        (summary or '').strip().lower(),
+        (category or '').strip().lower(),
+    ]
+    return hashlib.sha256('\x1f'.join(parts).encode('utf-8')).hexdigest()[:32]
+
+
+def content_hash(payload: dict) -> str:
+    """Fingerprint of the full event body sent to Google"""
+    canonical = json.dumps(payload, sort_keys=True, ensure_ascii=False, separators=(',', ':'))
+    return hashlib.sha256(canonical.encode('utf-8')).hexdigest()
+
+
+def plan_sync(desired: Dict[str, dict], existing: Dict[str, IndexEntry],
+              keep: Iterable[str] = ()) -> SyncPlan:
+    """
+    Diff the wanted events (key -> payload) against what the index says is on the
+    calendar. New keys are inserted, keys whose content changed are patched and
+    keys no longer wanted are deleted. Keys in `keep` (items whose payload could
+    not be built this time) are left on the calendar untouched.
+    """
+    keep = set(keep)
+    plan = SyncPlan()
+    for key, payload in desired.items():
+        entry = existing.get(key)
+        if entry is None:
+            plan.inserts.append(SyncOperation(key=key, payload=payload))
+        elif entry.content_hash != content_hash(payload):
+            plan.patches.append(SyncOperation(key=key, event_id=entry.event_id, payload=payload))
+        else:
+            plan.unchanged += 1
+    for key, entry in existing.items():
+        if key not in desired and key not in keep:
+            plan.deletes.append(SyncOperation(key=key, event_id=entry.event_id))
+    return plan
+
+
+class SyncIndex:
+    """JSON-file backed map of calendar_id -> {event key -> IndexEntry}"""
+
+    def __init__(self, path: str = DEFAULT_INDEX_PATH):
+        self.path = path
+        self._lock = threading.Lock()
+        self._data: Optional[Dict[str, Dict[str, dict]]] = None
+
+    def _load(self) -> Dict[str, Dict[str, dict]]:
+        if self._data is None:
+            try:
+                with open(self.path, 'r', encoding='utf-8') as fh:
+                    self._data = json.load(fh)
+            except FileNotFoundError:
+                self._data = {}
+            except (OSError, ValueError) as e:
+                print(f"Could not read sync index {self.path}, starting fresh: {e}")
+                self._data = {}
+        return self._data
+
+    def entries(self, calendar_id: str) -> Dict[str, IndexEntry]:
+        with self._lock:
+            raw = self._load().get(calendar_id, {})
+            return {key: IndexEntry(**value) for key, value in raw.items()}
+
+    def update(self, calendar_id: str, upserts: Dict[str, IndexEntry], removals: List[str]):
+        """Apply the outcome of a sync and persist the index"""
+        with self._lock:
+            data = self._load()
+            entries = data.setdefault(calendar_id, {})
+            for key, entry in upserts.items():
+                entries[key] = entry.model_dump()
+            for key in removals:
+                entries.pop(key, None)
+            self._save(data)
+
+    def _save(self, data: Dict[str, Dict[str, dict]]):
+        # Write to a temp file first so a crash never leaves a half-written index
+        tmp_path = f"{self.path}.tmp"
+        try:
+            with open(tmp_path, 'w', encoding='utf-8') as fh:
+                json.dump(data, fh)
+            os.replace(tmp_path, self.path)
+        except OSError as e:
+            print(f"Could not write sync index {self.path}: {e}")
+
+
+# Global instance
+sync_index = SyncIndex()
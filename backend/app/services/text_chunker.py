@@ -0,0 +1,87 @@
+"""
+Text Chunking
+Splits long document text into prompt-sized chunks on natural boundaries
+(pages first, then blank-line separated sections, then lines) and runs
+per-chunk coroutines concurrently under a limit. Used to map-reduce LLM
+parsing of documents that would not fit in a single generation.
+"""
+import asyncio
+import os
+import re
+from typing import Awaitable, Callable, List, Optional, TypeVar
+
+DEFAULT_CHUNK_CHARS = int(os.getenv('AURA_CHUNK_CHARS', '12000'))
+MAX_CONCURRENT_CHUNKS = int(os.getenv('AURA_CHUNK_CONCURRENCY', '4'))
+
+_SECTION_BREAK = re.compile(r'\n\s*\n')
+
+T = TypeVar('T')
+
+
+def _pack(units: List[str], max_chars: int, separator: str) -> List[str]:
+    """Greedily group consecutive units into chunks of at most max_chars"""
+    chunks: List[str] = []
+    current: List[str] = []
+    size = 0
+    for unit in units:
+        extra = len(unit) + (len(separator) if current else 0)
+        if current and size + extra > max_chars:
+            chunks.append(separator.join(current))
+            current, size = [], 0
+            extra = len(unit)
+        current.append(unit)
+        size += extra
+    if current:
+        chunks.append(separator.join(current))
+    return chunks
+
+
+def _split_oversized(text: str, max_chars: int) -> List[str]:
+    """Split a single unit that is too long: by lines, then by hard cuts"""
+    pieces: List[str] = []
+    for line in text.split('\n'):
+        if len(line) <= max_chars:
+            pieces.append(line)
+        else:
+            pieces.extend(line[i:i + max_chars] for i in range(0, len(line), max_chars))
+    return _pack(pieces, max_chars, '\n')
+
+
+def chunk_text(text: str, max_chars: int = DEFAULT_CHUNK_CHARS) -> List[str]:
+    """Split text on section boundaries (blank lines) into chunks of at most max_chars"""
+    if len(text) <= max_chars:
+        return [text] if text.strip() else []
+    units: List[str] = []
+    for section in _SECTION_BREAK.split(text):
+        if not section.strip():
+            continue
+        if len(section) > max_chars:
+            units.extend(_split_oversized(section, max_chars))
+        else:
+            units.append(section)
+    return _pack(units, max_chars, '\n\n')
+
+
+def chunk_pages(pages: List[str], max_chars: int = DEFAULT_CHUNK_CHARS) -> List[str]:
+    """Group whole pages into chunks; pages longer than max_chars are split by section"""
+    units: List[str] = []
+    for page in pages:
+        if not page.strip():
+            continue
+        if len(page) > max_chars:
+            units.extend(chunk_text(page, max_chars))
+        else:
+            units.append(page)
+    return _pack(units, max_chars, '\n')
+
+
+async def map_chunks(chunks: List[str], func: Callable[[int, str], Awaitable[T]],
+                     limit: Optional[int] = None) -> List[T]:
+    """Run func(index, chunk) for every chunk, at most `limit` at a time, keeping order"""
+    semaphore = asyncio.Semaphore(limit or MAX_CONCURRENT_CHUNKS)
+
+    async def run(index: int, chunk: str) -> T:
+        async with semaphore:
+            return await func(index, chunk)
+
+    return list(await asyncio.gather(*[run(i, chunk) for i, chunk in enumerate(chunks)]))
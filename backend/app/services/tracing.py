@@ -0,0 +1,285 @@
+"""
+Tracing
+Per-request span tracing. TracingMiddleware starts a trace for each request
+and keeps it in a context variable, so pipeline stages (metrics.stage /
+metrics.timed) and external calls (span) anywhere below the endpoint record
+into it, including concurrent tasks and worker threads started with
+asyncio.to_thread or a copied context.
+
+The finished trace is summarised in the Server-Timing response header (one
+entry per span name, so browser dev tools show where the time went). With
+AURA_TRACE_DEBUG_ENDPOINT=true the last AURA_TRACE_BUFFER traces are also kept
+in memory for GET /api/v1/debug/traces. Traces record the route template, never
+the raw path, so ids in URLs (e.g. stored schedule ids) are not exposed.
+
+    from .tracing import span
+
+    with span("google.batch_insert"):
+        ...
+
+Outside a request (scripts, benchmarks) there is no trace and span() does
+nothing. Set AURA_TRACING_ENABLED=false to turn tracing off entirely.
+"""
+import itertools
+import os
+import re
+import threading
+import time
+import uuid
+from collections import deque
+from contextvars import ContextVar
+from datetime import datetime, timezone
+from typing import Deque, Dict, List, Optional
+
+from pydantic import BaseModel
+
+ENABLED = os.getenv("AURA_TRACING_ENABLED", "true").strip().lower() not in ("0", "false", "no")
+TRACE_BUFFER_SIZE = int(os.getenv("AURA_TRACE_BUFFER", "200"))
+# Off by default: the debug endpoints are unauthenticated
+DEBUG_ENDPOINT = os.getenv("AURA_TRACE_DEBUG_ENDPOINT", "false").strip().lower() in ("1", "true", "yes")
+
+# Spans kept per trace; a huge sync stops recording rather than growing without bound
+MAX_SPANS = 1000
+# Server-Timing entries per response, slowest first
+MAX_TIMING_ENTRIES = 30
+# Paths that would only trace themselves
+UNTRACED_PREFIXES = ("/metrics", "/api/v1/debug")
+
+_TRACE_ID_PATTERN = re.compile(r"^[0-9a-f]{32}$")
+_TOKEN_UNSAFE = re.compile(r"[^A-Za-z0-9!#$%&'*+\-.^_`|~]")
+
+
+class SpanInfo(BaseModel):
+    span_id: int
+    parent_id: Optional[int] = None
+    name: str
+    start_ms: float
+    duration_ms: Optional[float] = None
+    error: Optional[str] = None
+
+
+class TraceSummary(BaseModel):
+    trace_id: str
+    method: str
+    route: Optional[str] = None
+    status: Optional[int] = None
+    started_at: datetime
+    duration_ms: Optional[float] = None
+    span_count: int
+
+
+class TraceDetail(TraceSummary):
+    spans: List[SpanInfo]
+    dropped_spans: int = 0
+
+
+class _Span:
+    __slots__ = ("span_id", "parent_id", "name", "started", "duration", "error")
+
+    def __init__(self, span_id: int, parent_id: Optional[int], name: str):
+        self.span_id = span_id
+        self.parent_id = parent_id
+        self.name = name
+        self.started = time.perf_counter()
+        self.duration: Optional[float] = None
+        self.error: Optional[str] = None
+
+
+class Trace:
+    """Spans of one request; times are perf_counter seconds"""
+
+    def __init__(self, method: str, trace_id: Optional[str] = None):
+        self.trace_id = trace_id or uuid.uuid4().hex
+        self.method = method
+        # Route template, set when the request finishes
+        self.route: Optional[str] = None
+        self.status: Optional[int] = None
+        self.started_at = datetime.now(timezone.utc)
+        self.started = time.perf_counter()
+        self.duration: Optional[float] = None
+        self.spans: List[_Span] = []
+        self.dropped_spans = 0
+        self._ids = itertools.count(1)
+
+    def open_span(self, name: str, parent_id: Optional[int]) -> Optional[_Span]:
+        if len(self.spans) >= MAX_SPANS:
+            self.dropped_spans += 1
+            return None
+        record = _Span(next(self._ids), parent_id, name)
+        # list.append is atomic, so spans may be opened from worker threads
+        self.spans.append(record)
+        return record
+
+    def finish(self, status: Optional[int], route: Optional[str]):
+        self.status = status
+        self.route = route
+        self.duration = time.perf_counter() - self.started
+
+    def server_timing(self) -> str:
+        """Server-Timing header value: finished spans totalled per name, plus the request so far"""
+        totals: Dict[str, List[float]] = {}
+        for record in list(self.spans):
+            if record.duration is not None:
+                entry = totals.setdefault(record.name, [0.0, 0])
+                entry[0] += record.duration
+                entry[1] += 1
+        slowest = sorted(totals.items(), key=lambda item: -item[1][0])[:MAX_TIMING_ENTRIES - 1]
+        parts = []
+        for name, (total, count) in slowest:
+            part = f"{_TOKEN_UNSAFE.sub('_', name)};dur={total * 1000:.1f}"
+            if count > 1:
+                part += f';desc="{count} calls"'
+            parts.append(part)
+        parts.append(f"total;dur={(time.perf_counter() - self.started) * 1000:.1f}")
+        return ", ".join(parts)
+
+    def summary(self) -> TraceSummary:
+        return TraceSummary(**self._summary_fields())
+
+    def detail(self) -> TraceDetail:
+        spans = [
+            SpanInfo(
+                span_id=record.span_id,
+                parent_id=record.parent_id,
+                name=record.name,
+                start_ms=round((record.started - self.started) * 1000, 3),
+                duration_ms=None if record.duration is None else round(record.duration * 1000, 3),
+                error=record.error,
+            )
+            for record in list(self.spans)
+        ]
+        return TraceDetail(**self._summary_fields(), spans=spans, dropped_spans=self.dropped_spans)
+
+    def _summary_fields(self) -> dict:
+        return {
+            "trace_id": self.trace_id,
+            "method": self.method,
+            "route": self.route,
+            "status": self.status,
+            "started_at": self.started_at,
+            "duration_ms": None if self.duration is None else round(self.duration * 1000, 3),
+            "span_count": len(self.spans),
+        }
+
+
+_current_trace: ContextVar[Optional[Trace]] = ContextVar("aura_trace", default=None)
+_current_span: ContextVar[Optional[int]] = ContextVar("aura_span", default=None)
+
+
+def current_trace() -> Optional[Trace]:
+    return _current_trace.get()
+
+
+class span:
+    """Record a block as a span of the current trace; a no-op outside one"""
+    __slots__ = ("name", "record", "token")
+
+    def __init__(self, name: str):
+        self.name = name
+        self.record: Optional[_Span] = None
+        self.token = None
+
+    def __enter__(self):
+        trace = _current_trace.get()
+        if trace is not None:
+            self.record = trace.open_span(self.name, _current_span.get())
+            if self.record is not None:
+                self.token = _current_span.set(self.record.span_id)
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        record = self.record
+        if record is not None:
+            record.duration = time.perf_counter() - record.started
+            if exc_type is not None:
+                record.error = exc_type.__name__
+            try:
+                _current_span.reset(self.token)
+            except ValueError:
+                # Exited in a different context (e.g. an async generator resumed elsewhere)
+                pass
+        return False
+
+
+class TraceBuffer:
+    """Ring buffer of the most recent finished traces"""
+
+    def __init__(self, size: int = TRACE_BUFFER_SIZE):
+        self._traces: Deque[Trace] = deque(maxlen=max(1, size))
+        self._lock = threading.Lock()
+
+    def add(self, trace: Trace):
+        with self._lock:
+            self._traces.append(trace)
+
+    def recent(self, limit: int = 50, min_duration_ms: float = 0.0) -> List[Trace]:
+        """Newest first"""
+        with self._lock:
+            traces = list(self._traces)
+        traces.reverse()
+        if min_duration_ms > 0:
+            traces = [t for t in traces if (t.duration or 0.0) * 1000 >= min_duration_ms]
+        return traces[:limit]
+
+    def get(self, trace_id: str) -> Optional[Trace]:
+        with self._lock:
+            for trace in self._traces:
+                if trace.trace_id == trace_id:
+                    return trace
+        return None
+
+    def clear(self):
+        with self._lock:
+            self._traces.clear()
+
+
+# Global instance
+trace_buffer = TraceBuffer()
+
+
+class TracingMiddleware:
+    """
+    ASGI middleware that runs each request under a new trace. A valid
+    incoming X-Trace-Id (32 hex characters) is reused so a client can match
+    its logs to the stored trace. Server-Timing and X-Trace-Id are added when
+    the response starts, so spans that finish while a streamed body is being
+    sent only show up in the stored trace.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not ENABLED or scope["path"].startswith(UNTRACED_PREFIXES):
+            await self.app(scope, receive, send)
+            return
+
+        incoming = None
+        for name, value in scope.get("headers", ()):
+            if name == b"x-trace-id":
+                incoming = value.decode("latin-1").strip().lower()
+                break
+        trace = Trace(scope["method"], incoming if incoming and _TRACE_ID_PATTERN.match(incoming) else None)
+        status = None
+
+        async def send_with_timing(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                headers = list(message.get("headers", ()))
+                headers.append((b"server-timing", trace.server_timing().encode("latin-1")))
+                headers.append((b"x-trace-id", trace.trace_id.encode("latin-1")))
+                message = {**message, "headers": headers}
+            await send(message)
+
+        trace_token = _current_trace.set(trace)
+        span_token = _current_span.set(None)
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            _current_span.reset(span_token)
+            _current_trace.reset(trace_token)
+            # The template only (/schedules/{schedule_id}.ics), never the raw path
+            trace.finish(status or 500, getattr(scope.get("route"), "path", "unmatched"))
+            if DEBUG_ENDPOINT:
+                trace_buffer.add(trace)
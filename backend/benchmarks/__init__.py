@@ -0,0 +1 @@
+"""Synthetic benchmarks for the upload -> schedule -> ICS pipeline (see run.py)"""
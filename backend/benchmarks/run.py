@@ -0,0 +1,274 @@
+"""
+Pipeline Benchmarks
+Times each stage of upload -> parse -> verify -> schedule -> ICS on synthetic
+inputs, and the whole pipeline end to end, with the offline stub LLM so no
+API key or network is needed.
+
+Usage (from backend/):
+    python -m benchmarks.run                          # small + medium
+    python -m benchmarks.run --sizes large --iterations 5 --output results.json
+    python -m benchmarks.run --compare baseline.json results.json --threshold 0.15
+
+Each stage reports p50/p95/mean latency (ms), throughput (runs/s) and peak
+Python heap (tracemalloc, measured in a separate pass so it does not skew the
+timings). tracemalloc only sees this process's Python allocations, so in the
+memory pass PDF extraction runs in-process (pdf_extractor.extract_pages_sync)
+instead of on the worker pool, and pdf_extraction also reports how far a fresh
+worker process's peak RSS grows while extracting (worker_rss_growth_kib, which
+includes PyMuPDF's native buffers; Unix only). --compare exits
+with status 1 when any stage's p50 got slower by more than the threshold.
+"""
+import os
+
+# Select the offline model before any app module builds the gateway
+os.environ.setdefault("AURA_LLM_PROVIDER", "stub")
+os.environ.setdefault("AURA_LLM_CACHE_SIZE", "0")
+
+import argparse
+import asyncio
+import json
+import platform
+import statistics
+import sys
+import time
+import tracemalloc
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timezone
+from typing import Any, Callable, Dict, List, Optional
+
+from app.services import agent1_ingestor, agent2_verifier, agent3_scheduler, document_extractor, pdf_extractor
+from app.services.planner_service import build_sync_payloads, create_ics
+
+from . import synthetic
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+DEFAULT_SIZES = ["small", "medium"]
+DEFAULT_ITERATIONS = 10
+TIMEZONE = "America/New_York"
+
+
+def _percentile(samples: List[float], pct: float) -> float:
+    ordered = sorted(samples)
+    index = min(len(ordered) - 1, max(0, round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+def measure(run: Callable[[], Any], iterations: int, warmup: int = 1,
+            memory_run: Optional[Callable[[], Any]] = None,
+            worker_memory: Optional[Callable[[], Optional[float]]] = None) -> Dict[str, float]:
+    """
+    Latency percentiles, throughput and peak traced memory for one stage.
+    memory_run replaces run for the memory pass when run's work happens in
+    other processes; worker_memory, if given, returns a worker's peak RSS growth in KiB.
+    """
+    for _ in range(warmup):
+        run()
+    samples = []
+    for _ in range(iterations):
+        started = time.perf_counter()
+        run()
+        samples.append((time.perf_counter() - started) * 1000)
+
+    tracemalloc.start()
+    try:
+        (memory_run or run)()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    mean = statistics.fmean(samples)
+    stats = {
+        "iterations": iterations,
+        "p50_ms": round(_percentile(samples, 50), 3),
+        "p95_ms": round(_percentile(samples, 95), 3),
+        "mean_ms": round(mean, 3),
+        "throughput_per_s": round(1000 / mean, 2) if mean else None,
+        "peak_memory_kib": round(peak / 1024, 1),
+    }
+    if worker_memory is not None:
+        rss = worker_memory()
+        if rss is not None:
+            stats["worker_rss_growth_kib"] = round(rss, 1)
+    return stats
+
+
+def _extract_and_report_rss(data: bytes) -> float:
+    """Runs in a fresh process: extract every page and return how much the peak RSS grew, in KiB"""
+    import pymupdf  # noqa: F401  (long-lived pool workers pay for the import once)
+    before = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    pdf_extractor.extract_pages_sync(data)
+    growth = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss - before
+    return growth / 1024 if sys.platform == "darwin" else growth  # macOS reports bytes
+
+
+def _pdf_worker_peak_rss(data: bytes) -> Optional[float]:
+    """
+    Peak RSS growth of a new single-use worker extracting `data`, as the PDF
+    pool's workers would. A forked worker starts at the parent's size, so the
+    growth rather than the peak is what extraction costs.
+    """
+    if resource is None:
+        return None
+    with ProcessPoolExecutor(max_workers=1) as pool:
+        return pool.submit(_extract_and_report_rss, data).result()
+
+
+async def _pdf_pages_on_pool(data: bytes) -> List[str]:
+    return await pdf_extractor.extract_pages(data)
+
+
+async def _pdf_pages_local(data: bytes) -> List[str]:
+    return pdf_extractor.extract_pages_sync(data)
+
+
+def _events_to_schedule(events) -> List[Dict[str, Any]]:
+    """Placed assignment events in the planner schedule shape create_ics expects"""
+    return [
+        {
+            "Day": event.start.strftime("%A"),
+            "Date": event.start.date().isoformat(),
+            "Start_Time": event.start.strftime("%H:%M"),
+            "End_Time": event.end.strftime("%H:%M"),
+            "Task": event.title,
+            "Category": "Assignment",
+        }
+        for event in events
+    ]
+
+
+def benchmark_size(name: str, iterations: int) -> Dict[str, Any]:
+    size = synthetic.SIZES[name]
+    loop = asyncio.new_event_loop()
+    try:
+        pdf = synthetic.make_pdf(size.pages)
+        docx = synthetic.make_docx(size.pages)
+        classes_text = synthetic.classes_json(size.classes)
+        assignments_text = synthetic.assignments_json(size.assignments, size.horizon_days)
+        class_events = agent2_verifier.verify_tasks(classes_text)
+        assignments = agent2_verifier.verify_assignments(assignments_text)
+        schedule = synthetic.schedule_items(size.schedule_items, size.horizon_days)
+        fixed = synthetic.fixed_events(size.schedule_items // 4, size.horizon_days)
+        plan_options = {"start_date": synthetic.START_DATE, "horizon_days": size.horizon_days}
+
+        async def upload_and_parse(extract):
+            pages = await extract(pdf)
+            text = "".join(pages)
+            return await asyncio.gather(
+                agent1_ingestor.generate_tasks(text, pages),
+                agent1_ingestor.generate_assignment_tasks(text),
+            )
+
+        def end_to_end(extract=_pdf_pages_on_pool):
+            classes_json, assignments_json = loop.run_until_complete(upload_and_parse(extract))
+            events, _ = agent3_scheduler.plan_assignments(
+                agent2_verifier.verify_assignments(assignments_json),
+                agent2_verifier.verify_tasks(classes_json),
+                **plan_options,
+            )
+            create_ics(_events_to_schedule(events), fixed, TIMEZONE)
+
+        stages: Dict[str, Callable[[], Any]] = {
+            "pdf_extraction": lambda: loop.run_until_complete(pdf_extractor.extract_pages(pdf)),
+            "docx_extraction": lambda: loop.run_until_complete(
+                document_extractor.extract_document("syllabus.docx", "", docx)
+            ),
+            "verify_tasks": lambda: agent2_verifier.verify_tasks(classes_text),
+            "verify_assignments": lambda: agent2_verifier.verify_assignments(assignments_text),
+        }
+        for engine in agent3_scheduler.ENGINES:
+            for strategy in agent3_scheduler.STRATEGIES:
+                stages[f"scheduler_{engine}_{strategy}"] = (
+                    lambda engine=engine, strategy=strategy: agent3_scheduler.place_assignments(
+                        assignments, class_events, engine=engine, strategy=strategy, **plan_options
+                    )
+                )
+        stages["plan_assignments"] = lambda: agent3_scheduler.plan_assignments(
+            assignments, class_events, **plan_options
+        )
+        stages["create_ics"] = lambda: create_ics(schedule, fixed, TIMEZONE)
+        stages["sync_payloads"] = lambda: build_sync_payloads(schedule, fixed, TIMEZONE)
+        stages["end_to_end"] = end_to_end
+
+        # Memory passes for stages whose work runs on the PDF worker pool
+        memory_runs: Dict[str, Callable[[], Any]] = {
+            "pdf_extraction": lambda: pdf_extractor.extract_pages_sync(pdf),
+            "end_to_end": lambda: end_to_end(_pdf_pages_local),
+        }
+
+        results = {}
+        for stage, run in stages.items():
+            worker_memory = (lambda: _pdf_worker_peak_rss(pdf)) if stage == "pdf_extraction" else None
+            results[stage] = measure(run, iterations, memory_run=memory_runs.get(stage),
+                                     worker_memory=worker_memory)
+            line = (f"  {name:<6} {stage:<28} p50 {results[stage]['p50_ms']:>9.2f} ms  "
+                    f"p95 {results[stage]['p95_ms']:>9.2f} ms  peak {results[stage]['peak_memory_kib']:>9.1f} KiB")
+            if "worker_rss_growth_kib" in results[stage]:
+                line += f"  worker RSS +{results[stage]['worker_rss_growth_kib']:.1f} KiB"
+            print(line)
+        return {"inputs": size.__dict__, "stages": results}
+    finally:
+        loop.close()
+
+
+def run(sizes: List[str], iterations: int) -> Dict[str, Any]:
+    return {
+        "meta": {
+            "timestamp": datetime.now(timezone.utc).isoformat(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "llm_provider": os.environ.get("AURA_LLM_PROVIDER"),
+            "iterations": iterations,
+        },
+        "results": {name: benchmark_size(name, iterations) for name in sizes},
+    }
+
+
+def compare(baseline: Dict[str, Any], current: Dict[str, Any], threshold: float) -> List[str]:
+    """Stages whose p50 grew by more than `threshold` (0.1 = 10%) against the baseline"""
+    regressions = []
+    for size, result in current["results"].items():
+        before = baseline.get("results", {}).get(size, {}).get("stages", {})
+        for stage, stats in result["stages"].items():
+            old: Optional[Dict[str, Any]] = before.get(stage)
+            if not old or not old.get("p50_ms"):
+                continue
+            change = stats["p50_ms"] / old["p50_ms"] - 1
+            line = f"{size}/{stage}: {old['p50_ms']:.2f} -> {stats['p50_ms']:.2f} ms ({change:+.0%})"
+            print(("REGRESSION " if change > threshold else "           ") + line)
+            if change > threshold:
+                regressions.append(line)
+    return regressions
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmark the Aura scheduling pipeline")
+    parser.add_argument("--sizes", nargs="+", choices=sorted(synthetic.SIZES), default=DEFAULT_SIZES)
+    parser.add_argument("--iterations", type=int, default=DEFAULT_ITERATIONS)
+    parser.add_argument("--output", help="Write results as JSON to this file")
+    parser.add_argument("--compare", nargs=2, metavar=("BASELINE", "CURRENT"),
+                        help="Compare two result files instead of running")
+    parser.add_argument("--threshold", type=float, default=0.1,
+                        help="Allowed p50 slowdown before --compare fails (default 0.1 = 10%%)")
+    args = parser.parse_args(argv)
+
+    if args.compare:
+        with open(args.compare[0]) as f:
+            baseline = json.load(f)
+        with open(args.compare[1]) as f:
+            current = json.load(f)
+        return 1 if compare(baseline, current, args.threshold) else 0
+
+    results = run(args.sizes, args.iterations)
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+        print(f"Results written to {args.output}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
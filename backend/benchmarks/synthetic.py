@@ -0,0 +1,149 @@
+"""
+Synthetic Inputs
+Deterministic documents and LLM outputs for the benchmark suite: syllabus
+PDFs/DOCX of a given size, and the JSON Agent 1 / the planner model would
+return for them, so no live API is involved.
+"""
+import io
+import json
+import random
+from dataclasses import dataclass
+from datetime import date, timedelta
+from typing import Any, Dict, List
+
+SUBJECTS = ["Algorithms", "Databases", "Linear Algebra", "Operating Systems", "Statistics",
+            "Compilers", "Networks", "Machine Learning", "Ethics", "Writing"]
+DAY_NAMES = ["Monday", "Tuesday", "Wednesday", "Thursday", "Friday", "Saturday", "Sunday"]
+START_DATE = date(2025, 1, 6)  # a Monday; fixed so runs are comparable
+
+
+@dataclass(frozen=True)
+class Size:
+    pages: int
+    classes: int
+    assignments: int
+    schedule_items: int
+    horizon_days: int
+
+
+SIZES: Dict[str, Size] = {
+    "small": Size(pages=2, classes=3, assignments=3, schedule_items=20, horizon_days=7),
+    "medium": Size(pages=20, classes=6, assignments=20, schedule_items=200, horizon_days=28),
+    "large": Size(pages=100, classes=10, assignments=100, schedule_items=2000, horizon_days=140),
+}
+
+
+def _hhmm(minutes: int) -> str:
+    return f"{minutes // 60:02d}:{minutes % 60:02d}"
+
+
+def syllabus_paragraphs(pages: int, seed: int = 0) -> List[List[str]]:
+    """Paragraphs of syllabus-like text, grouped per page"""
+    rng = random.Random(seed)
+    result = []
+    for page in range(pages):
+        paragraphs = []
+        for line in range(12):
+            subject = SUBJECTS[(page + line) % len(SUBJECTS)]
+            day = START_DATE + timedelta(days=page * 7 + line % 7)
+            paragraphs.append(
+                f"Week {page + 1}: {subject} lecture on {day.isoformat()} ({DAY_NAMES[day.weekday()]}) "
+                f"{_hhmm(rng.choice(range(8 * 60, 17 * 60, 30)))}. Reading: chapter {rng.randint(1, 20)}, "
+                f"problem set {rng.randint(1, 12)} due {(day + timedelta(days=7)).isoformat()}."
+            )
+        result.append(paragraphs)
+    return result
+
+
+def make_pdf(pages: int) -> bytes:
+    import pymupdf as fitz
+    doc = fitz.open()
+    try:
+        for paragraphs in syllabus_paragraphs(pages):
+            page = doc.new_page()
+            page.insert_textbox(fitz.Rect(40, 40, 560, 800), "\n\n".join(paragraphs), fontsize=9)
+        return doc.tobytes()
+    finally:
+        doc.close()
+
+
+def make_docx(pages: int) -> bytes:
+    from docx import Document
+    document = Document()
+    for paragraphs in syllabus_paragraphs(pages):
+        for text in paragraphs:
+            document.add_paragraph(text)
+    buffer = io.BytesIO()
+    document.save(buffer)
+    return buffer.getvalue()
+
+
+def classes_json(count: int, seed: int = 0) -> str:
+    """What Agent 1 returns for a class schedule"""
+    rng = random.Random(seed)
+    items = []
+    for i in range(count):
+        start = rng.choice(range(8 * 60, 18 * 60, 30))
+        items.append({
+            "title": f"{SUBJECTS[i % len(SUBJECTS)]} {100 + i}",
+            "daysOfWeek": sorted(rng.sample(range(1, 6), rng.choice([1, 2, 3]))),
+            "startTime": _hhmm(start),
+            "endTime": _hhmm(start + rng.choice([50, 75, 90])),
+        })
+    return json.dumps(items)
+
+
+def assignments_json(count: int, horizon_days: int, seed: int = 0) -> str:
+    """What Agent 1 returns for assignment documents"""
+    rng = random.Random(seed)
+    items = []
+    for i in range(count):
+        items.append({
+            "title": f"{SUBJECTS[i % len(SUBJECTS)]} Assignment {i + 1}",
+            "due_date": (START_DATE + timedelta(days=rng.randint(2, horizon_days))).isoformat(),
+            "phases": [
+                {
+                    "title": title,
+                    "duration_minutes": rng.choice([30, 45, 60, 90, 120]),
+                    "intensity": rng.choice(["Low", "Medium", "High"]),
+                }
+                for title in ["Research", "Draft", "Revise"][:rng.randint(1, 3)]
+            ],
+        })
+    return json.dumps(items)
+
+
+def schedule_items(count: int, horizon_days: int, seed: int = 0) -> List[Dict[str, Any]]:
+    """Planner schedule items as the model would produce them"""
+    rng = random.Random(seed)
+    items = []
+    for i in range(count):
+        day = START_DATE + timedelta(days=i % horizon_days)
+        start = 8 * 60 + rng.randrange(0, 13 * 60, 15)
+        items.append({
+            "Day": DAY_NAMES[day.weekday()],
+            "Date": day.isoformat(),
+            "Start_Time": _hhmm(start),
+            "End_Time": _hhmm(start + 60),
+            "Task": f"Study {SUBJECTS[i % len(SUBJECTS)]} #{i}",
+            "Category": "Study",
+        })
+    return items
+
+
+def fixed_events(count: int, horizon_days: int, seed: int = 0) -> List[Dict[str, Any]]:
+    """Syllabus events as parse_syllabus returns them"""
+    rng = random.Random(seed)
+    events = []
+    for i in range(count):
+        day = START_DATE + timedelta(days=rng.randrange(horizon_days))
+        start = rng.choice(range(8 * 60, 17 * 60, 30))
+        events.append({
+            "date": day.isoformat(),
+            "day": DAY_NAMES[day.weekday()],
+            "start_time": _hhmm(start),
+            "end_time": _hhmm(start + 90),
+            "summary": f"{SUBJECTS[i % len(SUBJECTS)]} Lecture",
+            "type": "Class",
+        })
+    return events
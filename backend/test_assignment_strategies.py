@@ -0,0 +1,64 @@
+"""
+Offline test for the assignment scheduling strategies
+EDF must get urgent work in before its deadline where greedy input order does
+not, and chunks that cannot be placed must say why
+"""
+import os
+import sys
+from datetime import date, datetime, time
+
+# Add parent directory to path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.models import CalendarEvent
+from app.services.agent3_scheduler import UNPLACED_REASONS, plan_assignments
+
+MONDAY = date(2025, 1, 6)
+# Two working hours a day over three days: 360 minutes in total
+OPTIONS = {"start_date": MONDAY, "horizon_days": 3, "day_start": time(8), "day_end": time(10)}
+
+BIG_PROJECT = {"title": "Big project", "due_date": "2025-01-20",
+               "phases": [{"title": "Build", "duration_minutes": 240, "intensity": "Low"}]}
+# Due Wednesday, so its work must end by Tuesday 23:59
+QUIZ = {"title": "Quiz prep", "due_date": "2025-01-08",
+        "phases": [{"title": "Review", "duration_minutes": 120, "intensity": "High"}]}
+CLASS = CalendarEvent(title="CSE 611", startTime=time(8), endTime=time(9), daysOfWeek=[1])  # Mondays
+
+
+def test_edf_places_urgent_later_listed_assignment():
+    print("\n1. Greedy vs EDF with an urgent assignment listed last...")
+    greedy, greedy_unplaced = plan_assignments([BIG_PROJECT, QUIZ], [], strategy="greedy", **OPTIONS)
+    assert [u.assignment for u in greedy_unplaced] == ["Quiz prep", "Quiz prep"]
+    assert {u.reason for u in greedy_unplaced} == {"no free time before the deadline"}
+
+    edf, edf_unplaced = plan_assignments([BIG_PROJECT, QUIZ], [], strategy="edf", **OPTIONS)
+    assert edf_unplaced == []
+    quiz = [e for e in edf if e.extendedProps["assignment"] == "Quiz prep"]
+    assert len(quiz) == 2 and all(e.end <= datetime(2025, 1, 7, 23, 59) for e in quiz)
+    assert [e.start for e in edf] == sorted(e.start for e in edf)
+    print("   ✓ Greedy misses the quiz deadline; EDF places it in time and still fits the project")
+
+
+def test_unplaced_reasons():
+    print("\n2. Unplaced chunk reasons...")
+    overdue = {"title": "Overdue", "due_date": "2025-01-01",
+               "phases": [{"title": "Write", "duration_minutes": 30, "intensity": "Low"}]}
+    endless = {"title": "Reading", "due_date": None,
+               "phases": [{"title": "Read", "duration_minutes": 600, "intensity": "Low"}]}
+    events, unplaced = plan_assignments([overdue, QUIZ, endless], [CLASS], **OPTIONS)
+
+    reasons = {(u.assignment, u.reason) for u in unplaced}
+    assert reasons == {
+        ("Overdue", UNPLACED_REASONS[0]),
+        ("Reading", UNPLACED_REASONS[2]),
+    }
+    # 360 minutes minus Monday's class and the quiz leave 180 minutes of reading
+    placed_reading = sum(e.extendedProps["phase"] == "Read" for e in events) * 30
+    assert placed_reading == 180
+    assert sum(u.minutes for u in unplaced if u.assignment == "Reading") == 600 - 180
+    print("   ✓ Past-due and horizon-limited chunks reported with their reasons")
+
+
+if __name__ == "__main__":
+    test_edf_places_urgent_later_listed_assignment()
+    test_unplaced_reasons()
@@ -0,0 +1,111 @@
+"""
+Offline test for batch scheduling
+Runs a few users through an in-process executor: every user gets their own
+result, one failing user does not affect the others, and the stream ends with
+a "done" stats frame
+"""
+import asyncio
+import json
+import os
+import sys
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date
+
+# Add parent directory to path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.services import batch_scheduler
+from app.services.batch_scheduler import BatchScheduleOptions, BatchStats, UserSchedule
+
+OPTIONS = BatchScheduleOptions(start_date=date(2025, 1, 6), horizon_days=5)
+CLASS = {"title": "CSE 611", "startTime": "10:00", "endTime": "11:20", "daysOfWeek": [1, 3]}
+
+
+def _user(user_id, minutes):
+    return UserSchedule(user_id=user_id, class_events=[CLASS], assignments=[{
+        "title": f"Project {user_id}",
+        "due_date": "2025-01-10",
+        "phases": [{"title": "Work", "duration_minutes": minutes, "intensity": "High"}],
+    }])
+
+
+# Too large to index: this user's planning raises inside the worker
+BROKEN = _user("broken", 10 ** 30)
+
+
+def test_iter_schedule_batch_isolates_errors():
+    print("\n1. iter_schedule_batch on an in-process executor...")
+    users = [_user("a", 120), BROKEN, _user("b", 180), _user("c", 60)]
+    stats = BatchStats()
+
+    async def run():
+        with ThreadPoolExecutor(max_workers=2) as executor:
+            return [r async for r in batch_scheduler.iter_schedule_batch(
+                users, OPTIONS, stats=stats, executor=executor, users_per_task=2)]
+
+    results = {r.user_id: r for r in asyncio.run(run())}
+    assert set(results) == {"a", "broken", "b", "c"}
+    assert [len(results[u].events) for u in ("a", "b", "c")] == [2, 3, 1]
+    assert results["broken"].error and not results["broken"].events
+    assert all(results[u].error is None for u in ("a", "b", "c"))
+    assert (stats.users, stats.failed, stats.scheduled_events) == (4, 1, 6)
+    assert stats.users_per_second > 0
+    print("   ✓ Per-user results; the failing user is reported without affecting its group")
+
+
+def test_batch_endpoint_streams_done_frame():
+    print("\n2. POST /api/v1/scheduler/batch...")
+    from fastapi.testclient import TestClient
+    from app.main import app
+
+    body = {
+        "users": [u.model_dump(mode="json") for u in (_user("a", 120), BROKEN)],
+        "options": OPTIONS.model_dump(mode="json"),
+    }
+    previous = batch_scheduler._executor
+    batch_scheduler._executor = ThreadPoolExecutor(max_workers=1)
+    try:
+        response = TestClient(app).post("/api/v1/scheduler/batch", json=body)
+    finally:
+        batch_scheduler._executor.shutdown()
+        batch_scheduler._executor = previous
+    assert response.status_code == 200
+    frames = [json.loads(line) for line in response.text.splitlines()]
+    *users, done = frames
+    assert sorted(f["data"]["user_id"] for f in users) == ["a", "broken"]
+    assert all(f["type"] == "user" for f in users)
+    assert done["type"] == "done"
+    assert done["data"]["users"] == 2 and done["data"]["failed"] == 1 and done["data"]["scheduled_events"] == 2
+    print("   ✓ One user frame each, then the stats frame")
+
+
+def test_batch_endpoint_rejects_inverted_window():
+    print("\n3. POST /api/v1/scheduler/batch with day_end before day_start...")
+    from fastapi.testclient import TestClient
+    from app.main import app
+
+    body = {
+        "users": [_user("a", 120).model_dump(mode="json")],
+        "options": {**OPTIONS.model_dump(mode="json"), "day_start": "18:00:00", "day_end": "09:00:00"},
+    }
+    response = TestClient(app).post("/api/v1/scheduler/batch", json=body)
+    assert response.status_code == 422
+    assert "day_end must be after day_start" in response.text
+    print("   ✓ 422 before any user is scheduled")
+
+
+def test_schedule_batch_keeps_input_order():
+    print("\n4. schedule_batch on worker processes...")
+    users = [_user(str(i), 60 * (i % 3 + 1)) for i in range(5)]
+    result = batch_scheduler.schedule_batch(users, OPTIONS, max_workers=2, users_per_task=2)
+    assert [r.user_id for r in result.results] == [str(i) for i in range(5)]
+    assert [len(r.events) for r in result.results] == [1, 2, 3, 1, 2]
+    assert result.stats.users == 5 and result.stats.failed == 0
+    print("   ✓ Results in input order with stats")
+
+
+if __name__ == "__main__":
+    test_iter_schedule_batch_isolates_errors()
+    test_batch_endpoint_streams_done_frame()
+    test_batch_endpoint_rejects_inverted_window()
+    test_schedule_batch_keeps_input_order()
@@ -0,0 +1,157 @@
+"""
+Offline test for batched Google Calendar inserts
+Uses a local fake transport (HttpMockSequence) instead of the live API
+"""
+import os
+import sys
+import json
+import asyncio
+
+# Add parent directory to path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from googleapiclient.discovery import build
+from googleapiclient.http import HttpMockSequence
+
+from app.services.google_calendar_service import (
+    AsyncGoogleCalendarService,
+    GoogleCalendarService,
+    MAX_BATCH_SIZE,
+    build_event_payload,
+)
+
+BOUNDARY = "batch_aura_test"
+
+
+def _batch_response(parts):
+    """Build a multipart/mixed batch response from (request_id, status, body) tuples"""
+    chunks = []
+    for request_id, status, body in parts:
+        chunks.append(
+            f"--{BOUNDARY}\r\n"
+            "Content-Type: application/http\r\n"
+            "Content-Transfer-Encoding: binary\r\n"
+            f"Content-ID: <response-fake + {request_id}>\r\n\r\n"
+            f"HTTP/1.1 {status}\r\n"
+            "Content-Type: application/json\r\n\r\n"
+            f"{json.dumps(body)}\r\n"
+        )
+    chunks.append(f"--{BOUNDARY}--")
+    headers = {"status": "200", "content-type": f"multipart/mixed; boundary={BOUNDARY}"}
+    return (headers, "".join(chunks))
+
+
+def _fake_service(responses):
+    service = GoogleCalendarService()
+    service.service = build("calendar", "v3", http=HttpMockSequence(responses), static_discovery=True)
+    service.calendar_id = "fake-calendar@group.calendar.google.com"
+    return service
+
+
+def test_batch_insert_reports_per_event_results():
+    events = [
+        build_event_payload(f"Task {i}", "Category: Study", "2025-11-20", "10:00", "11:00")
+        for i in range(MAX_BATCH_SIZE + 2)
+    ]
+    first = [(str(i), "200 OK", {"id": f"evt{i}"}) for i in range(MAX_BATCH_SIZE)]
+    first[3] = ("3", "400 Bad Request", {"error": {"code": 400, "message": "Invalid"}})
+    second = [(str(i), "200 OK", {"id": f"evt{i}"}) for i in range(MAX_BATCH_SIZE, MAX_BATCH_SIZE + 2)]
+
+    service = _fake_service([_batch_response(first), _batch_response(second)])
+    result = service.add_events_batch(events)
+
+    assert result.batches == 2
+    assert result.succeeded == MAX_BATCH_SIZE + 1
+    assert result.failed == 1
+    assert [r.index for r in result.results] == list(range(len(events)))
+    assert not result.results[3].success and result.results[3].error
+    assert result.results[-1].event_id == f"evt{MAX_BATCH_SIZE + 1}"
+    print("   ✓ Batched insert returned per-event results")
+
+
+def test_batch_transport_failure_marks_batch_failed():
+    events = [build_event_payload("Exam", "Type: Exam", "2025-12-01")]
+    service = _fake_service([({"status": "500"}, "Server Error")])
+    result = service.add_events_batch(events)
+
+    assert result.succeeded == 0
+    assert result.failed == 1
+    print("   ✓ Failed batch reported as per-event failures")
+
+
+def test_async_facade_fans_out_batches():
+    events = [
+        build_event_payload(f"Task {i}", "Category: Study", "2025-11-20", "10:00", "11:00")
+        for i in range(5)
+    ]
+    # One fake transport per batch: each batch of 2 gets its own ids back
+    service = _fake_service([
+        _batch_response([(str(i), "200 OK", {"id": f"evt{i}"}) for i in range(n)])
+        for n in (2, 2, 1)
+    ])
+    facade = AsyncGoogleCalendarService(service, max_workers=1)
+    try:
+        result = asyncio.run(facade.add_events_batch(events, batch_size=2))
+    finally:
+        facade.shutdown()
+
+    assert result.batches == 3
+    assert result.succeeded == 5
+    assert [r.index for r in result.results] == [0, 1, 2, 3, 4]
+    assert [r.summary for r in result.results] == [f"Task {i}" for i in range(5)]
+    print("   ✓ Async facade merged batch results in input order")
+
+
+def test_recurring_class_is_one_insert():
+    from datetime import date, time
+    from app.models import CalendarEvent
+    from app.services.planner_service import build_sync_payloads
+    from app.services.sync_index import plan_sync
+
+    classes = [
+        CalendarEvent(title="CSE 611", startTime=time(10), endTime=time(11, 20), daysOfWeek=[1, 3]),
+        CalendarEvent(title="MTH 309", startTime=time(13), endTime=time(14), daysOfWeek=[2, 4, 5]),
+    ]
+    payloads, errors, _ = build_sync_payloads([], [], recurring_events=classes,
+                                              term_start=date(2025, 1, 13), term_end=date(2025, 5, 2))
+    assert not errors and len(payloads) == 2
+    cse = next(p for p in payloads.values() if p["summary"] == "CSE 611")
+    assert cse["start"]["dateTime"] == "2025-01-13T10:00:00-05:00"
+    assert cse["recurrence"] == ["RRULE:FREQ=WEEKLY;BYDAY=MO,WE;UNTIL=20250503T035959Z"]
+    assert len(plan_sync(payloads, {}).inserts) == 2
+
+    service = _fake_service([_batch_response([("0", "200 OK", {"id": "a"}), ("1", "200 OK", {"id": "b"})])])
+    assert service.add_events_batch(list(payloads.values())).succeeded == 2
+    print("   ✓ Two weekly classes synced as two recurring events")
+
+
+def test_recurring_resync_patches_series():
+    from datetime import time
+    from app.models import CalendarEvent
+    from app.services.planner_service import build_sync_payloads
+    from app.services.sync_index import IndexEntry, content_hash, plan_sync
+
+    classes = [CalendarEvent(title="CSE 611", startTime=time(10), endTime=time(11, 20), daysOfWeek=[1, 3])]
+
+    def week(day):
+        return [{"Date": day, "Start_Time": "09:00", "End_Time": "10:00", "Task": "Read"}]
+
+    # No term given: the term starts at the earliest dated item, which moves between syncs
+    first, _, _ = build_sync_payloads(week("2025-01-14"), [], recurring_events=classes)
+    existing = {key: IndexEntry(event_id=f"g{i}", content_hash=content_hash(payload))
+                for i, (key, payload) in enumerate(first.items())}
+    later, errors, _ = build_sync_payloads(week("2025-01-21"), [], recurring_events=classes)
+    assert not errors
+    plan = plan_sync(later, existing)
+    assert [op.payload["summary"] for op in plan.patches] == ["CSE 611"]
+    assert [op.payload["summary"] for op in plan.inserts] == ["Read"]
+    assert [op.event_id for op in plan.deletes] == ["g0"]  # last week's "Read", not the class
+    print("   ✓ A shifted term patches the class series instead of recreating it")
+
+
+if __name__ == "__main__":
+    test_batch_insert_reports_per_event_results()
+    test_batch_transport_failure_marks_batch_failed()
+    test_async_facade_fans_out_batches()
+    test_recurring_class_is_one_insert()
+    test_recurring_resync_patches_series()
@@ -0,0 +1,46 @@
+"""
+Offline test for merging per-chunk LLM outputs
+Messy chunk results (mixed types, truncation, junk elements) must merge
+without raising, keeping each class or assignment once
+"""
+import json
+import os
+import sys
+
+# Add parent directory to path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.services.agent1_ingestor import merge_assignment_json, merge_class_json
+
+
+def test_merge_messy_class_chunks():
+    print("\n1. Class chunks with mixed types...")
+    chunks = [
+        '[{"title": "CSE 611", "daysOfWeek": [1, "3"], "startTime": "10:00", "endTime": "11:20"}]',
+        '[{"title": "cse 611 ", "daysOfWeek": ["3", 1], "startTime": "10:00", "endTime": "11:20"},'
+        ' {"title": "MTH 309", "daysOfWeek": "TuTh", "startTime": {"h": 13}, "endTime": null},'
+        ' "junk", {"title": "PHY 101", "daysOfWeek": [[5]], "startTime": "09:',
+        None,
+        '```json\n[{"title": null, "daysOfWeek": [2, "2"]}]\n```',
+    ]
+    merged = json.loads(merge_class_json(chunks))
+    assert [item["title"] for item in merged] == ["CSE 611", "MTH 309", None]
+    print("   ✓ Duplicates across chunks collapsed; odd types keyed without errors")
+
+
+def test_merge_messy_assignment_chunks():
+    print("\n2. Assignment chunks with mixed types...")
+    chunks = [
+        '[{"title": "Project 1", "due_date": "2025-03-01", "phases": []},'
+        ' {"title": "Essay", "due_date": ["2025-04-01"]}]',
+        '[{"title": "project 1", "due_date": "2025-03-01"}, {"title": "Essay", "due_date": ["2025-04-01"]},'
+        ' {"title": 7, "due_date": {"month": 5}}]',
+    ]
+    merged = json.loads(merge_assignment_json(chunks))
+    assert [item["title"] for item in merged] == ["Project 1", "Essay", 7]
+    print("   ✓ Unhashable due dates and non-string titles merged")
+
+
+if __name__ == "__main__":
+    test_merge_messy_class_chunks()
+    test_merge_messy_assignment_chunks()
@@ -0,0 +1,108 @@
+"""
+Offline test for multi-document extraction
+Mixed PDF / DOCX / text uploads are routed by kind and come back in input
+order; DOCX parsing runs in a worker thread, and a file that fails to read is
+reported on its own result without affecting the others
+"""
+import asyncio
+import io
+import os
+import sys
+import threading
+
+# Add parent directory to path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from fastapi import UploadFile
+from starlette.datastructures import Headers
+
+from app.services import document_extractor, pdf_extractor
+
+
+def _pdf(text):
+    import pymupdf as fitz
+    doc = fitz.open()
+    doc.new_page().insert_text((72, 72), text)
+    data = doc.tobytes()
+    doc.close()
+    return data
+
+
+def _docx(text):
+    import docx
+    document = docx.Document()
+    document.add_paragraph(text)
+    buffer = io.BytesIO()
+    document.save(buffer)
+    return buffer.getvalue()
+
+
+FILES = [
+    ("syllabus.pdf", "application/pdf", _pdf("Midterm on March 3")),
+    ("notes.txt", "text/plain", b"Quiz 1 next Friday"),
+    ("broken.docx", "application/vnd.openxmlformats-officedocument.wordprocessingml.document", b"not a zip"),
+    ("project.docx", "application/octet-stream", _docx("Project report due April 20")),
+    ("latin1.txt", "text/plain", "caf\xe9".encode("latin-1")),
+    ("scan.PDF", "application/octet-stream", b"%PDF-garbage"),
+]
+
+
+def test_detect_kind():
+    print("\n1. Routing by content type and extension...")
+    assert document_extractor.detect_kind("a.bin", "application/pdf") == "pdf"
+    assert document_extractor.detect_kind("A.PDF", "application/octet-stream") == "pdf"
+    assert document_extractor.detect_kind("a.docx", "") == "docx"
+    assert document_extractor.detect_kind("a", "application/msword") == "docx"
+    assert document_extractor.detect_kind("a.md", "text/markdown") == "text"
+    print("   ✓ PDF, DOCX and text detected")
+
+
+def test_mixed_documents_keep_order_and_isolate_errors():
+    print("\n2. Mixed uploads extracted concurrently...")
+    threads = []
+    original = document_extractor._docx_text
+
+    def recording_docx_text(data):
+        threads.append(threading.current_thread())
+        return original(data)
+
+    document_extractor._docx_text = recording_docx_text
+    try:
+        results = asyncio.run(document_extractor.extract_documents(FILES))
+    finally:
+        document_extractor._docx_text = original
+        pdf_extractor.shutdown()
+
+    assert [r.filename for r in results] == [name for name, _, _ in FILES]
+    assert [r.kind for r in results] == ["pdf", "text", "docx", "docx", "text", "pdf"]
+    ok = {r.filename: r for r in results if r.error is None}
+    failed = {r.filename: r for r in results if r.error is not None}
+    assert set(failed) == {"broken.docx", "latin1.txt", "scan.PDF"}
+    assert all(not r.text for r in failed.values())
+    assert "Midterm on March 3" in ok["syllabus.pdf"].text
+    assert ok["notes.txt"].text == "Quiz 1 next Friday"
+    assert ok["project.docx"].text == "Project report due April 20"
+    # Both DOCX files were parsed off the event loop's thread
+    assert len(threads) == 2 and threading.main_thread() not in threads
+    print("   ✓ Results in input order; 3 failures reported, 3 files extracted")
+
+
+def test_extract_uploads():
+    print("\n3. extract_uploads with FastAPI UploadFiles...")
+    uploads = [
+        UploadFile(io.BytesIO(data), filename=name, headers=Headers({"content-type": content_type}))
+        for name, content_type, data in FILES[:2]
+    ]
+    try:
+        results = asyncio.run(document_extractor.extract_uploads(uploads))
+    finally:
+        pdf_extractor.shutdown()
+    assert [(r.filename, r.kind, r.error) for r in results] == [
+        ("syllabus.pdf", "pdf", None), ("notes.txt", "text", None)]
+    print("   ✓ Uploads read and extracted in order")
+
+
+if __name__ == "__main__":
+    test_detect_kind()
+    test_mixed_documents_keep_order_and_isolate_errors()
+    test_extract_uploads()
@@ -0,0 +1,58 @@
+"""
+Offline test for the free/busy index used by the assignment scheduler
+Checks every query against a brute-force scan over random slot layouts
+"""
+import os
+import sys
+import random
+
+# Add parent directory to path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.services.free_busy_index import FreeSlotIndex, subtract_intervals
+
+
+def test_subtract_intervals():
+    print("\n1. Windows minus busy blocks...")
+    free = subtract_intervals([(0, 100), (200, 300)], [(10, 20), (15, 30), (90, 210), (290, 400)])
+    assert free == [(0, 10), (30, 90), (210, 290)]
+    print("   ✓ Overlapping busy blocks merged and clipped to windows")
+
+
+def test_queries_match_linear_scan():
+    print("\n2. first_fit and best_fit against a linear scan...")
+    rng = random.Random(7)
+    for _ in range(300):
+        slots, cursor = [], 0
+        for _ in range(rng.randint(0, 30)):
+            cursor += rng.randint(0, 20)
+            length = rng.randint(1, 50)
+            slots.append((cursor, cursor + length))
+            cursor += length
+        index = FreeSlotIndex(slots)
+        reference = [list(slot) for slot in slots]
+
+        for _ in range(40):
+            minutes = rng.randint(1, 60)
+            deadline = rng.choice([None, rng.randint(0, cursor + 10)])
+            fits = [
+                (end - start, i) for i, (start, end) in enumerate(reference)
+                if end - start >= minutes and (deadline is None or start + minutes <= deadline)
+            ]
+            first = index.first_fit(minutes, deadline)
+            assert first == (min(i for _, i in fits) if fits else None)
+            best = index.best_fit(minutes, deadline)
+            assert best == (min(fits)[1] if fits else None)
+
+            # Allocate from the first fit, the best fit or any other fitting slot
+            chosen = rng.choice([first, best, rng.choice(fits)[1] if fits else None])
+            if chosen is not None:
+                start, end = index.allocate(chosen, minutes)
+                assert (start, end) == (reference[chosen][0], reference[chosen][0] + minutes)
+                reference[chosen][0] += minutes
+    print("   ✓ Queries and allocations agree with brute force")
+
+
+if __name__ == "__main__":
+    test_subtract_intervals()
+    test_queries_match_linear_scan()
@@ -0,0 +1,119 @@
+"""
+Offline test for the ICS exporter
+Repeating items must collapse into RRULE series that expand back to exactly
+the input occurrences, and the calendar must carry a VTIMEZONE
+"""
+import os
+import sys
+import tempfile
+from datetime import date, datetime, time, timedelta
+
+# Add parent directory to path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.models import CalendarEvent
+from app.services.ics_export import WEEKDAY_CODES, build_ics
+from app.services.schedule_store import ScheduleContent, ScheduleStore
+
+TERM_START = date(2025, 1, 13)  # a Monday
+
+
+def _vevents(ics):
+    events, current = [], None
+    for line in ics.replace("\r\n ", "").split("\r\n"):
+        if line == "BEGIN:VEVENT":
+            current = {}
+        elif line == "END:VEVENT":
+            events.append(current)
+            current = None
+        elif current is not None and ":" in line:
+            name, value = line.split(":", 1)
+            current[name.split(";")[0]] = value
+    return events
+
+
+def _expand(event):
+    """(summary, YYYYMMDD) for every instance of a VEVENT; weekly RRULEs only"""
+    first = event["DTSTART"][:8]
+    if "RRULE" not in event:
+        return {(event["SUMMARY"], first)}
+    rule = dict(part.split("=") for part in event["RRULE"].split(";"))
+    assert rule["FREQ"] == "WEEKLY"
+    weekdays = {WEEKDAY_CODES.index(code) for code in rule["BYDAY"].split(",")}
+    excluded = {value[:8] for value in event.get("EXDATE", "").split(",") if value}
+    day = date(int(first[:4]), int(first[4:6]), int(first[6:8]))
+    instances = []
+    while len(instances) < int(rule["COUNT"]):
+        if day.weekday() in weekdays:
+            instances.append(day.strftime("%Y%m%d"))
+        day += timedelta(days=1)
+    return {(event["SUMMARY"], d) for d in instances if d not in excluded}
+
+
+def test_semester_collapses_to_series():
+    print("\n1. A semester of dated classes...")
+    fixed = []
+    for course, days, start in [("CSE 611", (0, 2), "10:00"), ("MTH 309", (1, 3), "13:00"), ("PHI 101", (4,), "09:00")]:
+        for week in range(15):
+            for wd in days:
+                day = TERM_START + timedelta(weeks=week, days=wd)
+                if week == 8:  # spring break
+                    continue
+                fixed.append({"date": day.isoformat(), "start_time": start, "end_time": "11:50", "summary": course})
+    fixed.append({"date": "2025-03-05", "summary": "Midterm, CSE 611"})
+    schedule = [{"Date": "2025-01-14", "Start_Time": "8:00", "End_Time": "9:00", "Task": "Read", "Category": "Study"}]
+
+    ics = build_ics(schedule, fixed)
+    events = _vevents(ics)
+    assert len(events) == 5, len(events)
+    expected = {(item["summary"].replace(",", "\\,"), item["date"].replace("-", "")) for item in fixed}
+    expected.add(("[Study] Read", "20250114"))
+    expanded = set().union(*[_expand(event) for event in events])
+    assert expanded == expected
+    print(f"   ✓ {len(fixed) + 1} occurrences written as {len(events)} VEVENTs and expand back exactly")
+
+
+def test_vtimezone_and_recurring_classes():
+    print("\n2. VTIMEZONE and recurring classes...")
+    algo = CalendarEvent(title="Algorithms", startTime=time(9), endTime=time(10, 15), daysOfWeek=[2, 4])
+    ics = build_ics([], [], "America/New_York", [algo], TERM_START, date(2025, 5, 2))
+    assert "BEGIN:VTIMEZONE\r\nTZID:America/New_York" in ics
+    assert "DTSTART:20250309T020000\r\nTZOFFSETFROM:-0500\r\nTZOFFSETTO:-0400" in ics
+    (event,) = _vevents(ics)
+    assert event["DTSTART"] == "20250114T090000"
+    assert event["RRULE"] == "FREQ=WEEKLY;BYDAY=TU,TH;COUNT=32"
+    print("   ✓ DST onsets listed; Tue/Thu class is one RRULE over the term")
+
+
+def test_stable_output_and_stored_etag():
+    print("\n3. Stable UIDs, folding and stored ETags...")
+    fixed = [{"date": "2025-02-03", "summary": "Überlange Veranstaltung " * 6}]
+    first = build_ics([], fixed, stamp=datetime(2025, 1, 1))
+    assert first == build_ics([], fixed, stamp=datetime(2025, 1, 1))
+    assert all(len(line.encode("utf-8")) <= 75 for line in first.split("\r\n"))
+
+    with tempfile.TemporaryDirectory() as directory:
+        store = ScheduleStore(directory)
+        created = store.save(ScheduleContent(fixed_schedule=fixed))
+        again = store.save(ScheduleContent(fixed_schedule=fixed), created.id)
+        assert again.etag == created.etag and again.updated_at == created.updated_at
+        changed = store.save(ScheduleContent(fixed_schedule=fixed, timezone="Europe/Berlin"), created.id)
+        assert changed.etag != created.etag
+        assert ScheduleStore(directory).get(created.id) == changed
+        assert store.save(ScheduleContent(), "0" * 32) is None
+
+        # Recurring classes without a term: the term is fixed when saving, not at render time
+        algo = CalendarEvent(title="Algorithms", startTime=time(9), endTime=time(10), daysOfWeek=[1])
+        undated = store.save(ScheduleContent(recurring_events=[algo]))
+        assert undated.term_start == date.today()
+        assert undated.term_end == date.today() + timedelta(weeks=16, days=-1)
+        dated = store.save(ScheduleContent(fixed_schedule=fixed, recurring_events=[algo]))
+        assert dated.term_start == date(2025, 2, 3)
+        assert ScheduleStore(directory).get(dated.id).term_end == date(2025, 5, 25)
+    print("   ✓ Identical input renders identically; ETag changes only with content; term stored")
+
+
+if __name__ == "__main__":
+    test_semester_collapses_to_series()
+    test_vtimezone_and_recurring_classes()
+    test_stable_output_and_stored_etag()
@@ -0,0 +1,59 @@
+"""
+Offline test for salvaging malformed LLM JSON output
+Truncated or slightly broken responses should yield every complete element
+"""
+import os
+import sys
+
+# Add parent directory to path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.services.agent2_verifier import verify_assignments
+from app.services.json_stream import JSONArrayStreamParser, repair_json, salvage_json_array
+
+
+def test_repair_keeps_string_content():
+    print("\n1. Trailing commas and code fences...")
+    fixed = repair_json('```json\n[{"a": "x,]", "b": [1, 2,],},]\n```')
+    assert fixed == '[{"a": "x,]", "b": [1, 2]}]'
+    print("   ✓ Trailing commas removed, strings untouched")
+
+
+def test_salvage_truncated_array():
+    print("\n2. Truncated response...")
+    result = salvage_json_array('[{"Task": "Read"}, {"Task": "Write",}, {"Task": "Rev')
+    assert result.items == [{"Task": "Read"}, {"Task": "Write"}]
+    assert result.report.truncated and not result.report.lossless
+    print("   ✓ Complete elements recovered, truncation reported")
+
+
+def test_salvage_skips_malformed_element():
+    print("\n3. One malformed element...")
+    result = salvage_json_array('{"schedule": [{"a": 1}, {oops}, {"a": 2}]')
+    assert result.items == [{"a": 1}, {"a": 2}]
+    assert result.report.malformed == 1
+    print("   ✓ Neighbours of a broken element kept")
+
+
+def test_stream_parser_repairs_elements():
+    print("\n4. Streaming parser...")
+    parser = JSONArrayStreamParser()
+    items = parser.feed('[{"a": 1,}, ') + parser.feed('{"a": 2}]')
+    assert items == [{"a": 1}, {"a": 2}] and parser.errors == 0
+    print("   ✓ Elements repaired as they arrive")
+
+
+def test_verify_assignments_partial():
+    print("\n5. verify_assignments on truncated output...")
+    raw = '[{"title": "Essay", "phases": [{"title": "Draft", "duration_minutes": 60}]}, {"title": "Lab", "pha'
+    assignments = verify_assignments(raw)
+    assert [a["title"] for a in assignments] == ["Essay"]
+    print("   ✓ Partial success instead of an empty result")
+
+
+if __name__ == "__main__":
+    test_repair_keeps_string_content()
+    test_salvage_truncated_array()
+    test_salvage_skips_malformed_element()
+    test_stream_parser_repairs_elements()
+    test_verify_assignments_partial()
@@ -0,0 +1,76 @@
+"""
+Offline test for the LLM response cache
+Keys must depend on exactly the model, config and contents; entries expire
+after their TTL; the disk tier survives a new cache instance
+"""
+import asyncio
+import os
+import sys
+import tempfile
+import time
+from dataclasses import dataclass
+
+# Add parent directory to path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.services.llm_cache import LLMResponseCache, make_key
+
+
+@dataclass
+class Config:
+    temperature: float = 0.0
+    max_output_tokens: int = 1024
+
+
+def test_key_stability():
+    print("\n1. Cache keys...")
+    contents = ["Parse this syllabus", {"role": "user", "parts": ["CSE 611"]}]
+    key = make_key("gemini-2.5-flash", Config(), contents)
+    assert key == make_key("gemini-2.5-flash", Config(), [c for c in contents])
+    assert key == make_key("gemini-2.5-flash", {"max_output_tokens": 1024, "temperature": 0.0}, contents)
+    assert key != make_key("gemini-2.5-pro", Config(), contents)
+    assert key != make_key("gemini-2.5-flash", Config(temperature=0.7), contents)
+    assert key != make_key("gemini-2.5-flash", Config(), contents + ["!"])
+    print("   ✓ Same request, same key; model, config or prompt changes change it")
+
+
+def test_ttl_and_lru():
+    print("\n2. TTL and size bound...")
+    cache = LLMResponseCache(max_entries=2, ttl_seconds=0.05)
+    cache.set("a", "1")
+    cache.set("b", "2")
+    assert cache.get("a") == "1"
+    cache.set("c", "3")  # evicts b, the least recently used
+    assert cache.get("b") is None and cache.get("a") == "1"
+    time.sleep(0.06)
+    assert cache.get("a") is None and cache.get("c") is None
+    stats = cache.stats()
+    assert stats["evictions"] == 1 and stats["entries"] == 0
+    print("   ✓ Least recently used evicted first; expired entries miss")
+
+
+def test_disk_tier():
+    print("\n3. Disk tier...")
+    with tempfile.TemporaryDirectory() as directory:
+        async def run():
+            writer = LLMResponseCache(disk_dir=directory)
+            await writer.aset("k", "stored answer")
+            reader = LLMResponseCache(disk_dir=directory)
+            value = await reader.aget("k")
+            return value, reader.stats(), await reader.aget("missing")
+
+        value, stats, missing = asyncio.run(run())
+        assert value == "stored answer" and missing is None
+        assert stats["disk_hits"] == 1 and stats["entries"] == 1
+
+        expired = LLMResponseCache(ttl_seconds=-1, disk_dir=directory)
+        expired.set("old", "stale")
+        assert LLMResponseCache(disk_dir=directory).get("old") is None
+        assert not os.path.exists(os.path.join(directory, "old.json"))
+    print("   ✓ Entries survive a restart and are promoted to memory; expired files removed")
+
+
+if __name__ == "__main__":
+    test_key_stability()
+    test_ttl_and_lru()
+    test_disk_tier()
@@ -0,0 +1,196 @@
+"""
+Offline test for the shared LLM gateway
+Uses a fake model instead of Gemini: concurrency limit, retries, timeouts,
+request coalescing, caching and streaming retries
+"""
+import os
+import sys
+import json
+import asyncio
+
+# Add parent directory to path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.services.llm_cache import LLMResponseCache
+from app.services.llm_gateway import LLMGateway
+from app.services.llm_providers import LocalStubProvider
+
+
+class ResourceExhausted(Exception):
+    """Stands in for google.api_core.exceptions.ResourceExhausted"""
+    code = 429
+
+
+class FakeResponse:
+    def __init__(self, text):
+        self.text = text
+
+
+class FakeModel:
+    def __init__(self, delay=0.01, failures=0, error=ResourceExhausted):
+        self.delay = delay
+        self.failures = failures
+        self.error = error
+        self.calls = 0
+        self.active = 0
+        self.peak = 0
+
+    async def generate_content_async(self, contents, **kwargs):
+        self.calls += 1
+        self.active += 1
+        self.peak = max(self.peak, self.active)
+        try:
+            await asyncio.sleep(self.delay)
+            if self.failures:
+                self.failures -= 1
+                raise self.error()
+            return FakeResponse(f"answer to {contents}")
+        finally:
+            self.active -= 1
+
+
+class FakeStream:
+    def __init__(self, texts):
+        self.texts = texts
+
+    async def __aiter__(self):
+        for text in self.texts:
+            await asyncio.sleep(0)
+            yield FakeResponse(text)
+
+
+class FakeStreamModel(FakeModel):
+    async def generate_content_async(self, contents, stream=False, **kwargs):
+        response = await super().generate_content_async(contents, **kwargs)
+        return FakeStream(response.text.split(" ")) if stream else response
+
+
+def _gateway(model, **options):
+    options.setdefault("backoff_base", 0.001)
+    gateway = LLMGateway(cache=LLMResponseCache(max_entries=64), **options)
+    gateway.register_model("fake", model)
+    return gateway
+
+
+def test_concurrency_limit():
+    print("\n1. Concurrency limit...")
+    model = FakeModel()
+    gateway = _gateway(model, max_concurrency=2)
+
+    async def run():
+        return await asyncio.gather(*[gateway.generate("fake", f"p{i}", task="test") for i in range(8)])
+
+    results = asyncio.run(run())
+    assert results == [f"answer to p{i}" for i in range(8)]
+    assert model.peak == 2
+    assert gateway.stats()["calls_by_task"] == {"test": 8}
+    print("   ✓ Never more than 2 generations at once")
+
+
+def test_coalescing_and_cache():
+    print("\n2. Identical prompts...")
+    model = FakeModel(delay=0.05)
+    gateway = _gateway(model)
+
+    async def run():
+        first = await asyncio.gather(*[gateway.generate("fake", "same") for _ in range(5)])
+        second = await gateway.generate("fake", "same")
+        return first, second
+
+    first, second = asyncio.run(run())
+    assert set(first) == {"answer to same"} and second == "answer to same"
+    assert model.calls == 1
+    assert gateway.coalesced == 4 and gateway.cache_hits == 1
+    print("   ✓ One generation served 5 concurrent callers and a later cache hit")
+
+
+def test_retry_with_backoff():
+    print("\n3. Retry on rate limiting...")
+    model = FakeModel(failures=2)
+    gateway = _gateway(model, max_retries=3)
+    assert asyncio.run(gateway.generate("fake", "retry")) == "answer to retry"
+    assert model.calls == 3 and gateway.retries == 2
+    print("   ✓ Succeeded on the third attempt")
+
+
+def test_non_retryable_and_timeout():
+    print("\n4. Non-retryable errors and timeouts...")
+    model = FakeModel(failures=1, error=ValueError)
+    gateway = _gateway(model)
+    try:
+        asyncio.run(gateway.generate("fake", "bad"))
+        assert False, "expected ValueError"
+    except ValueError:
+        pass
+    assert model.calls == 1
+
+    slow = FakeModel(delay=1.0)
+    gateway = _gateway(slow, timeout_seconds=0.02, max_retries=1)
+    try:
+        asyncio.run(gateway.generate("fake", "slow"))
+        assert False, "expected timeout"
+    except asyncio.TimeoutError:
+        pass
+    assert slow.calls == 2 and gateway.timeouts == 2
+    print("   ✓ ValueError not retried; timeouts retried then raised")
+
+
+def test_stream_retry_releases_slot():
+    print("\n5. Streaming retry backoff...")
+    streaming = FakeStreamModel(failures=1)
+    gateway = _gateway(streaming, max_concurrency=1, max_retries=2)
+    gateway.register_model("other", FakeModel())
+    gateway._backoff = lambda attempt: 0.2
+    finished = []
+
+    async def consume():
+        text = "".join([chunk async for chunk in gateway.stream("fake", "streamed")])
+        finished.append("stream")
+        return text
+
+    async def other():
+        # Starts while the stream waits to retry; the only slot must be free
+        await asyncio.sleep(0.05)
+        result = await gateway.generate("other", "meanwhile")
+        finished.append("generate")
+        return result
+
+    async def run():
+        return await asyncio.gather(consume(), other())
+
+    text, result = asyncio.run(run())
+    assert text == "answertostreamed" and result == "answer to meanwhile"
+    assert finished == ["generate", "stream"]
+    assert streaming.calls == 2 and gateway.retries == 1 and gateway.in_flight == 0
+    print("   ✓ Another call ran during the stream's backoff")
+
+
+def test_local_stub_provider():
+    print("\n6. Local stub provider...")
+    from app.services import agent1_ingestor, agent2_verifier, planner_service
+
+    gateway = LLMGateway(provider=LocalStubProvider(latency_ms=5))
+
+    async def run():
+        classes = await gateway.generate(agent1_ingestor.MODEL_ID, "You are a class schedule parser. TEXT: ...")
+        again = await gateway.generate(agent1_ingestor.MODEL_ID, "You are a class schedule parser. TEXT: ...")
+        assignments = await gateway.generate(agent1_ingestor.MODEL_ID, "You are an assistant that extracts assignments")
+        prompt, user_prompt, _ = planner_service._schedule_prompts("study", [], None, None)
+        schedule = await gateway.generate(planner_service.GEMINI_MODEL, planner_service._content_blocks(prompt, user_prompt))
+        return classes, again, assignments, schedule
+
+    classes, again, assignments, schedule = asyncio.run(run())
+    assert classes == again
+    assert agent2_verifier.verify_tasks(classes)
+    assert agent2_verifier.verify_assignments(assignments)
+    assert all({"Date", "Task"} <= set(item) for item in json.loads(schedule))
+    print("   ✓ Deterministic, schema-valid answers per prompt type")
+
+
+if __name__ == "__main__":
+    test_concurrency_limit()
+    test_coalescing_and_cache()
+    test_retry_with_backoff()
+    test_non_retryable_and_timeout()
+    test_stream_retry_releases_slot()
+    test_local_stub_provider()
@@ -0,0 +1,61 @@
+"""
+Offline test for the metrics registry and the /metrics endpoint
+"""
+import os
+import sys
+
+# Add parent directory to path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.services.metrics import MetricsRegistry, STAGE_SECONDS, stage
+
+
+def test_exposition_format():
+    print("\n1. Text exposition...")
+    registry = MetricsRegistry()
+    calls = registry.counter("demo_calls_total", "Calls", ["task"])
+    calls.labels("a").inc()
+    calls.labels(task='say "hi"').inc(2)
+    latency = registry.histogram("demo_seconds", "Latency", buckets=(0.1, 1.0))
+    for value in (0.05, 0.1, 0.5, 3.0):
+        latency.observe(value)
+    registry.gauge("demo_depth", "Depth").set_function(lambda: 7)
+
+    text = registry.render()
+    assert 'demo_calls_total{task="a"} 1' in text
+    assert 'demo_calls_total{task="say \\"hi\\""} 2' in text
+    assert 'demo_seconds_bucket{le="0.1"} 2' in text
+    assert 'demo_seconds_bucket{le="1"} 3' in text
+    assert 'demo_seconds_bucket{le="+Inf"} 4' in text
+    assert "demo_seconds_count 4" in text and "demo_seconds_sum 3.65" in text
+    assert "# TYPE demo_depth gauge\ndemo_depth 7" in text
+    print("   ✓ Counters, cumulative buckets and scrape-time gauges rendered")
+
+
+def test_stage_outcomes_and_endpoint():
+    print("\n2. Stage timing and /metrics...")
+    from fastapi.testclient import TestClient
+    from app.main import app
+
+    with stage("test_stage"):
+        pass
+    try:
+        with stage("test_stage"):
+            raise ValueError("boom")
+    except ValueError:
+        pass
+    assert sum(STAGE_SECONDS.labels("test_stage", "ok").counts) == 1
+    assert sum(STAGE_SECONDS.labels("test_stage", "error").counts) == 1
+
+    client = TestClient(app)
+    client.post("/api/v1/planner/ics", json={"schedule": [], "fixed_schedule": []})
+    response = client.get("/metrics")
+    assert response.status_code == 200
+    assert 'aura_stage_duration_seconds_count{stage="test_stage",outcome="error"} 1' in response.text
+    assert 'aura_http_requests_total{method="POST",route="/api/v1/planner/ics",status="200"}' in response.text
+    print("   ✓ Errors recorded separately; routes labelled by template")
+
+
+if __name__ == "__main__":
+    test_exposition_format()
+    test_stage_outcomes_and_endpoint()
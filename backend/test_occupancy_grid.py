@@ -0,0 +1,60 @@
+"""
+Offline test for the NumPy occupancy-grid free-time engine
+At 1-minute resolution it must produce exactly the interval engine's free slots
+"""
+import os
+import sys
+import random
+from datetime import date, time
+
+# Add parent directory to path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.models import CalendarEvent
+from app.services.agent3_scheduler import IntervalFreeTime
+from app.services.occupancy_grid import OccupancyGrid
+
+
+def _random_week(rng):
+    events = []
+    for _ in range(rng.randint(0, 12)):
+        start, end = rng.randint(0, 1439), rng.randint(0, 1439)
+        events.append(CalendarEvent(
+            title="Class",
+            daysOfWeek=rng.sample(range(7), rng.randint(1, 4)),
+            startTime=time(start // 60, start % 60),
+            endTime=time(end // 60, end % 60),  # end < start runs past midnight
+        ))
+    working_hours = {
+        dow: (time(rng.randint(0, 10), rng.choice([0, 15, 30])), time(rng.randint(12, 23), rng.choice([0, 45])))
+        for dow in rng.sample(range(7), rng.randint(1, 7))
+    }
+    return events, working_hours, date(2026, 10, rng.randint(1, 28))
+
+
+def test_grid_matches_interval_engine():
+    print("\n1. Grid (1-minute) vs interval engine...")
+    rng = random.Random(3)
+    for _ in range(200):
+        events, working_hours, start_date = _random_week(rng)
+        intervals = IntervalFreeTime(events, start_date, working_hours)
+        grid = OccupancyGrid(events, start_date, working_hours, resolution=1)
+        for first_day in (0, 7, 14):
+            assert grid.free_intervals(first_day, first_day + 7) == intervals.free_intervals(first_day, first_day + 7)
+    print("   ✓ Identical free slots, including classes past midnight")
+
+
+def test_coarse_grid_is_conservative():
+    print("\n2. 5-minute grid stays inside real free time...")
+    rng = random.Random(11)
+    for _ in range(100):
+        events, working_hours, start_date = _random_week(rng)
+        exact = IntervalFreeTime(events, start_date, working_hours).free_intervals(0, 7)
+        for start, end in OccupancyGrid(events, start_date, working_hours, resolution=5).free_intervals(0, 7):
+            assert any(start >= s and end <= e for s, e in exact)
+    print("   ✓ Every coarse slot lies within an exact free slot")
+
+
+if __name__ == "__main__":
+    test_grid_matches_interval_engine()
+    test_coarse_grid_is_conservative()
@@ -0,0 +1,101 @@
+"""
+Offline test for PDF extraction
+Builds a PDF that spans several worker page ranges and checks that pages come
+back in order, that the byte and page limits raise PDFLimitError (413 from the
+endpoint) and that the temporary copy handed to the workers is removed
+"""
+import asyncio
+import glob
+import os
+import sys
+import tempfile
+
+# Add parent directory to path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.services import pdf_extractor
+
+PAGE_COUNT = pdf_extractor.PAGES_PER_TASK * 2 + 5
+
+
+def _pdf(pages):
+    import pymupdf as fitz
+    doc = fitz.open()
+    for i in range(pages):
+        doc.new_page().insert_text((72, 72), f"Page {i + 1} of the syllabus")
+    data = doc.tobytes()
+    doc.close()
+    return data
+
+
+def _temp_copies():
+    return set(glob.glob(os.path.join(tempfile.gettempdir(), "aura-*.pdf")))
+
+
+def test_pages_in_order_across_ranges():
+    print("\n1. Multi-range PDF through the worker pool...")
+    before = _temp_copies()
+    data = _pdf(PAGE_COUNT)
+    try:
+        pages = asyncio.run(pdf_extractor.extract_pages(data))
+    finally:
+        pdf_extractor.shutdown()
+    assert len(pages) == PAGE_COUNT
+    assert [page.split()[1] for page in pages] == [str(i + 1) for i in range(PAGE_COUNT)]
+    assert _temp_copies() == before
+    # The in-process entry point does the same work
+    assert pdf_extractor.extract_pages_sync(data) == pages
+    print(f"   ✓ {PAGE_COUNT} pages in order, same as in-process; temporary copy removed")
+
+
+def test_limits_and_unreadable_input():
+    print("\n2. Byte and page limits...")
+    data = _pdf(3)
+    try:
+        for kwargs in ({"max_bytes": len(data) - 1}, {"max_pages": 2}):
+            try:
+                asyncio.run(pdf_extractor.extract_pages(data, **kwargs))
+                raise AssertionError(f"no PDFLimitError for {kwargs}")
+            except pdf_extractor.PDFLimitError:
+                pass
+        try:
+            pdf_extractor.extract_pages_sync(data, max_pages=2)
+            raise AssertionError("no PDFLimitError in process")
+        except pdf_extractor.PDFLimitError:
+            pass
+        try:
+            asyncio.run(pdf_extractor.extract_pages(b"not a pdf"))
+            raise AssertionError("no PDFExtractionError for garbage input")
+        except pdf_extractor.PDFLimitError:
+            raise AssertionError("garbage input reported as a limit error")
+        except pdf_extractor.PDFExtractionError:
+            pass
+        assert asyncio.run(pdf_extractor.extract_pages(data, max_pages=3))[2].startswith("Page 3")
+    finally:
+        pdf_extractor.shutdown()
+    print("   ✓ PDFLimitError over either limit, PDFExtractionError for garbage")
+
+
+def test_endpoint_maps_limit_to_413():
+    print("\n3. POST /api/v1/planner/parse-syllabus over the page limit...")
+    from fastapi.testclient import TestClient
+    from app.main import app
+
+    # The head task counts pages before extracting any, so this stays quick
+    try:
+        client = TestClient(app)
+        response = client.post(
+            "/api/v1/planner/parse-syllabus",
+            files={"file": ("syllabus.pdf", _pdf(pdf_extractor.MAX_PDF_PAGES + 1), "application/pdf")},
+        )
+    finally:
+        pdf_extractor.shutdown()
+    assert response.status_code == 413, response.text
+    assert f"limit is {pdf_extractor.MAX_PDF_PAGES}" in response.json()["detail"]
+    print("   ✓ 413 with the page count in the detail")
+
+
+if __name__ == "__main__":
+    test_pages_in_order_across_ranges()
+    test_limits_and_unreadable_input()
+    test_endpoint_maps_limit_to_413()
@@ -0,0 +1,72 @@
+"""
+Offline test for /api/v1/planner/generate/stream
+Runs the endpoint against the local stub model and checks the NDJSON and SSE
+framing: one frame per schedule item, then a single "done" summary frame
+"""
+import json
+import os
+import sys
+
+# Add parent directory to path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from fastapi.testclient import TestClient
+
+from app.main import app
+from app.services import planner_service
+from app.services.llm_gateway import llm_gateway
+from app.services.llm_providers import LocalStubModel
+
+FIXED = [{"date": "2025-02-03", "start_time": "10:00", "end_time": "11:20", "summary": "CSE 611"}]
+
+
+def _stream(body, fmt):
+    # Small chunks so items are split across stream pieces
+    previous = llm_gateway._models.get(planner_service.GEMINI_MODEL)
+    llm_gateway.register_model(planner_service.GEMINI_MODEL,
+                               LocalStubModel(planner_service.GEMINI_MODEL, chunk_chars=7))
+    try:
+        response = TestClient(app).post(f"/api/v1/planner/generate/stream?format={fmt}", json=body)
+    finally:
+        if previous is None:
+            llm_gateway._models.pop(planner_service.GEMINI_MODEL, None)
+        else:
+            llm_gateway.register_model(planner_service.GEMINI_MODEL, previous)
+    assert response.status_code == 200
+    return response
+
+
+def test_ndjson_frames():
+    print("\n1. NDJSON stream...")
+    response = _stream({"goals": "Study 6 hours for the stream test", "fixed_schedule": FIXED}, "ndjson")
+    assert response.headers["content-type"].startswith("application/x-ndjson")
+    assert response.text.endswith("\n")
+    frames = [json.loads(line) for line in response.text.splitlines()]
+    *items, done = frames
+    assert items and all(f["type"] == "item" and f["data"]["Date"] and f["data"]["Task"] for f in items)
+    assert done == {"type": "done", "data": {"count": len(items), "skipped": 0, "reasoning": None}}
+    print(f"   ✓ {len(items)} item lines followed by one done line")
+
+
+def test_sse_frames_with_reasoning():
+    print("\n2. SSE stream in refinement mode...")
+    previous = [{"Date": "2025-02-04", "Start_Time": "09:00", "End_Time": "10:00", "Task": "Read"}]
+    response = _stream({"goals": "Study for the SSE test", "fixed_schedule": FIXED,
+                        "feedback_constraints": "Keep evenings free", "previous_schedule": previous}, "sse")
+    assert response.headers["content-type"].startswith("text/event-stream")
+    blocks = [block for block in response.text.split("\n\n") if block]
+    events = []
+    for block in blocks:
+        event_line, data_line = block.split("\n")
+        assert event_line.startswith("event: ") and data_line.startswith("data: ")
+        events.append((event_line[7:], json.loads(data_line[6:])))
+    assert {name for name, _ in events[:-1]} == {"item"}
+    name, summary = events[-1]
+    assert name == "done" and summary["count"] == len(events) - 1
+    assert summary["reasoning"] == "Moved sessions to respect the new constraints."
+    print(f"   ✓ {len(events) - 1} item events and a done event carrying the reasoning")
+
+
+if __name__ == "__main__":
+    test_ndjson_frames()
+    test_sse_frames_with_reasoning()
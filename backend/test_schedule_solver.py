@@ -0,0 +1,114 @@
+"""
+Offline test for the deterministic schedule solver
+Placed sessions must never overlap each other or the fixed schedule, must
+respect the daily cap and deadlines, and oversized demands must stay cheap
+"""
+import asyncio
+import os
+import sys
+import time
+from datetime import date, datetime
+
+# Add parent directory to path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.services.schedule_solver import TaskDemand, solve
+
+MONDAY = date(2025, 1, 6)
+FIXED = [
+    {"date": "2025-01-06", "start_time": "08:00", "end_time": "12:00", "summary": "Lab"},
+    {"date": "2025-01-07", "start_time": "10:00", "end_time": "11:30", "summary": "CSE 611"},
+    {"date": "2025-01-08", "summary": "Deadline reminder"},  # all-day: does not block time
+]
+
+
+def _interval(day, start, end):
+    return (datetime.fromisoformat(f"{day}T{start}"), datetime.fromisoformat(f"{day}T{end}"))
+
+
+def test_no_overlaps_and_daily_cap():
+    print("\n1. Overlaps and daily cap...")
+    demands = [
+        TaskDemand(task="Algorithms", total_minutes=600, session_minutes=90),
+        TaskDemand(task="Essay", total_minutes=300, session_minutes=60),
+        TaskDemand(task="Gym", category="Personal", total_minutes=240, session_minutes=45,
+                   earliest_time="17:00", latest_time="20:00"),
+    ]
+    result = solve(demands, FIXED, start_date=MONDAY, days=3, daily_cap_minutes=180)
+
+    busy = [_interval(e["date"], e["start_time"], e["end_time"]) for e in FIXED if "start_time" in e]
+    placed = [_interval(i["Date"], i["Start_Time"], i["End_Time"]) for i in result.schedule]
+    everything = sorted(busy + placed)
+    assert all(a[1] <= b[0] for a, b in zip(everything, everything[1:])), "overlap"
+
+    per_day = {}
+    for start, end in placed:
+        per_day[start.date()] = per_day.get(start.date(), 0) + (end - start).seconds // 60
+    assert per_day and max(per_day.values()) <= 180
+    for item in result.schedule:
+        if item["Task"] == "Gym":
+            assert "17:00" <= item["Start_Time"] and item["End_Time"] <= "20:00"
+    scheduled = sum(per_day.values())
+    unplaced = sum(u.minutes for u in result.unplaced)
+    assert scheduled + unplaced == 600 + 300 + 240
+    print(f"   ✓ {len(placed)} sessions, no overlaps, at most 180 minutes a day")
+
+
+def test_deadlines():
+    print("\n2. Deadlines...")
+    demands = [
+        TaskDemand(task="Later", total_minutes=120, session_minutes=60),
+        TaskDemand(task="Quiz prep", total_minutes=240, session_minutes=60, deadline=MONDAY),
+    ]
+    result = solve(demands, [], start_date=MONDAY, days=5, daily_cap_minutes=180)
+    quiz = [i for i in result.schedule if i["Task"] == "Quiz prep"]
+    assert quiz and all(i["Date"] == MONDAY.isoformat() for i in quiz)
+    assert sum(u.minutes for u in result.unplaced if u.task == "Quiz prep") == 60
+    assert {u.reason for u in result.unplaced} == {"no free slot before deadline"}
+    print("   ✓ Urgent task placed first, only before its deadline; the rest reported")
+
+
+def test_oversized_demand_is_bounded():
+    print("\n3. Oversized demand...")
+    demand = TaskDemand(task="Everything", total_minutes=20000, session_minutes=15)
+    started = time.perf_counter()
+    result = solve([demand], [], start_date=MONDAY, days=7)
+    elapsed = time.perf_counter() - started
+    assert elapsed < 0.5, elapsed
+    assert sum(u.minutes for u in result.unplaced) + 15 * len(result.schedule) == 20000
+    assert any(u.reason == "more time than the whole horizon holds" for u in result.unplaced)
+    print(f"   ✓ 20000 minutes capped to the horizon in {elapsed * 1000:.1f} ms")
+
+
+def test_solve_schedule_runs_off_the_loop():
+    print("\n4. solve_schedule and the event loop...")
+    from app.services import planner_service, schedule_solver
+
+    original_solve, original_extract = schedule_solver.solve, planner_service.extract_task_demands
+    seen = {}
+
+    def recording_solve(*args, **kwargs):
+        try:
+            asyncio.get_running_loop()
+            seen["on_loop"] = True
+        except RuntimeError:
+            seen["on_loop"] = False
+        return original_solve(*args, **kwargs)
+
+    async def fake_extract(goals, feedback_constraints=None):
+        return [{"task": "Read", "total_minutes": 60}]
+
+    schedule_solver.solve, planner_service.extract_task_demands = recording_solve, fake_extract
+    try:
+        result = asyncio.run(planner_service.solve_schedule("Read", [], start_date=MONDAY))
+    finally:
+        schedule_solver.solve, planner_service.extract_task_demands = original_solve, original_extract
+    assert seen == {"on_loop": False} and len(result["schedule"]) == 1
+    print("   ✓ Solver ran in a worker thread")
+
+
+if __name__ == "__main__":
+    test_no_overlaps_and_daily_cap()
+    test_deadlines()
+    test_oversized_demand_is_bounded()
+    test_solve_schedule_runs_off_the_loop()
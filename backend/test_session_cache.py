@@ -0,0 +1,96 @@
+"""
+Offline test for the session cache backends
+Every backend must keep sessions apart, expire entries after their TTL and
+stay under its size budget by evicting the least recently used entries
+"""
+import os
+import sys
+import tempfile
+import time
+
+# Add parent directory to path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.services.cache import Cache, FileBackend, MemoryBackend, SQLiteBackend, session_namespace
+
+
+def _backends(directory, max_bytes=1 << 20):
+    return {
+        "memory": MemoryBackend(max_bytes),
+        "sqlite": SQLiteBackend(os.path.join(directory, "cache.sqlite3"), max_bytes),
+        "file": FileBackend(os.path.join(directory, "files"), max_bytes),
+    }
+
+
+def test_namespaces_are_isolated():
+    print("\n1. Session namespaces...")
+    alice, bob = session_namespace("alice"), session_namespace("bob")
+    assert session_namespace("../../etc") != session_namespace("../../etd")
+    assert "/" not in session_namespace("../../etc")
+    with tempfile.TemporaryDirectory() as directory:
+        for name, backend in _backends(directory).items():
+            cache = Cache(backend)
+            cache.set("classes", ["CSE 611"], namespace=alice)
+            cache.set("classes", ["MTH 309"], namespace=bob)
+            assert cache.get("classes", namespace=alice) == ["CSE 611"], name
+            assert cache.get("classes", namespace=bob) == ["MTH 309"], name
+            assert cache.get("classes") is None, name
+            cache.clear_namespace(alice)
+            assert cache.get("classes", namespace=alice) is None, name
+            assert cache.get("classes", namespace=bob) == ["MTH 309"], name
+    print("   ✓ Memory, SQLite and file backends keep sessions apart")
+
+
+def test_ttl_expiry():
+    print("\n2. TTL expiry...")
+    with tempfile.TemporaryDirectory() as directory:
+        for name, backend in _backends(directory).items():
+            cache = Cache(backend, default_ttl=0.05)
+            cache.set("short", "x")
+            cache.set("long", "y", ttl=60)
+            assert cache.get("short") == "x", name
+            time.sleep(0.06)
+            assert cache.get("short") is None, name
+            assert cache.get("long") == "y", name
+            assert backend.stats()["entries"] == 1, name
+    print("   ✓ Expired entries are dropped on read")
+
+
+def test_size_eviction():
+    print("\n3. Size-based eviction...")
+    blob = "x" * 4000
+    with tempfile.TemporaryDirectory() as directory:
+        for name, backend in _backends(directory, max_bytes=10_000).items():
+            cache = Cache(backend)
+            for key in ("a", "b"):
+                cache.set(key, blob)
+                time.sleep(0.01)  # distinct LRU clocks for the file backend
+            assert cache.get("a") == blob, name  # a is now more recent than b
+            time.sleep(0.01)
+            cache.set("c", blob)
+            stats = backend.stats()
+            assert stats["bytes"] <= 10_000 and stats["evictions"] == 1, (name, stats)
+            assert cache.get("b") is None, name
+            assert cache.get("a") == blob and cache.get("c") == blob, name
+    print("   ✓ Least recently used entry evicted once over budget")
+
+
+def test_file_backend_tracks_size_across_instances():
+    print("\n4. File backend size tracking...")
+    with tempfile.TemporaryDirectory() as directory:
+        first = FileBackend(directory, max_bytes=10_000)
+        first.set("default:a", "x" * 4000, None)
+        first.set("default:a", "y" * 4000, None)  # overwrite is not double-counted
+        assert first.stats()["entries"] == 1 and first.evictions == 0
+        second = FileBackend(directory, max_bytes=10_000)
+        second.set("default:b", "z" * 4000, None)
+        second.set("default:c", "z" * 4000, None)
+        assert second.evictions == 1 and second.stats()["bytes"] <= 10_000
+    print("   ✓ Overwrites counted once; existing files seen at startup")
+
+
+if __name__ == "__main__":
+    test_namespaces_are_isolated()
+    test_ttl_expiry()
+    test_size_eviction()
+    test_file_backend_tracks_size_across_instances()
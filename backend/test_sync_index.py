@@ -0,0 +1,83 @@
+"""
+Offline test for incremental calendar sync
+plan_sync must send only the inserts, patches and deletes that are needed, and
+never delete an event just because its item failed to build this time
+"""
+import os
+import sys
+import tempfile
+
+# Add parent directory to path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.services.planner_service import build_sync_payloads
+from app.services.sync_index import IndexEntry, SyncIndex, content_hash, plan_sync
+
+
+def _item(day, task, start="09:00"):
+    return {"Date": day, "Start_Time": start, "End_Time": "10:00", "Task": task, "Category": "Study"}
+
+
+def _index(payloads):
+    return {key: IndexEntry(event_id=f"g{i}", content_hash=content_hash(p))
+            for i, (key, p) in enumerate(payloads.items())}
+
+
+def test_plan_insert_patch_delete_unchanged():
+    print("\n1. Diffing a re-sync against the index...")
+    first, errors, _ = build_sync_payloads([_item("2025-02-03", "Read"), _item("2025-02-04", "Write"),
+                                            _item("2025-02-05", "Review")], [])
+    assert not errors
+    existing = _index(first)
+
+    # Read unchanged, Write moved to a later end (patch), Review dropped (delete), Code added (insert)
+    changed = [_item("2025-02-03", "Read"), dict(_item("2025-02-04", "Write"), End_Time="11:00"),
+               _item("2025-02-06", "Code")]
+    desired, errors, _ = build_sync_payloads(changed, [])
+    plan = plan_sync(desired, existing)
+    assert plan.unchanged == 1
+    assert [op.payload["summary"] for op in plan.inserts] == ["Code"]
+    assert [op.payload["summary"] for op in plan.patches] == ["Write"]
+    assert [op.event_id for op in plan.deletes] == ["g2"]
+
+    again = plan_sync(first, existing)
+    assert (again.inserts, again.patches, again.deletes, again.unchanged) == ([], [], [], 3)
+    print("   ✓ One insert, one patch, one delete, one unchanged; identical re-sync is a no-op")
+
+
+def test_failed_item_is_not_deleted():
+    print("\n2. An item that fails to build...")
+    first, _, _ = build_sync_payloads([_item("2025-02-03", "Read"), _item("2025-02-04", "Write")], [])
+    existing = _index(first)
+
+    broken = [_item("2025-02-03", "Read"), _item("2025-02-04", "Write", start="not a time")]
+    desired, errors, failed_keys = build_sync_payloads(broken, [])
+    assert len(errors) == 1 and len(failed_keys) == 1
+    # The malformed item has a key of its own, so pretend it was synced before
+    existing[failed_keys[0]] = IndexEntry(event_id="gx", content_hash="stale")
+    plan = plan_sync(desired, existing, keep=failed_keys)
+    assert "gx" not in [op.event_id for op in plan.deletes]
+    print("   ✓ Failed items keep their calendar events")
+
+
+def test_index_persists_per_calendar():
+    print("\n3. Sync index file...")
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "index.json")
+        index = SyncIndex(path)
+        index.update("cal-a", {"k1": IndexEntry(event_id="e1", content_hash="h1"),
+                               "k2": IndexEntry(event_id="e2", content_hash="h2")}, [])
+        index.update("cal-a", {}, ["k2"])
+        index.update("cal-b", {"k1": IndexEntry(event_id="b1", content_hash="h")}, [])
+
+        reloaded = SyncIndex(path)
+        assert reloaded.entries("cal-a") == {"k1": IndexEntry(event_id="e1", content_hash="h1")}
+        assert reloaded.entries("cal-b")["k1"].event_id == "b1"
+        assert reloaded.entries("cal-c") == {}
+    print("   ✓ Upserts and removals persisted, calendars kept apart")
+
+
+if __name__ == "__main__":
+    test_plan_insert_patch_delete_unchanged()
+    test_failed_item_is_not_deleted()
+    test_index_persists_per_calendar()
@@ -2,6 +2,18 @@ import axios from 'axios';
 
 const API_BASE_URL = 'http://localhost:8000/api/v1'; // FastAPI default port
 
+// Per-browser session id so the backend keeps each user's uploads separate
+const SESSION_STORAGE_KEY = 'aura-session-id';
+const getSessionId = (): string => {
+  let sessionId = localStorage.getItem(SESSION_STORAGE_KEY);
+  if (!sessionId) {
+    sessionId = crypto.randomUUID();
+    localStorage.setItem(SESSION_STORAGE_KEY, sessionId);
+  }
+  return sessionId;
+};
+axios.defaults.headers.common['X-Session-Id'] = getSessionId();
+
 export interface CalendarEvent {
   id?: string;
   title: string;